@@ -0,0 +1,85 @@
+"""
+Benchmark transcribing many recordings through the async Gladia client
+against the blocking one-at-a-time loop, offline, using the local mock
+Gladia server.
+
+Every job uploads a short WAV, creates a transcription and polls it until
+the mock finishes "processing" it. Reports wall time and recordings per
+minute for the sequential baseline and for each concurrency level.
+
+Run from the repository root:
+    python -m benchmarks.bench_async_transcription --recordings 200 --concurrency 1 10 50 200
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+from transcription.async_gladia import transcribe_all
+from transcription.gladia_client import GladiaClient
+from transcription.mock_gladia import MockGladiaServer
+
+API_KEY = "bench-key"
+
+
+def make_recordings(directory, n, seconds, sr=16000):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(n):
+        path = os.path.join(directory, f"answer_{i:04d}.wav")
+        sf.write(path, (rng.standard_normal(int(seconds * sr)) * 0.01).astype(np.float32), sr)
+        paths.append(path)
+    return paths
+
+
+def legacy_transcribe_all(paths, base_url):
+    """The batch run's original flow: one blocking transcription after another."""
+    with GladiaClient(API_KEY, base_url=base_url, callback_url="") as client:
+        return [client.transcribe(path) for path in paths]
+
+
+def report(label, n, failed, elapsed, server):
+    print(
+        f"{label:>16} | {elapsed:7.2f}s wall | {n / elapsed * 60:8.1f} recordings/min | "
+        f"{failed:3d} failed | {server.counts['connections']:4d} connections"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recordings", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--rate-limit", type=float, default=0, help="Requests per second (0 for no limit)")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Length of each recording")
+    parser.add_argument("--processing-time", type=float, default=1.0, help="Seconds the mock takes per job")
+    parser.add_argument("--skip-sequential", action="store_true", help="Don't time the blocking baseline")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        paths = make_recordings(directory, args.recordings, args.seconds)
+        with MockGladiaServer(API_KEY, polls_until_done=1, processing_time=args.processing_time) as server:
+            if not args.skip_sequential:
+                server.counts.clear()
+                start = time.perf_counter()
+                legacy_transcribe_all(paths, server.url)
+                report("sequential", len(paths), 0, time.perf_counter() - start, server)
+
+            for concurrency in args.concurrency:
+                server.counts.clear()
+                start = time.perf_counter()
+                results = transcribe_all(
+                    paths, API_KEY, concurrency=concurrency, rate_limit=args.rate_limit, base_url=server.url
+                )
+                failed = sum(result["error"] is not None for result in results)
+                report(f"async x{concurrency}", len(paths), failed, time.perf_counter() - start, server)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
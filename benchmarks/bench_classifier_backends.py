@@ -0,0 +1,123 @@
+"""
+Export, validate and benchmark the text classifier's inference backends.
+
+Scores a fixed labelled evaluation set with fp32 PyTorch, dynamically
+quantized int8 PyTorch and ONNX Runtime. For each backend it reports accuracy
+against the labels and its delta from fp32, agreement with the fp32
+predictions, the largest AI-probability difference, single-text latency and
+batched throughput. The fp32 model is loaded once and the int8 model is
+quantized from it, so the backends compare the same weights. Pass --export to
+(re)write the ONNX model from that same instance first; it is stored where the
+onnx backend in config.yaml looks for it.
+
+Run from the repository root:
+    python -m benchmarks.bench_classifier_backends --model roberta-base --export
+    python -m benchmarks.bench_classifier_backends --backends torch torch_int8
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import torch
+from transformers import AutoTokenizer
+
+from nlp_analysis.inference import (
+    BACKENDS, BACKEND_ONNX, BACKEND_TORCH, BACKEND_TORCH_INT8, OnnxSequenceClassifier, export_onnx,
+    load_fp32_model, onnx_path, quantize_int8,
+)
+from utils.model_registry import CLASSIFIER_MODEL
+
+EVAL_SET = os.path.join(os.path.dirname(__file__), "data", "classifier_eval.jsonl")
+
+
+def load_eval_set(path=EVAL_SET):
+    with open(path) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [row["text"] for row in rows], np.array([row["label"] for row in rows])
+
+
+def ai_probabilities(tokenizer, model, texts, batch_size, max_length):
+    """AI-class probability of each text, batch_size texts per forward pass."""
+    probs = []
+    with torch.no_grad():
+        for start in range(0, len(texts), batch_size):
+            inputs = tokenizer(
+                texts[start:start + batch_size], return_tensors="pt",
+                truncation=True, max_length=max_length, padding=True,
+            )
+            logits = model(**inputs).logits
+            probs.extend(torch.softmax(logits, dim=1)[:, 1].tolist())
+    return np.array(probs)
+
+
+def measure(tokenizer, model, texts, batch_size, max_length, repeat):
+    # Warm-up pass so one-time allocations and graph setup aren't timed
+    ai_probabilities(tokenizer, model, texts[:batch_size], batch_size, max_length)
+
+    latencies = []
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            ai_probabilities(tokenizer, model, [text], 1, max_length)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        probs = ai_probabilities(tokenizer, model, texts, batch_size, max_length)
+    throughput = repeat * len(texts) / (time.perf_counter() - start)
+    return probs, float(np.median(latencies)), throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=CLASSIFIER_MODEL, help="Classifier name or local path")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--export", action="store_true", help="Export the model to ONNX before benchmarking")
+    parser.add_argument("--eval-set", default=EVAL_SET, help="JSON lines of {text, label} (1 = AI)")
+    parser.add_argument("--batch-size", type=int, default=16, help="Texts per forward pass for throughput")
+    parser.add_argument("--max-length", type=int, default=512, help="Tokens per text")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the evaluation set")
+    parser.add_argument("--threads", type=int, default=None, help="Torch intra-op threads")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    # Every backend is derived from this one fp32 instance
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    fp32 = load_fp32_model(args.model)
+    if args.export:
+        print(f"Exported {args.model} to {export_onnx(args.model, model=fp32, tokenizer=tokenizer)}")
+    builders = {
+        BACKEND_TORCH: lambda: fp32,
+        BACKEND_TORCH_INT8: lambda: quantize_int8(fp32),
+        BACKEND_ONNX: lambda: OnnxSequenceClassifier(onnx_path(args.model)),
+    }
+
+    texts, labels = load_eval_set(args.eval_set)
+    backends = [BACKEND_TORCH] + [b for b in args.backends if b != BACKEND_TORCH]
+
+    reference = None
+    for backend in backends:
+        model = builders[backend]()
+        probs, latency, throughput = measure(
+            tokenizer, model, texts, args.batch_size, args.max_length, args.repeat
+        )
+        predictions = probs >= 0.5
+        accuracy = float(np.mean(predictions == labels))
+        if reference is None:
+            reference = (probs, predictions, accuracy)
+        ref_probs, ref_predictions, ref_accuracy = reference
+
+        print(
+            f"{backend:>10} | accuracy {accuracy:6.1%} (delta {accuracy - ref_accuracy:+6.1%}) | "
+            f"agrees with fp32 {np.mean(predictions == ref_predictions):6.1%} | "
+            f"max |p - p_fp32| {np.max(np.abs(probs - ref_probs)):.2e} | "
+            f"latency p50 {latency * 1000:7.2f} ms | {throughput:7.1f} texts/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
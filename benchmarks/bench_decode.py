@@ -0,0 +1,116 @@
+"""
+Benchmark loading compressed uploads: the original pydub -> WAV -> librosa
+round-trip against the single ffmpeg decode used by load_and_preprocess.
+
+A synthetic stereo 44.1 kHz recording is encoded to each container, then
+loaded as 16 kHz mono float32 both ways. Reports wall time per load, bytes
+written to disk along the way, and the largest sample difference between
+the two results.
+
+Run from the repository root:
+    python -m benchmarks.bench_decode --seconds 300 --formats mp3 m4a flac mp4
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+from preprocessing.decode import ffmpeg_binary, load_audio
+
+SAMPLE_RATE = 16000
+ENCODE_ARGS = {
+    "mp3": ["-c:a", "libmp3lame", "-b:a", "128k"],
+    "m4a": ["-c:a", "aac", "-b:a", "128k"],
+    "flac": ["-c:a", "flac"],
+    "mp4": ["-c:a", "aac", "-b:a", "128k"],
+}
+
+
+def legacy_load(path):
+    """The original path: pydub decodes and writes a WAV next to the source, librosa decodes it again."""
+    wav_path = path.replace(os.path.splitext(path)[-1], ".wav")
+    if shutil.which("ffprobe"):
+        from pydub import AudioSegment
+
+        AudioSegment.converter = ffmpeg_binary()
+        AudioSegment.from_file(path).export(wav_path, format="wav")
+    else:
+        # pydub needs ffprobe; replay its steps with ffmpeg alone: decode to a
+        # temporary WAV, read it into memory, write it out again next to the source
+        with tempfile.NamedTemporaryFile(suffix=".wav") as tmp:
+            subprocess.run([ffmpeg_binary(), "-nostdin", "-loglevel", "error", "-y", "-i", path,
+                            "-vn", "-f", "wav", tmp.name], check=True)
+            data = tmp.read()
+        with open(wav_path, "wb") as f:
+            f.write(data)
+    # pydub's temporary WAV plus the exported copy
+    written = 2 * os.path.getsize(wav_path)
+    y, _ = librosa.load(wav_path, sr=SAMPLE_RATE)
+    os.remove(wav_path)
+    return y, written
+
+
+def make_source(directory, seconds, sr=44100):
+    t = np.arange(int(seconds * sr)) / sr
+    voiced = sum(np.sin(2 * np.pi * k * (140 + 20 * np.sin(2 * np.pi * 0.5 * t)) * t) / k for k in range(1, 5))
+    noise = 0.01 * np.random.default_rng(0).standard_normal((2, len(t)))
+    y = (0.3 * voiced * (np.sin(2 * np.pi * 0.15 * t) > -0.3) + noise).T.astype(np.float32)
+    path = os.path.join(directory, "source.wav")
+    sf.write(path, y, sr)
+    return path
+
+
+def encode(source, directory, fmt):
+    # Keep encoded files in their own folder so the legacy WAV can't overwrite the source
+    path = os.path.join(directory, fmt, f"answer.{fmt}")
+    os.makedirs(os.path.dirname(path))
+    command = [ffmpeg_binary(), "-nostdin", "-loglevel", "error", "-i", source]
+    if fmt == "mp4":
+        command = [ffmpeg_binary(), "-nostdin", "-loglevel", "error", "-f", "lavfi",
+                   "-i", "color=c=black:s=320x240:r=25", "-i", source, "-shortest", "-c:v", "libx264"]
+    subprocess.run(command + ENCODE_ARGS[fmt] + [path], check=True)
+    return path
+
+
+def best_of(repeat, load):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = load()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=300, help="Length of the synthetic recording")
+    parser.add_argument("--formats", nargs="+", default=list(ENCODE_ARGS), choices=list(ENCODE_ARGS))
+    parser.add_argument("--repeat", type=int, default=3, help="Loads per method; the fastest is reported")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        source = make_source(directory, args.seconds)
+        for fmt in args.formats:
+            path = encode(source, directory, fmt)
+            legacy_time, (legacy, written) = best_of(args.repeat, lambda: legacy_load(path))
+            new_time, y = best_of(args.repeat, lambda: load_audio(path, SAMPLE_RATE))
+            n = min(len(legacy), len(y))
+            print(
+                f"{fmt:>5} | legacy {legacy_time * 1000:8.1f} ms, {written / 1e6:6.1f} MB written | "
+                f"single decode {new_time * 1000:8.1f} ms, 0.0 MB written | "
+                f"{legacy_time / new_time:5.1f}x | max |diff| {np.max(np.abs(legacy[:n] - y[:n])):.1e} "
+                f"({len(legacy) - len(y):+d} samples)"
+            )
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark the shared-spectrogram FeatureEngine against the per-feature
+librosa calls it replaced.
+
+Run from the repository root:
+    python -m benchmarks.bench_feature_extraction --minutes 30 60
+    python -m benchmarks.bench_feature_extraction --input data/input_audio/interview.wav
+"""
+import argparse
+import time
+
+import librosa
+import numpy as np
+
+from preprocessing.feature_extraction import (
+    FeatureEngine,
+    extract_mfcc,
+    extract_spectral_features,
+)
+
+SAMPLE_RATE = 16000
+
+
+def legacy_extract_features(y, sr):
+    """The original implementation: one STFT per librosa feature call."""
+    mfccs = extract_mfcc(y, sr)
+    spectral_centroid, spectral_bandwidth, spectral_rolloff = extract_spectral_features(y, sr)
+    return {
+        "mfccs": mfccs,
+        "spectral_centroid": spectral_centroid,
+        "spectral_bandwidth": spectral_bandwidth,
+        "spectral_rolloff": spectral_rolloff,
+    }
+
+
+def synthetic_interview(minutes, sr=SAMPLE_RATE, seed=0):
+    """Speech-like test signal: amplitude-modulated harmonics over background noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(minutes * 60 * sr), dtype=np.float32) / sr
+    f0 = 120 + 30 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 2.5 * t))
+    noise = 0.05 * rng.standard_normal(t.shape[0])
+    return (0.3 * envelope * voiced + noise).astype(np.float32)
+
+
+def time_call(func, *args, repeat=1):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(y, sr, label, repeat):
+    legacy_time, legacy = time_call(legacy_extract_features, y, sr, repeat=repeat)
+
+    engine = FeatureEngine(sr)
+    engine_time, features = time_call(engine.extract, y, None, repeat=repeat)
+    mfcc_time, _ = time_call(engine.extract, y, ("mfccs",), repeat=repeat)
+
+    max_diff = max(
+        float(np.max(np.abs(legacy[name] - features[name]) / (np.abs(legacy[name]).max() + 1e-9)))
+        for name in features
+    )
+    print(
+        f"{label:>12} | legacy {legacy_time:7.2f}s | engine {engine_time:7.2f}s "
+        f"({legacy_time / engine_time:4.1f}x) | mfccs only {mfcc_time:7.2f}s "
+        f"({legacy_time / mfcc_time:4.1f}x) | max rel diff {max_diff:.1e}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[30, 60],
+                        help="Durations of synthetic recordings to benchmark")
+    parser.add_argument("--input", help="Benchmark a real recording instead of synthetic audio")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per measurement (best is kept)")
+    args = parser.parse_args()
+
+    # Warm up librosa's numba-compiled kernels so the first run isn't penalised
+    warmup = synthetic_interview(0.05)
+    legacy_extract_features(warmup, SAMPLE_RATE)
+    FeatureEngine(SAMPLE_RATE).extract(warmup)
+
+    if args.input:
+        y, sr = librosa.load(args.input, sr=SAMPLE_RATE)
+        run(y, sr, f"{len(y) / sr / 60:.1f} min", args.repeat)
+        return
+
+    for minutes in args.minutes:
+        run(synthetic_interview(minutes), SAMPLE_RATE, f"{minutes:g} min", args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark the pooled GladiaClient against the original bare-requests calls,
+offline, using the local mock Gladia server.
+
+Each transcription uploads a file, creates a job and polls it until done.
+Reports transcriptions per second and TCP connections opened.
+
+Run from the repository root:
+    python -m benchmarks.bench_gladia_client --transcriptions 200 --size-kb 512
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import requests
+
+from transcription import gladia_client
+from transcription.gladia_client import GladiaClient, transcript_text
+from transcription.mock_gladia import MockGladiaServer
+
+API_KEY = "bench-key"
+
+
+def legacy_transcribe(base_url, path, api_key=API_KEY):
+    """The original flow: a new connection per request and the file read through form encoding."""
+    headers = {"x-gladia-key": api_key}
+    with open(path, "rb") as f:
+        response = requests.post(f"{base_url}/v2/upload", headers=headers, files={"audio": f})
+    response.raise_for_status()
+    audio_url = response.json()["audio_url"]
+
+    response = requests.post(f"{base_url}/v2/pre-recorded", headers=headers, json={"audio_url": audio_url})
+    response.raise_for_status()
+    job_id = response.json()["id"]
+
+    while True:
+        data = requests.get(f"{base_url}/v2/pre-recorded/{job_id}", headers=headers).json()
+        if data["status"] == "done":
+            return transcript_text(data)
+
+
+def run(label, transcribe, server, n):
+    server.counts.clear()
+    start = time.perf_counter()
+    for _ in range(n):
+        transcribe()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:>8} | {n / elapsed:7.1f} transcriptions/s | "
+        f"{server.counts['connections']:5d} connections for {sum(server.counts.values()) - server.counts['connections']} requests"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transcriptions", type=int, default=200)
+    parser.add_argument("--size-kb", type=int, default=512, help="Size of the uploaded file")
+    parser.add_argument("--polls", type=int, default=3, help="Polls before each job is done")
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        f.write(os.urandom(args.size_kb * 1024))
+        path = f.name
+
+    try:
+        with MockGladiaServer(API_KEY, polls_until_done=args.polls) as server:
+            run("legacy", lambda: legacy_transcribe(server.url, path), server, args.transcriptions)
+            # Poll back to back like the legacy loop, so only the HTTP layer differs
+            gladia_client.POLLING.update(min_interval=0, max_interval=0, jitter=0)
+            with GladiaClient(API_KEY, base_url=server.url, callback_url="") as client:
+                run("pooled", lambda: client.transcribe(path), server, args.transcriptions)
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark the linear-time MATTR and trigram repetition counters against the
+window-set and joined-string implementations they replaced.
+
+Run from the repository root:
+    python -m benchmarks.bench_text_features --words 1000 10000 100000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from nlp_analysis.text_stats import max_ngram_count, moving_average_ttr, token_ids
+
+WINDOW_SIZE = 50
+
+
+def legacy_mattr(words, window_size=WINDOW_SIZE):
+    """The original MATTR: a fresh set for every window."""
+    if len(words) < window_size:
+        return len(set(words)) / len(words)
+    return np.mean([
+        len(set(words[i:i + window_size])) / window_size
+        for i in range(len(words) - window_size + 1)
+    ])
+
+
+def legacy_max_trigram_count(words):
+    """The original repetition count: a dict of space-joined trigrams."""
+    phrase_counts = {}
+    for i in range(len(words) - 2):
+        phrase = ' '.join(words[i:i + 3])
+        phrase_counts[phrase] = phrase_counts.get(phrase, 0) + 1
+    return max(phrase_counts.values()) if phrase_counts else 0
+
+
+def synthetic_transcript(n_words, vocabulary_size=5000, seed=0):
+    """Zipf-distributed words, roughly the type/token profile of spoken English."""
+    rng = np.random.default_rng(seed)
+    ranks = rng.zipf(1.3, size=n_words) % vocabulary_size
+    return [f"word{rank}" for rank in ranks]
+
+
+def time_call(func, *args, repeat=1):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(words, repeat):
+    ids_time, ids = time_call(token_ids, words, repeat=repeat)
+
+    legacy_time, legacy = time_call(legacy_mattr, words, repeat=repeat)
+    mattr_time, mattr = time_call(moving_average_ttr, ids, WINDOW_SIZE, repeat=repeat)
+    print(
+        f"{len(words):>8} words | MATTR      legacy {legacy_time:8.4f}s | incremental "
+        f"{mattr_time + ids_time:8.4f}s ({legacy_time / (mattr_time + ids_time):6.1f}x) | "
+        f"diff {abs(legacy - mattr):.1e}"
+    )
+
+    legacy_time, legacy = time_call(legacy_max_trigram_count, words, repeat=repeat)
+    ngram_time, count = time_call(max_ngram_count, ids, 3, repeat=repeat)
+    assert legacy == count, (legacy, count)
+    print(
+        f"{len(words):>8} words | trigrams   legacy {legacy_time:8.4f}s | hashed      "
+        f"{ngram_time + ids_time:8.4f}s ({legacy_time / (ngram_time + ids_time):6.1f}x)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Transcript lengths to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    args = parser.parse_args()
+
+    for n_words in args.words:
+        run(synthetic_transcript(n_words), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
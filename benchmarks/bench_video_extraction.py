@@ -0,0 +1,108 @@
+"""
+Benchmark pulling the audio out of uploaded videos: the original moviepy
+VideoFileClip -> write_audiofile path against extract_audio, which demuxes
+only the audio stream and resamples/downmixes it in one ffmpeg process.
+
+A synthetic MP4 of roughly --size-mb (H.264 video plus a stereo AAC track)
+is generated once, since MAX_CONTENT_LENGTH admits uploads up to 500 MB.
+Reports wall time, the size of the WAV left for analysis, and the peak RSS
+of the Python process and of the ffmpeg children it starts.
+
+Run from the repository root:
+    python -m benchmarks.bench_video_extraction --size-mb 500 --seconds 600
+"""
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from preprocessing.decode import extract_audio, ffmpeg_binary
+
+
+def legacy_extract(video_path, audio_path):
+    """The original path: open the whole clip with moviepy and write its audio at moviepy's defaults."""
+    from moviepy import VideoFileClip
+
+    video = VideoFileClip(video_path)
+    video.audio.write_audiofile(audio_path, logger=None)
+    video.close()
+    return audio_path
+
+
+def make_video(path, size_mb, seconds):
+    """Encode test-pattern video with a tone, at a bitrate that lands near size_mb."""
+    audio_kbps = 128
+    video_kbps = max(int(size_mb * 8 * 1024 / seconds) - audio_kbps, 100)
+    subprocess.run([
+        ffmpeg_binary(), "-nostdin", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=s=1280x720:r=25:d={seconds}",
+        "-f", "lavfi", "-i", f"sine=f=220:r=44100:d={seconds}",
+        "-filter_complex", "[1:a]aformat=channel_layouts=stereo[a]", "-map", "0:v", "-map", "[a]",
+        "-c:v", "libx264", "-preset", "ultrafast", "-b:v", f"{video_kbps}k",
+        "-c:a", "aac", "-b:a", f"{audio_kbps}k", path,
+    ], check=True)
+    return path
+
+
+def max_rss_mb(who):
+    # ru_maxrss is in KiB on Linux and only ever grows, so each method is measured in a fresh process
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def run_one(method, video_path, audio_path):
+    start = time.perf_counter()
+    if method == "legacy":
+        legacy_extract(video_path, audio_path)
+    else:
+        extract_audio(video_path, audio_path)
+    elapsed = time.perf_counter() - start
+    print(f"{method} {elapsed:.3f} {os.path.getsize(audio_path)} "
+          f"{max_rss_mb(resource.RUSAGE_SELF):.1f} {max_rss_mb(resource.RUSAGE_CHILDREN):.1f}")
+
+
+def measure(method, video_path, audio_path):
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_video_extraction", "--run", method, video_path, audio_path],
+        check=True, capture_output=True, text=True,
+    )
+    _, elapsed, size, rss, child_rss = result.stdout.split()[-5:]
+    os.remove(audio_path)
+    return float(elapsed), int(size), float(rss), float(child_rss)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=500, help="Approximate size of the synthetic MP4")
+    parser.add_argument("--seconds", type=float, default=600, help="Length of the synthetic MP4")
+    parser.add_argument("--video", help="Use an existing MP4 instead of generating one")
+    parser.add_argument("--repeat", type=int, default=2, help="Runs per method; the fastest is reported")
+    parser.add_argument("--run", nargs=3, metavar=("METHOD", "VIDEO", "AUDIO"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_one(*args.run)
+        return
+
+    directory = tempfile.mkdtemp()
+    try:
+        video_path = args.video or make_video(os.path.join(directory, "upload.mp4"), args.size_mb, args.seconds)
+        print(f"{video_path}: {os.path.getsize(video_path) / 1e6:.0f} MB")
+        results = {}
+        for method in ("legacy", "ffmpeg"):
+            runs = [measure(method, video_path, os.path.join(directory, f"{method}.wav")) for _ in range(args.repeat)]
+            results[method] = min(runs)
+            elapsed, size, rss, child_rss = results[method]
+            print(f"{method:>7} | {elapsed:7.2f} s | {size / 1e6:7.1f} MB WAV | "
+                  f"max RSS {rss:7.1f} MB python, {child_rss:7.1f} MB ffmpeg")
+        print(f"speedup {results['legacy'][0] / results['ffmpeg'][0]:.1f}x, "
+              f"output {results['legacy'][1] / results['ffmpeg'][1]:.1f}x smaller")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Measure gunicorn worker boot time and memory with and without preloading.
+
+Starts gunicorn from gunicorn.conf.py twice: once with GUNICORN_PRELOAD=0,
+where every worker imports the app and loads its own models, and once with
+preloading, where the master loads them before forking. For each run it
+reports the time until every worker is ready and, per worker, RSS, PSS
+(shared pages split between the processes using them) and USS (pages only
+that worker holds).
+
+Run from the repository root (Linux only, reads /proc):
+    python -m benchmarks.bench_worker_boot --workers 4
+    python -m benchmarks.bench_worker_boot --models audio_pipeline classifier language_model
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+READY_MARKER = "ready"
+
+
+def memory_kb(pid):
+    """RSS, PSS and USS of a process in kB, from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return fields.get("Rss", 0), fields.get("Pss", 0), uss
+
+
+def child_pids(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def run(preload, workers, port, models, timeout):
+    env = dict(
+        os.environ,
+        GUNICORN_PRELOAD="1" if preload else "0",
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        PYTHONPATH=os.getcwd(),
+    )
+    if models is not None:
+        env["PRELOAD_MODELS"] = ",".join(models)
+
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py", "wsgi:app"],
+        env=env, stderr=subprocess.PIPE, text=True,
+    )
+
+    ready = []
+    all_ready = threading.Event()
+
+    def watch_log():
+        for line in server.stderr:
+            if "Worker" in line and line.rstrip().endswith(READY_MARKER):
+                ready.append(time.perf_counter() - started)
+                if len(ready) == workers:
+                    all_ready.set()
+
+    threading.Thread(target=watch_log, daemon=True).start()
+    try:
+        if not all_ready.wait(timeout):
+            raise RuntimeError(f"Only {len(ready)}/{workers} workers became ready within {timeout}s")
+        # Let the workers settle before sampling memory
+        time.sleep(1.0)
+        master = memory_kb(server.pid)
+        per_worker = [memory_kb(pid) for pid in child_pids(server.pid)]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    label = "preload" if preload else "per-worker"
+    rss = sum(m[0] for m in per_worker) / len(per_worker) / 1024
+    pss = sum(m[1] for m in per_worker) / len(per_worker) / 1024
+    uss = sum(m[2] for m in per_worker) / len(per_worker) / 1024
+    total_pss = (master[1] + sum(m[1] for m in per_worker)) / 1024
+    print(
+        f"{label:>10} | all {workers} workers ready in {ready[-1]:6.2f}s | per worker: "
+        f"RSS {rss:7.1f} MB, PSS {pss:7.1f} MB, USS {uss:7.1f} MB | "
+        f"total PSS incl. master {total_pss:7.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="Gunicorn workers to start")
+    parser.add_argument("--port", type=int, default=8765, help="Local port to bind")
+    parser.add_argument("--models", nargs="+", default=None,
+                        help="Models to warm (default: config.yaml's models.preload)")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds to wait for workers")
+    args = parser.parse_args()
+
+    for preload in (False, True):
+        run(preload, args.workers, args.port, args.models, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,17 @@ class Config:
     
     # API Keys
     GLADIA_API_KEY = os.getenv('GLADIA_API_KEY', '')
+    GLADIA_CALLBACK_TOKEN = os.getenv('GLADIA_CALLBACK_TOKEN', '')
+    TRANSCRIPTION_BACKEND = os.getenv('TRANSCRIPTION_BACKEND', 'gladia')
+
+    # Users, recordings, jobs and scores (SQLite)
+    DATABASE_PATH = os.getenv('DATABASE_PATH', str(BASE_DIR / 'data' / 'realtalk.db'))
+
+    # Let nginx send audio files (X-Accel-Redirect to its internal /protected-uploads/ location)
+    USE_X_ACCEL_REDIRECT = os.getenv('USE_X_ACCEL_REDIRECT', '0') == '1'
+
+    # Background analysis jobs
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
     
     # Logging
     LOG_LEVEL = 'INFO'
@@ -34,6 +45,7 @@ class TestingConfig(Config):
     TESTING = True
     # Use temporary directories for testing
     UPLOAD_FOLDER = Path('/tmp/test_uploads')
+    DATABASE_PATH = '/tmp/test_realtalk.db'
     LOG_FILE = Path('/tmp/test.log')
 
 class ProductionConfig(Config):
@@ -0,0 +1,104 @@
+from preprocessing.preprocess_audio import load_and_preprocess
+from preprocessing.vad import apply_vad
+from preprocessing.feature_extraction import extract_features
+from preprocessing.streaming import should_stream, stream_features
+from preprocessing.cache import default_feature_cache
+from transcription.backends import get_backend
+from transcription.cache import default_transcript_cache
+from utils.blob_store import file_digest
+from utils.logger import default_logger as logger
+from detection.scoring import compute_likelihood, REQUIRED_FEATURES
+
+
+def _compute_audio_features(path: str, features=None, audio=None, streamed=False) -> dict:
+    if streamed:
+        # Long recordings: bounded-memory block pipeline
+        feats = stream_features(path, features=features)
+    else:
+        y, sr = audio if audio is not None else load_and_preprocess(path)
+        if y is None or sr is None:
+            raise Exception("Failed to load audio file")
+
+        y_vad = apply_vad(y)
+        if y_vad is None:
+            raise Exception("Voice activity detection failed")
+
+        feats = extract_features(y_vad, sr, features)
+    if feats is None:
+        raise Exception("Feature extraction failed")
+    return feats
+
+
+def extract_audio_features(path: str, features=None, cache=None, audio=None, digest=None) -> dict:
+    """
+    Preprocess a recording and extract its audio features.
+
+    Args:
+        path: Path to the audio file
+        features: Feature names to compute (all of them if None)
+        cache: Optional FeatureCache consulted before running any DSP
+        audio: (samples, sample_rate) already returned by load_and_preprocess for path
+        digest: Precomputed SHA-256 of the file, to save the cache hashing it again
+
+    Returns:
+        dict: Mapping of feature name to array
+    """
+    streamed = audio is None and should_stream(path)
+    if cache is None:
+        return _compute_audio_features(path, features, audio, streamed)
+    # Keyed by pipeline too: streamed and in-memory features differ slightly
+    return cache.get_or_compute(
+        path, lambda names: _compute_audio_features(path, names, audio, streamed), features, digest, streamed
+    )
+
+
+def analyze_audio(path: str, api_key: str, cache=default_feature_cache, backend=None,
+                  transcripts=default_transcript_cache, digest=None) -> dict:
+    """
+    Run the full analysis pipeline on one recording.
+
+    The file is hashed once for both caches. Audio already transcribed with
+    the same backend and options is not sent for transcription again, and a
+    backend that transcribes locally gets the samples decoded for the DSP
+    stage, so the file is read once. Recordings long enough to stream keep
+    the bounded-memory DSP path and are decoded by the backend itself.
+
+    Args:
+        path: Path to the audio file
+        api_key: Gladia API key used by the gladia transcription backend
+        cache: FeatureCache for the DSP stage (None to always recompute)
+        backend: TranscriptionBackend (the configured one if None)
+        transcripts: TranscriptCache (None to always transcribe)
+        digest: SHA-256 of the file if already known, e.g. hashed while it was uploaded
+
+    Returns:
+        dict: Transcript, AI likelihood score and extracted audio features
+    """
+    backend = backend or get_backend(api_key=api_key)
+    if digest is None and (cache is not None or transcripts is not None):
+        digest = file_digest(path)
+
+    settings = backend.settings()
+    key = transcripts.key_for(settings, digest=digest) if transcripts is not None else None
+    result = transcripts.get(key) if transcripts is not None else None
+
+    share_audio = result is None and backend.uses_audio and not should_stream(path)
+    audio = load_and_preprocess(path) if share_audio else None
+    feats = extract_audio_features(path, REQUIRED_FEATURES, cache, audio, digest)
+
+    if result is None:
+        result = backend.transcribe_result(path, audio)
+        if transcripts is not None and result["transcript"]:
+            try:
+                transcripts.put(key, result, settings)
+            except Exception as e:
+                logger.log_error(f"Error caching transcript for {path}", e)
+    transcript = result["transcript"]
+    if not transcript:
+        raise Exception("Transcription failed")
+
+    ai_score = compute_likelihood(transcript, feats)
+    if ai_score is None:
+        raise Exception("Score computation failed")
+
+    return {"transcript": transcript, "ai_score": ai_score, "features": feats}
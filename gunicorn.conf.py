@@ -0,0 +1,36 @@
+"""
+Gunicorn settings.
+
+With preload (the default) the app is imported and its models warmed in the
+master process before any worker is forked, so workers start instantly and
+share the loaded weights copy-on-write instead of each loading its own copy.
+Set GUNICORN_PRELOAD=0 to have every worker load its own models instead.
+"""
+import gc
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+
+def _warm_models(log):
+    from utils.model_registry import warm_models
+
+    for name, seconds in warm_models().items():
+        log.info("Pre-loaded %s in %.2fs", name, seconds)
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        _warm_models(server.log)
+        # Move everything loaded so far out of the collector's reach, so garbage
+        # collection in the workers doesn't touch (and copy) the shared pages
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        _warm_models(worker.log)
+    worker.log.info("Worker %s ready", worker.pid)
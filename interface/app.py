@@ -1,38 +1,131 @@
+import hmac
+import mimetypes
 import os
-from flask import Flask, render_template, request, redirect, url_for, session, flash, send_file
+import threading
+import uuid
+from urllib.parse import quote
+from flask import Flask, render_template, request, redirect, url_for, session, flash, send_file, jsonify
 from werkzeug.utils import secure_filename
-from moviepy import VideoFileClip
-import tempfile
 
-from preprocessing.preprocess_audio import load_and_preprocess
-from preprocessing.vad import apply_vad
-from preprocessing.feature_extraction import extract_features
-from transcription.whisper_transcribe import attempt_transcribe
-from detection.scoring import compute_likelihood
+from interface.jobs import JobQueue, JOB_FAILED, JOB_RUNNING
+from interface.store import DATABASE_PATH, RecordingBusy, SQLiteStore
+from interface import uploads
+from transcription.backends import TRANSCRIPTION_BACKEND
+from transcription.callbacks import default_callbacks
+from utils.blob_store import BlobStore, file_digest
+from utils.model_registry import default_registry, get_audio_pipeline
 
 app = Flask(__name__)
 app.secret_key = "SOME_SUPER_SECRET_KEY"
 app.config["UPLOAD_FOLDER"] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  
+app.config["JOB_WORKERS"] = int(os.getenv("JOB_WORKERS", "2"))
+app.config["UPLOAD_WORKERS"] = int(os.getenv("UPLOAD_WORKERS", str(uploads.UPLOAD_WORKERS)))
+app.config["PREPROCESS_EARLY"] = uploads.PREPROCESS_EARLY
+app.config["DATABASE_PATH"] = DATABASE_PATH
+# Behind nginx, let it send audio files itself (see the internal location in nginx.conf)
+app.config["USE_X_ACCEL_REDIRECT"] = os.getenv("USE_X_ACCEL_REDIRECT", "0") == "1"
+app.config["X_ACCEL_PREFIX"] = "/protected-uploads/"
 ALLOWED_EXTENSIONS = {'mp4', 'wav', 'mp3'}
-
-# In-memory user store: {username: {"password": ..., "recordings": [...]}}
-users = {}
+RECORDINGS_PER_PAGE = 20
+MAX_RECORDINGS_PER_PAGE = 100
+# Content types browsers expect for the audio we serve; anything else is guessed from the extension
+AUDIO_MIMETYPES = {".wav": "audio/wav", ".mp3": "audio/mpeg", ".ogg": "audio/ogg", ".m4a": "audio/mp4"}
+# Dashboard ?sort= values and the recording columns they order by
+SORT_KEYS = {"date": "created_at", "name": "filename", "score": "ai_score", "duration": "duration"}
 
 ##############################################
 # Utility & Auth Functions
 ##############################################
 def is_logged_in():
-    return session.get("username", False)
+    return session.get("user_id") is not None
 
 def get_current_user():
     return session.get("username")
 
+def get_current_user_id():
+    return session.get("user_id")
+
+##############################################
+# Persistent Store
+##############################################
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """Open the user and recording store on first use, once the app's configuration is final."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SQLiteStore(str(app.config["DATABASE_PATH"]))
+        return _store
+
+##############################################
+# Background Analysis Jobs
+##############################################
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue():
+    """Create the job queue on first use so gunicorn workers each start their own threads after fork."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(num_workers=app.config["JOB_WORKERS"], store=get_store())
+        return _job_queue
+
+_upload_queue = None
+
+def get_upload_queue():
+    """Threads that preprocess uploads while they arrive, apart from the analysis jobs they may wait on."""
+    global _upload_queue
+    with _job_queue_lock:
+        if _upload_queue is None:
+            _upload_queue = JobQueue(num_workers=app.config["UPLOAD_WORKERS"])
+        return _upload_queue
+
+def run_analysis_job(recording_id, path, api_key, digest=None):
+    """Analyze a recording on a job worker and store its score."""
+    store = get_store()
+    store.set_recording_status(recording_id, JOB_RUNNING)
+    try:
+        result = get_audio_pipeline().analyze_audio(path, api_key, digest=digest)
+    except Exception as e:
+        store.set_recording_status(recording_id, JOB_FAILED, str(e))
+        raise
+    store.add_score(recording_id, result["ai_score"], result["transcript"])
+    return {"ai_score": float(result["ai_score"])}
+
+def preview_path_for(path):
+    from preprocessing.decode import PREVIEW_CODEC, PREVIEW_FORMATS
+
+    return os.path.splitext(path)[0] + ".preview" + PREVIEW_FORMATS[PREVIEW_CODEC]["extension"]
+
+def run_preview_job(recording_id, path, digest=None):
+    """Encode the compressed copy the dashboard plays; until it exists the original is played."""
+    from preprocessing.decode import encode_preview
+
+    preview_path = preview_path_for(path)
+    # Recordings of the same audio share a preview, which another job may have written by now
+    if not os.path.exists(preview_path):
+        encode_preview(path, preview_path)
+    blobs = get_blob_store()
+    with blobs.lock():
+        if digest is not None and get_store().get_blob(digest) is None:
+            # Every recording of this audio was deleted while it was encoding
+            blobs.remove(preview_path)
+            return {"preview": None}
+        get_store().set_recording_preview(recording_id, preview_path)
+    return {"preview": os.path.basename(preview_path)}
+
 ##############################################
 # Routes
 ##############################################
 
 app.config["GLADIA_API_KEY"] = os.getenv("GLADIA_API_KEY", "c3bd73ad-2ee7-4663-9f82-564e84516bd6")
+app.config["TRANSCRIPTION_BACKEND"] = TRANSCRIPTION_BACKEND
+# Shared secret expected in the ?token= query parameter of Gladia callbacks; callbacks are refused if unset
+app.config["GLADIA_CALLBACK_TOKEN"] = os.getenv("GLADIA_CALLBACK_TOKEN", "")
 
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -52,11 +145,10 @@ def register():
             flash("Please fill out all fields.", "error")
             return redirect(url_for("register"))    
         
-        if users.get(username, False):
+        if get_store().create_user(username, password) is None:
             flash("Username already taken!", "error")
             return redirect(url_for("register"))
 
-        users[username] = {"password": password, "recordings": []}
         flash("Account created! Please log in.", "success")
         return redirect(url_for("login"))
     return render_template("register.html")
@@ -67,12 +159,13 @@ def login():
         username = request.form.get("username")
         password = request.form.get("password")
 
-        user = users.get(username)
-        if not user or user["password"] != password:
+        user = get_store().authenticate(username, password)
+        if not user:
             flash("Invalid username or password!", "error")
             return redirect(url_for("login"))
 
-        session["username"] = username
+        session["username"] = user["username"]
+        session["user_id"] = user["id"]
         flash("Logged in successfully!", "success")
         return redirect(url_for("dashboard"))
     
@@ -81,7 +174,6 @@ def login():
 @app.route("/logout")
 def logout():
     session.clear()
-    users.clear()
     flash("Logged out!", "info")
     return redirect("/")
 
@@ -91,57 +183,158 @@ def dashboard():
         flash("Please log in.", "error")
         return redirect(url_for("login"))
     
-    user_data = users.get(get_current_user(), "")
-    # Create a route to serve audio files
-    audio_urls = {rec["id"]: url_for('serve_audio', recording_id=rec["id"]) 
-                 for rec in user_data["recordings"]}
-    return render_template("dashboard.html", recordings=user_data["recordings"], audio_urls=audio_urls)
+    sort = request.args.get("sort", "date")
+    if sort not in SORT_KEYS:
+        sort = "date"
+    descending = request.args.get("order", "desc") != "asc"
+    per_page = min(max(request.args.get("per_page", RECORDINGS_PER_PAGE, type=int), 1), MAX_RECORDINGS_PER_PAGE)
+
+    # Only the summaries of one page are read; transcripts load on demand from /recordings/<id>/transcript
+    store = get_store()
+    total = store.count_recordings(get_current_user_id())
+    pages = max(1, -(-total // per_page))
+    page = min(max(request.args.get("page", 1, type=int), 1), pages)
+    recordings = store.list_recordings(get_current_user_id(), limit=per_page, offset=(page - 1) * per_page,
+                                       sort=SORT_KEYS[sort], descending=descending)
+    pagination = {"page": page, "pages": pages, "per_page": per_page, "total": total,
+                  "sort": sort, "order": "desc" if descending else "asc"}
+    return render_template("dashboard.html", recordings=recordings, pagination=pagination,
+                           upload_chunk_size=uploads.CHUNK_SIZE)
+
+@app.route("/recordings/<int:recording_id>/transcript")
+def recording_transcript(recording_id):
+    if not is_logged_in():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    store = get_store()
+    if store.get_recording(get_current_user_id(), recording_id) is None:
+        return jsonify({"error": "Recording not found"}), 404
+    return jsonify({"id": recording_id, "transcript": store.get_transcript(get_current_user_id(), recording_id)})
 
 @app.route("/audio/<int:recording_id>")
 def serve_audio(recording_id):
     if not is_logged_in():
         return "Unauthorized", 401
     
-    user_data = users.get(get_current_user(), "")
-    if recording_id >= len(user_data["recordings"]):
+    recording = get_store().get_recording(get_current_user_id(), recording_id)
+    if recording is None:
         return "Recording not found", 404
-    
-    recording = user_data["recordings"][recording_id]
-    
+    return send_audio(recording["path"], recording["filename"])
+
+@app.route("/audio/<int:recording_id>/preview")
+def serve_preview(recording_id):
+    if not is_logged_in():
+        return "Unauthorized", 401
+
+    recording = get_store().get_recording(get_current_user_id(), recording_id)
+    if recording is None:
+        return "Recording not found", 404
+    if not recording["preview_path"]:
+        return "Preview not ready", 404
+    return send_audio(recording["preview_path"], recording["filename"])
+
+@app.template_global()
+def audio_mimetype(path):
+    extension = os.path.splitext(path)[1].lower()
+    return AUDIO_MIMETYPES.get(extension) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+def send_audio(path, filename):
+    """
+    Send an audio file with byte-range, ETag and Last-Modified support, so players
+    can seek without downloading it all and revalidate instead of refetching.
+    """
     # Ensure the path is absolute and exists
-    file_path = os.path.abspath(os.path.join(app.config['UPLOAD_FOLDER'], recording["filename"]))
-    
+    file_path = os.path.abspath(path)
     if not os.path.exists(file_path):
-        return f"Audio file not found: {recording['filename']}", 404
-        
-    try:
-        return send_file(file_path, mimetype="audio/wav")
-    except Exception as e:
-        app.logger.error(f"Error serving audio file: {str(e)}")
-        return "Error serving audio file", 500
+        return f"Audio file not found: {filename}", 404
+
+    mimetype = audio_mimetype(file_path)
+    relative = os.path.relpath(file_path, os.path.abspath(app.config["UPLOAD_FOLDER"]))
+    if app.config["USE_X_ACCEL_REDIRECT"] and not relative.startswith(os.pardir):
+        # nginx streams the file (ranges and conditional requests included) and frees this worker
+        response = app.response_class(mimetype=mimetype)
+        response.headers["X-Accel-Redirect"] = app.config["X_ACCEL_PREFIX"] + quote(relative.replace(os.sep, "/"))
+    else:
+        try:
+            response = send_file(file_path, mimetype=mimetype, conditional=True, etag=True)
+        except Exception as e:
+            app.logger.error(f"Error serving audio file: {str(e)}")
+            return "Error serving audio file", 500
+    # Recordings belong to one user; shared caches must not keep them
+    response.cache_control.private = True
+    return response
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def get_blob_store():
+    """Content-addressed audio in the upload folder, shared by every worker."""
+    return BlobStore(os.path.join(app.config["UPLOAD_FOLDER"], "blobs"))
+
+def add_uploaded_recording(local_path, filename, digest=None):
+    """
+    Turn a file saved in the upload folder into one of the current user's recordings.
+
+    Videos are replaced by their extracted audio. The audio is moved into the
+    blob store, where audio uploaded before is kept only once; if the user
+    already analyzed the same audio, that score is reused instead of analyzing
+    it again. A compressed preview is encoded in the background unless the
+    blob already has one.
+
+    Args:
+        local_path: The saved file, which is moved or removed
+        filename: Its (secured) name
+        digest: SHA-256 of the file, if it was hashed on arrival
+
+    Returns:
+        dict: The new recording
+    """
+    from preprocessing.decode import audio_duration
+
+    # If file is MP4, extract audio
+    if filename.lower().endswith('.mp4'):
+        audio_path = extract_audio_from_video(local_path)
+        # Remove original video file to save space
+        os.remove(local_path)
+        local_path = audio_path
+        filename = os.path.splitext(filename)[0] + '.wav'
+        # The hash was of the video
+        digest = None
+
+    store = get_store()
+    user_id = get_current_user_id()
+    digest = digest or file_digest(local_path)
+    duration = audio_duration(local_path)
+    duplicate = store.find_duplicate(user_id, digest)
+
+    blobs = get_blob_store()
+    # Held from checking for the blob to referencing it, so a delete can't remove it in between
+    with blobs.lock():
+        blob = store.get_blob(digest)
+        if blob is not None and os.path.exists(blob["path"]):
+            os.remove(local_path)
+            path = blob["path"]
+        else:
+            _, path = blobs.put(local_path, digest, os.path.splitext(filename)[1], move=True)
+        recording = store.add_recording(user_id, filename, path, duration, digest)
+        preview_path = preview_path_for(path)
+        if os.path.exists(preview_path):
+            store.set_recording_preview(recording["id"], preview_path)
+        else:
+            get_job_queue().submit(run_preview_job, recording["id"], path, digest)
+
+    if duplicate is not None and duplicate["analyzed"]:
+        store.add_score(recording["id"], duplicate["ai_score"], store.get_transcript(user_id, duplicate["id"]))
+    return store.get_recording(user_id, recording["id"])
+
 def extract_audio_from_video(video_path):
-    """Extract audio from video file and save as WAV"""
+    """Extract the audio track of a video as a 16 kHz mono WAV, without decoding the video frames"""
+    from preprocessing.decode import extract_audio
+
+    audio_filename = os.path.splitext(os.path.basename(video_path))[0] + '.wav'
+    audio_path = os.path.join(app.config["UPLOAD_FOLDER"], audio_filename)
     try:
-        # Create a temporary directory for processing
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Load video
-            video = VideoFileClip(video_path)
-            
-            # Generate output audio path
-            audio_filename = os.path.splitext(os.path.basename(video_path))[0] + '.wav'
-            audio_path = os.path.join(app.config["UPLOAD_FOLDER"], audio_filename)
-            
-            # Extract audio and save as WAV
-            video.audio.write_audiofile(audio_path)
-            
-            # Close video to free up resources
-            video.close()
-            
-            return audio_path
+        return extract_audio(video_path, audio_path)
     except Exception as e:
         raise Exception(f"Error extracting audio: {str(e)}")
 
@@ -162,92 +355,217 @@ def upload():
 
     try:
         filename = secure_filename(file.filename)
-        local_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-        os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+        # A unique name until the content hash is known, so same-named uploads never collide
+        local_path = uploads.incoming_path(app.config["UPLOAD_FOLDER"], uuid.uuid4().hex + os.path.splitext(filename)[1])
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
         file.save(local_path)
 
-        # If file is MP4, extract audio
-        if filename.lower().endswith('.mp4'):
-            try:
-                audio_path = extract_audio_from_video(local_path)
-                # Remove original video file to save space
-                os.remove(local_path)
-                local_path = audio_path
-                filename = os.path.basename(audio_path)
-            except Exception as e:
-                flash(f"Error processing video: {str(e)}", "error")
-                return redirect(url_for("dashboard"))
-
-        # Add the recording to user's list
-        user_data = users.get(get_current_user(), "")
-        recording_id = len(user_data["recordings"])
-        user_data["recordings"].append({
-            "id": recording_id,
-            "filename": filename,
-            "path": local_path,
-            "transcript": "Not analyzed yet",
-            "ai_score": None,
-            "analyzed": False
-        })
-        flash("File uploaded successfully! Click 'Analyze' to process it.", "success")
+        try:
+            recording = add_uploaded_recording(local_path, filename)
+        except Exception as e:
+            flash(f"Error processing video: {str(e)}", "error")
+            return redirect(url_for("dashboard"))
+        if recording["analyzed"]:
+            flash("File uploaded! You analyzed the same audio before, so its result is shown.", "success")
+        else:
+            flash("File uploaded successfully! Click 'Analyze' to process it.", "success")
     except Exception as e:
         flash(f"Error uploading file: {str(e)}", "error")
 
     return redirect(url_for("dashboard"))
 
+##############################################
+# Resumable Uploads (tus 1.0 core protocol with the creation extension)
+##############################################
+def tus_response(status, **headers):
+    response = app.response_class(status=status)
+    response.headers["Tus-Resumable"] = uploads.TUS_VERSION
+    for name, value in headers.items():
+        response.headers[name.replace("_", "-")] = str(value)
+    return response
+
+def tus_error(status, message):
+    response = tus_response(status)
+    response.set_data(message)
+    response.mimetype = "text/plain"
+    return response
+
+@app.route("/uploads", methods=["OPTIONS", "POST"])
+def create_upload():
+    if request.method == "OPTIONS":
+        return tus_response(204, Tus_Version=uploads.TUS_VERSION, Tus_Extension="creation",
+                            Tus_Max_Size=app.config["MAX_CONTENT_LENGTH"])
+    if not is_logged_in():
+        return tus_error(401, "Unauthorized")
+
+    length = request.headers.get("Upload-Length", type=int)
+    if length is None or length <= 0:
+        return tus_error(400, "Upload-Length must be a positive integer")
+    if length > app.config["MAX_CONTENT_LENGTH"]:
+        return tus_error(413, "Upload too large")
+    filename = secure_filename(uploads.parse_metadata(request.headers.get("Upload-Metadata", "")).get("filename", ""))
+    if not filename or not allowed_file(filename):
+        return tus_error(400, "Invalid file type! Please upload MP4, WAV, or MP3 files.")
+
+    upload_id = uuid.uuid4().hex
+    path = uploads.incoming_path(app.config["UPLOAD_FOLDER"], upload_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+    get_store().create_upload(upload_id, get_current_user_id(), filename, length)
+
+    extension = os.path.splitext(filename)[1].lower()
+    if app.config["PREPROCESS_EARLY"] and extension in uploads.STREAMABLE_EXTENSIONS and uploads.may_stream(length):
+        # Opened now, so the job still reads the file after it moves into place on completion
+        get_upload_queue().submit(uploads.preprocess_upload, open(path, "rb"), path, length)
+
+    return tus_response(201, Location=url_for("upload_status", upload_id=upload_id), Upload_Offset=0)
+
+@app.route("/uploads/<upload_id>", methods=["HEAD", "PATCH"])
+def upload_status(upload_id):
+    if not is_logged_in():
+        return tus_error(401, "Unauthorized")
+    upload = get_store().get_upload(get_current_user_id(), upload_id)
+    if upload is None:
+        return tus_error(404, "Upload not found")
+    if upload["error"] is not None:
+        return tus_error(410, f"Upload failed: {upload['error']}")
+
+    if request.method == "HEAD":
+        response = tus_response(200, Upload_Offset=upload["received"], Upload_Length=upload["length"])
+        if upload["recording_id"] is not None:
+            response.headers["X-Recording-Id"] = str(upload["recording_id"])
+        response.headers["Cache-Control"] = "no-store"
+        return response
+
+    if request.mimetype != "application/offset+octet-stream":
+        return tus_error(415, "Content-Type must be application/offset+octet-stream")
+    offset = request.headers.get("Upload-Offset", type=int)
+    if offset is None or offset < 0:
+        return tus_error(400, "Upload-Offset must be a non-negative integer")
+    if request.content_length is not None and offset + request.content_length > upload["length"]:
+        return tus_error(413, "Chunk runs past Upload-Length")
+
+    path = uploads.incoming_path(app.config["UPLOAD_FOLDER"], upload_id)
+    try:
+        with uploads.locked(path) as f:
+            # Re-read under the lock: another request may have just stored a chunk
+            upload = get_store().get_upload(get_current_user_id(), upload_id)
+            if offset != upload["received"]:
+                return tus_error(409, f"Upload-Offset must be {upload['received']}")
+            received, digest = uploads.write_chunk(f, upload_id, offset, upload["length"], request.stream)
+            get_store().advance_upload(upload_id, offset, received)
+    except uploads.UploadLocked as e:
+        return tus_error(423, str(e))
+    except FileNotFoundError:
+        return tus_error(410, "Upload already completed")
+
+    response = tus_response(204, Upload_Offset=received)
+    if digest is not None:
+        # Every byte is in: make it a recording, moving the file into the blob store
+        try:
+            recording = add_uploaded_recording(path, upload["filename"], digest)
+        except Exception as e:
+            # Every byte is stored, so the upload can't resume: end it rather than leave it stuck
+            get_store().fail_upload(upload_id, str(e) or type(e).__name__)
+            if os.path.exists(path):
+                os.remove(path)
+            return tus_error(422, f"Error processing upload: {str(e)}")
+        get_store().complete_upload(upload_id, recording["id"])
+        response.headers["X-Recording-Id"] = str(recording["id"])
+    return response
+
 @app.route("/analyze/<int:recording_id>", methods=["POST"])
 def analyze_recording(recording_id):
     if not is_logged_in():
         flash("Please log in first.", "error")
         return redirect(url_for("login"))
     
-    user_data = users.get(get_current_user(), "")
-    
     # Check if recording exists
-    if recording_id >= len(user_data["recordings"]):
+    recording = get_store().get_recording(get_current_user_id(), recording_id)
+    if recording is None:
         flash("Recording not found!", "error")
         return redirect(url_for("dashboard"))
-    
-    recording = user_data["recordings"][recording_id]
-    local_path = recording["path"]
-    
+
+    if app.config["TRANSCRIPTION_BACKEND"] == "gladia" and not app.config["GLADIA_API_KEY"]:
+        flash("Error analyzing recording: Gladia API key not configured", "error")
+        return redirect(url_for("dashboard"))
+
+    # Marked queued before submitting, so the worker's "running" can't be overwritten; only
+    # the request that makes the change submits, so a double-click queues one analysis
+    if not get_store().queue_recording(recording["id"]):
+        flash("This recording is already being analyzed.", "info")
+        return redirect(url_for("dashboard"))
+    job_id = get_job_queue().submit(
+        run_analysis_job, recording["id"], recording["path"], app.config["GLADIA_API_KEY"], recording["sha256"]
+    )
+    get_store().set_recording_job(recording["id"], job_id)
+    flash("Analysis queued! Results will appear here when it finishes.", "success")
+    return redirect(url_for("dashboard"))
+
+@app.route("/recordings/<int:recording_id>/delete", methods=["POST"])
+def delete_recording(recording_id):
+    if not is_logged_in():
+        flash("Please log in first.", "error")
+        return redirect(url_for("login"))
+
+    blobs = get_blob_store()
     try:
-        # Process the audio through our AI pipeline
-        y, sr = load_and_preprocess(local_path)
-        if y is None or sr is None:
-            raise Exception("Failed to load audio file")
-            
-        y_vad = apply_vad(y, sr)  # Add sr parameter
-        if y_vad is None:
-            raise Exception("Voice activity detection failed")
-            
-        feats = extract_features(y_vad, sr)
-        if feats is None:
-            raise Exception("Feature extraction failed")
-
-        # Transcribe the audio
-        if not app.config["GLADIA_API_KEY"]:
-            raise Exception("Gladia API key not configured")
-            
-        transcript = attempt_transcribe(local_path, app.config["GLADIA_API_KEY"])
-        if not transcript:
-            raise Exception("Transcription failed")
-        
-        # Compute AI likelihood score
-        ai_score = compute_likelihood(transcript, feats)
-        if ai_score is None:
-            raise Exception("Score computation failed")
-        
-        # Update the recording with analysis results
-        recording["transcript"] = transcript
-        recording["ai_score"] = ai_score
-        recording["analyzed"] = True
-        
-        flash("Recording analyzed successfully!", "success")
-    except Exception as e:
-        flash(f"Error analyzing recording: {str(e)}", "error")
-    
+        with blobs.lock():
+            unreferenced = get_store().delete_recording(get_current_user_id(), recording_id)
+            # The audio is only removed once no other recording shares it
+            for path in unreferenced or []:
+                blobs.remove(path)
+    except RecordingBusy:
+        flash("This recording is being analyzed; delete it once the analysis finishes.", "error")
+        return redirect(url_for("dashboard"))
+    if unreferenced is None:
+        flash("Recording not found!", "error")
+    else:
+        flash("Recording deleted.", "success")
     return redirect(url_for("dashboard"))
 
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    if not is_logged_in():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    owned = get_store().job_owner(job_id) == get_current_user_id()
+    job = get_job_queue().get(job_id) if owned else None
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify({k: job[k] for k in ("id", "status", "error", "created", "started", "finished")})
+
+@app.route("/webhooks/gladia", methods=["POST"])
+def gladia_webhook():
+    """Completion callback from Gladia: wakes the job waiting on that transcription."""
+    token = app.config["GLADIA_CALLBACK_TOKEN"]
+    # Without a shared secret anyone could post results, so callbacks are refused
+    if not token:
+        return jsonify({"error": "Callbacks disabled: GLADIA_CALLBACK_TOKEN not set"}), 403
+    if not hmac.compare_digest(request.args.get("token", ""), token):
+        return jsonify({"error": "Forbidden"}), 403
+
+    data = request.get_json(silent=True) or {}
+    transcript_id = data.get("id")
+    if not transcript_id:
+        return jsonify({"error": "Missing transcription id"}), 400
+
+    # A job in another worker process doesn't get woken; it finds the result on its next poll
+    default_callbacks.notify(transcript_id, data)
+    return jsonify({"received": True})
+
+@app.route("/stats")
+def stats():
+    """Cache counters and model load times for monitoring."""
+    from preprocessing.cache import default_feature_cache
+    from transcription.cache import default_transcript_cache
+
+    return jsonify({
+        "feature_cache": default_feature_cache.stats(),
+        "transcript_cache": default_transcript_cache.stats(),
+        "models": default_registry.stats(),
+    })
+
 if __name__ == "__main__":
     app.run(debug=True)
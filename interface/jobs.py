@@ -0,0 +1,182 @@
+import queue
+import threading
+import traceback
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from utils.logger import default_logger as logger
+
+# Job states, in the order a job moves through them
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# How often a queue vouches for its unfinished jobs in the store, and how long
+# a job can go without that before it is taken to be orphaned by a dead process
+HEARTBEAT_INTERVAL = 30.0
+STALE_AFTER = 120.0
+
+
+class JobQueue:
+    """
+    In-process background job queue served by a pool of worker threads.
+
+    Jobs run in the process that queued them. With a store, every state
+    change is also written through to it, so other processes can report on
+    the job too, and a heartbeat keeps the queue's unfinished jobs fresh there.
+    Jobs whose heartbeat stopped, because their process was restarted or
+    crashed, are failed by whichever queue notices first.
+    """
+
+    def __init__(self, num_workers: int = 2, store=None, heartbeat_interval: float = HEARTBEAT_INTERVAL,
+                 stale_after: float = STALE_AFTER):
+        """
+        Initialize the job queue and start its workers.
+
+        Args:
+            num_workers: Number of worker threads running jobs concurrently
+            store: Optional interface.store.Store that job records are persisted to
+            heartbeat_interval: Seconds between heartbeats and orphan checks, with a store
+            stale_after: Seconds without a heartbeat before another process's job is failed
+        """
+        self.num_workers = max(1, int(num_workers))
+        self.store = store
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._workers = []
+        self._stopped = threading.Event()
+
+        for i in range(self.num_workers):
+            worker = threading.Thread(
+                target=self._worker_loop, name=f"job-worker-{i}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+        if self.store is not None:
+            # Jobs left unfinished by a previous run of this server are failed before serving
+            self._persist(self._fail_orphans)
+            threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True).start()
+
+    def submit(self, func: Callable, *args, **kwargs) -> str:
+        """
+        Enqueue a callable and return immediately.
+
+        Args:
+            func: Callable to run on a worker thread
+            *args, **kwargs: Arguments passed to the callable
+
+        Returns:
+            str: ID of the queued job
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "status": JOB_QUEUED,
+            "error": None,
+            "result": None,
+            "created": datetime.now().isoformat(),
+            "started": None,
+            "finished": None,
+        }
+        self._save(job)
+        self._queue.put((job_id, func, args, kwargs))
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        Get a snapshot of a job's state.
+
+        Jobs queued by another process are looked up in the store.
+
+        Args:
+            job_id: ID returned by submit()
+
+        Returns:
+            Optional[Dict]: Copy of the job record, or None if unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                return dict(job)
+        return self.store.get_job(job_id) if self.store is not None else None
+
+    def pending(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers once the jobs already queued have run."""
+        for _ in self._workers:
+            self._queue.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+            self._stopped.set()
+
+    def _save(self, job: Dict):
+        with self._lock:
+            self._jobs[job["id"]] = job
+        if self.store is not None:
+            self._persist(self.store.save_job, dict(job))
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+        if self.store is not None:
+            self._persist(self.store.update_job, job_id, **fields)
+
+    def _persist(self, write: Callable, *args, **kwargs):
+        # A store outage must not take down a worker thread; the in-memory record stays authoritative here
+        try:
+            write(*args, **kwargs)
+        except Exception as e:
+            logger.log_error("Failed to persist job state", e)
+
+    def _fail_orphans(self):
+        failed = self.store.fail_stale_jobs(self.stale_after, "Interrupted: the server stopped before it finished")
+        if failed:
+            logger.log_warning(f"Failed {failed} jobs orphaned by a stopped process")
+
+    def _heartbeat_loop(self):
+        # Beats until the workers have drained the queue after shutdown()
+        while not self._stopped.wait(self.heartbeat_interval) and any(w.is_alive() for w in self._workers):
+            with self._lock:
+                unfinished = [
+                    job_id for job_id, job in self._jobs.items() if job["status"] in (JOB_QUEUED, JOB_RUNNING)
+                ]
+            self._persist(self.store.touch_jobs, unfinished)
+            self._persist(self._fail_orphans)
+
+    def _worker_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+
+            job_id, func, args, kwargs = item
+            self._update(job_id, status=JOB_RUNNING, started=datetime.now().isoformat())
+            try:
+                result = func(*args, **kwargs)
+                self._update(
+                    job_id,
+                    status=JOB_DONE,
+                    result=result,
+                    finished=datetime.now().isoformat(),
+                )
+            except Exception as e:
+                logger.log_error(f"Job {job_id} failed", e)
+                self._update(
+                    job_id,
+                    status=JOB_FAILED,
+                    error=str(e) or traceback.format_exc(limit=1),
+                    finished=datetime.now().isoformat(),
+                )
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,709 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import yaml
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from interface.jobs import JOB_FAILED, JOB_QUEUED, JOB_RUNNING
+
+# Load configuration
+with open("config.yaml", "r") as file:
+    config = yaml.safe_load(file)
+
+DATABASE_PATH = os.getenv("DATABASE_PATH", config["database"]["path"])
+JOURNAL_MODE = config["database"]["journal_mode"]
+BUSY_TIMEOUT_MS = config["database"]["busy_timeout_ms"]
+
+# Recording states kept on each recording for the dashboard; the others are
+# JOB_QUEUED, JOB_RUNNING and JOB_FAILED, mirroring its latest analysis job
+RECORDING_UPLOADED = "uploaded"
+RECORDING_ANALYZED = "analyzed"
+
+# Columns recordings can be listed by
+SORT_COLUMNS = ("created_at", "filename", "ai_score", "duration")
+
+# Schema migrations, applied in order; PRAGMA user_version records how many have run.
+# Never edit a released migration, append a new one instead.
+MIGRATIONS = [
+    [
+        """CREATE TABLE users (
+            id INTEGER PRIMARY KEY,
+            username TEXT NOT NULL UNIQUE,
+            password_hash TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )""",
+        """CREATE TABLE recordings (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            filename TEXT NOT NULL,
+            path TEXT NOT NULL,
+            job_id TEXT,
+            created_at TEXT NOT NULL
+        )""",
+        "CREATE INDEX idx_recordings_user_created ON recordings(user_id, created_at)",
+        "CREATE INDEX idx_recordings_job ON recordings(job_id)",
+        """CREATE TABLE jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            error TEXT,
+            result TEXT,
+            created TEXT NOT NULL,
+            started TEXT,
+            finished TEXT
+        )""",
+        "CREATE INDEX idx_jobs_created ON jobs(created)",
+        """CREATE TABLE scores (
+            id INTEGER PRIMARY KEY,
+            recording_id INTEGER NOT NULL REFERENCES recordings(id) ON DELETE CASCADE,
+            ai_score REAL NOT NULL,
+            transcript TEXT,
+            created_at TEXT NOT NULL
+        )""",
+        "CREATE INDEX idx_scores_recording_created ON scores(recording_id, created_at)",
+    ],
+    # Summaries kept on each recording, so listing them never touches scores, jobs or audio
+    [
+        f"ALTER TABLE recordings ADD COLUMN status TEXT NOT NULL DEFAULT '{RECORDING_UPLOADED}'",
+        "ALTER TABLE recordings ADD COLUMN error TEXT",
+        "ALTER TABLE recordings ADD COLUMN ai_score REAL",
+        "ALTER TABLE recordings ADD COLUMN analyzed_at TEXT",
+        "ALTER TABLE recordings ADD COLUMN duration REAL",
+        """UPDATE recordings SET
+            ai_score = (SELECT ai_score FROM scores WHERE recording_id = recordings.id
+                        ORDER BY created_at DESC, id DESC LIMIT 1),
+            analyzed_at = (SELECT MAX(created_at) FROM scores WHERE recording_id = recordings.id)""",
+        f"UPDATE recordings SET status = '{RECORDING_ANALYZED}' WHERE ai_score IS NOT NULL",
+        f"""UPDATE recordings SET
+            status = (SELECT status FROM jobs WHERE id = recordings.job_id),
+            error = (SELECT error FROM jobs WHERE id = recordings.job_id)
+            WHERE ai_score IS NULL AND (SELECT status FROM jobs WHERE id = recordings.job_id)
+                IN ('{JOB_QUEUED}', '{JOB_RUNNING}', '{JOB_FAILED}')""",
+        "CREATE INDEX idx_recordings_user_score ON recordings(user_id, ai_score)",
+        "CREATE INDEX idx_recordings_user_filename ON recordings(user_id, filename)",
+        "CREATE INDEX idx_recordings_user_duration ON recordings(user_id, duration)",
+    ],
+    # Compressed copy played on the dashboard, once it has been encoded
+    [
+        "ALTER TABLE recordings ADD COLUMN preview_path TEXT",
+    ],
+    # Resumable uploads, and the SHA-256 of each recording's audio hashed while it arrived
+    [
+        """CREATE TABLE uploads (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            filename TEXT NOT NULL,
+            length INTEGER NOT NULL,
+            received INTEGER NOT NULL DEFAULT 0,
+            recording_id INTEGER REFERENCES recordings(id) ON DELETE SET NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )""",
+        "CREATE INDEX idx_uploads_user_created ON uploads(user_id, created_at)",
+        "ALTER TABLE recordings ADD COLUMN sha256 TEXT",
+    ],
+    # Content-addressed audio: one file per distinct SHA-256, counted by the recordings using it
+    [
+        """CREATE TABLE blobs (
+            sha256 TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            refcount INTEGER NOT NULL,
+            created_at TEXT NOT NULL
+        )""",
+        """INSERT INTO blobs (sha256, path, refcount, created_at)
+            SELECT sha256, MIN(path), COUNT(*), MIN(created_at) FROM recordings
+            WHERE sha256 IS NOT NULL GROUP BY sha256""",
+        "CREATE INDEX idx_recordings_user_sha256 ON recordings(user_id, sha256)",
+        "CREATE INDEX idx_recordings_path ON recordings(path)",
+        "CREATE INDEX idx_recordings_preview ON recordings(preview_path)",
+    ],
+    # When a live queue last vouched for each unfinished job; rows left without one are orphans
+    [
+        "ALTER TABLE jobs ADD COLUMN heartbeat TEXT",
+        "CREATE INDEX idx_jobs_status_heartbeat ON jobs(status, heartbeat)",
+    ],
+    # Why a fully received upload couldn't be made into a recording
+    [
+        "ALTER TABLE uploads ADD COLUMN error TEXT",
+    ],
+]
+
+_JOB_FIELDS = ("status", "error", "result", "created", "started", "finished")
+_RECORDING_COLUMNS = (
+    "id, user_id, filename, path, job_id, created_at, status, error, ai_score, analyzed_at, duration, preview_path, "
+    "sha256"
+)
+_UPLOAD_COLUMNS = "id, user_id, filename, length, received, recording_id, error, created_at, updated_at"
+
+
+class RecordingBusy(Exception):
+    """The recording is queued or running for analysis, so it can't be deleted yet."""
+
+
+class Store:
+    """Repository for users, their recordings, analysis jobs and scores."""
+
+    def create_user(self, username: str, password: str) -> Optional[int]:
+        """
+        Register a user; the password is stored only as a salted hash.
+
+        Args:
+            username: Unique login name
+            password: Plain-text password
+
+        Returns:
+            Optional[int]: ID of the new user, or None if the username is taken
+        """
+        raise NotImplementedError
+
+    def authenticate(self, username: str, password: str) -> Optional[Dict]:
+        """
+        Check a username and password.
+
+        Args:
+            username: Login name
+            password: Plain-text password
+
+        Returns:
+            Optional[Dict]: The user's "id" and "username", or None if they don't match
+        """
+        raise NotImplementedError
+
+    def add_recording(self, user_id: int, filename: str, path: str, duration: Optional[float] = None,
+                      sha256: Optional[str] = None) -> Dict:
+        """
+        Record an uploaded file.
+
+        With a SHA-256 the recording takes a reference to that blob, which is
+        created (at path) if it's new.
+
+        Args:
+            user_id: Owner
+            filename: Name shown on the dashboard
+            path: Where the audio is stored
+            duration: Length in seconds, if known
+            sha256: Hex SHA-256 of the file at path, if known
+
+        Returns:
+            Dict: The new recording
+        """
+        raise NotImplementedError
+
+    def delete_recording(self, user_id: int, recording_id: int) -> Optional[List[str]]:
+        """
+        Delete one of a user's recordings with its scores, releasing its blob.
+
+        Args:
+            user_id: Owner
+            recording_id: Recording ID
+
+        Returns:
+            Optional[List[str]]: Files (audio and preview) no longer referenced by any
+            recording, for the caller to remove; None if there was no such recording
+
+        Raises:
+            RecordingBusy: If the recording is being analyzed
+        """
+        raise NotImplementedError
+
+    def get_blob(self, sha256: str) -> Optional[Dict]:
+        """The stored blob with a SHA-256 ("sha256", "path", "refcount"), or None."""
+        raise NotImplementedError
+
+    def find_duplicate(self, user_id: int, sha256: str) -> Optional[Dict]:
+        """
+        Find one of a user's recordings with the given content, preferring an analyzed one.
+
+        Args:
+            user_id: Owner
+            sha256: Hex SHA-256 of the audio
+
+        Returns:
+            Optional[Dict]: The most recently analyzed (or else uploaded) such recording
+        """
+        raise NotImplementedError
+
+    def get_recording(self, user_id: int, recording_id: int) -> Optional[Dict]:
+        """
+        Look up one of a user's recordings with its summary (status, score, duration).
+
+        Args:
+            user_id: Owner; other users' recordings are never returned
+            recording_id: Recording ID
+
+        Returns:
+            Optional[Dict]: The recording, or None if the user has no such recording
+        """
+        raise NotImplementedError
+
+    def list_recordings(self, user_id: int, limit: Optional[int] = None, offset: int = 0,
+                        sort: str = "created_at", descending: bool = False) -> List[Dict]:
+        """
+        One page of a user's recordings with their summaries, without transcripts.
+
+        Args:
+            user_id: Owner
+            limit: Page size (None for all)
+            offset: Recordings to skip
+            sort: One of SORT_COLUMNS
+            descending: Largest (or newest) first
+
+        Returns:
+            List[Dict]: Recordings
+        """
+        raise NotImplementedError
+
+    def count_recordings(self, user_id: int) -> int:
+        """Number of recordings a user has."""
+        raise NotImplementedError
+
+    def get_transcript(self, user_id: int, recording_id: int) -> Optional[str]:
+        """Latest transcript of one of a user's recordings, or None if it has none."""
+        raise NotImplementedError
+
+    def set_recording_job(self, recording_id: int, job_id: str):
+        """Point a recording at its latest analysis job."""
+        raise NotImplementedError
+
+    def set_recording_status(self, recording_id: int, status: str, error: Optional[str] = None):
+        """
+        Update the analysis state shown for a recording.
+
+        Args:
+            recording_id: Recording ID
+            status: JOB_QUEUED, JOB_RUNNING or JOB_FAILED
+            error: Why the analysis failed
+        """
+        raise NotImplementedError
+
+    def queue_recording(self, recording_id: int) -> bool:
+        """
+        Mark a recording queued for analysis, unless it already is queued or running.
+
+        The check and the update are one statement, so of two concurrent requests
+        to analyze the same recording only one gets to submit the job.
+
+        Returns:
+            bool: Whether the recording was marked queued
+        """
+        raise NotImplementedError
+
+    def set_recording_preview(self, recording_id: int, preview_path: str):
+        """Record where a recording's browser playback copy was written."""
+        raise NotImplementedError
+
+    def job_owner(self, job_id: str) -> Optional[int]:
+        """ID of the user whose recording a job analyzes, or None."""
+        raise NotImplementedError
+
+    def create_upload(self, upload_id: str, user_id: int, filename: str, length: int) -> Dict:
+        """
+        Start a resumable upload.
+
+        Args:
+            upload_id: Unique ID, also naming the partial file
+            user_id: Uploader
+            filename: Name of the file being uploaded
+            length: Total size in bytes
+
+        Returns:
+            Dict: The upload, with nothing received yet
+        """
+        raise NotImplementedError
+
+    def get_upload(self, user_id: int, upload_id: str) -> Optional[Dict]:
+        """One of a user's uploads, or None."""
+        raise NotImplementedError
+
+    def advance_upload(self, upload_id: str, expected: int, received: int) -> bool:
+        """
+        Move an upload's received byte count forward.
+
+        Args:
+            upload_id: Upload ID
+            expected: Count the caller started from; nothing changes if another request moved it
+            received: New count
+
+        Returns:
+            bool: Whether the count was updated
+        """
+        raise NotImplementedError
+
+    def complete_upload(self, upload_id: str, recording_id: int):
+        """Link a fully received upload to the recording made from it."""
+        raise NotImplementedError
+
+    def fail_upload(self, upload_id: str, error: str):
+        """Mark a fully received upload that couldn't be made into a recording, ending it."""
+        raise NotImplementedError
+
+    def add_score(self, recording_id: int, ai_score: float, transcript: Optional[str]):
+        """
+        Store the result of analyzing a recording and mark it analyzed.
+
+        Args:
+            recording_id: Recording that was analyzed
+            ai_score: AI likelihood
+            transcript: Transcript the score was computed from
+        """
+        raise NotImplementedError
+
+    def save_job(self, job: Dict):
+        """Insert or replace a job record as kept by JobQueue."""
+        raise NotImplementedError
+
+    def update_job(self, job_id: str, **fields):
+        """Update some of a job's fields."""
+        raise NotImplementedError
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """A job record, or None if unknown."""
+        raise NotImplementedError
+
+    def touch_jobs(self, job_ids: List[str]):
+        """Record that the queue holding these jobs is still alive."""
+        raise NotImplementedError
+
+    def fail_stale_jobs(self, stale_after: float, error: str) -> int:
+        """
+        Fail queued and running jobs that no live queue has vouched for lately.
+
+        Their process stopped or crashed, so they will never finish. The
+        recordings they were analyzing are marked failed too, so they can be
+        analyzed again.
+
+        Args:
+            stale_after: Seconds since a job's last heartbeat before it is failed
+            error: Reason recorded on the jobs and recordings
+
+        Returns:
+            int: Number of jobs failed
+        """
+        raise NotImplementedError
+
+
+class SQLiteStore(Store):
+    """
+    Store backed by a SQLite database in WAL mode.
+
+    WAL lets every gunicorn worker read while one writes, so all workers see
+    the same users and recordings. Each thread of each process opens its own
+    connection, and the schema is migrated on first use.
+    """
+
+    def __init__(self, path: str = DATABASE_PATH, journal_mode: str = JOURNAL_MODE,
+                 busy_timeout_ms: int = BUSY_TIMEOUT_MS):
+        """
+        Initialize the store; the database is created on first use.
+
+        Args:
+            path: Database file
+            journal_mode: SQLite journal mode ("wal" lets readers and a writer work concurrently)
+            busy_timeout_ms: How long a write waits for another connection's lock
+        """
+        self.path = path
+        self.journal_mode = journal_mode
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._migrated_pid = None
+        self._migrate_lock = threading.Lock()
+
+    @property
+    def schema_version(self) -> int:
+        return self._connection().execute("PRAGMA user_version").fetchone()[0]
+
+    def create_user(self, username: str, password: str) -> Optional[int]:
+        try:
+            cursor = self._connection().execute(
+                "INSERT INTO users (username, password_hash, created_at) VALUES (?, ?, ?)",
+                (username, generate_password_hash(password), _now()),
+            )
+        except sqlite3.IntegrityError:
+            return None
+        return cursor.lastrowid
+
+    def authenticate(self, username: str, password: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            "SELECT id, username, password_hash FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        if row is None or not check_password_hash(row["password_hash"], password):
+            return None
+        return {"id": row["id"], "username": row["username"]}
+
+    def add_recording(self, user_id: int, filename: str, path: str, duration: Optional[float] = None,
+                      sha256: Optional[str] = None) -> Dict:
+        connection = self._connection()
+        now = _now()
+        with _transaction(connection):
+            cursor = connection.execute(
+                "INSERT INTO recordings (user_id, filename, path, duration, sha256, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, filename, path, duration, sha256, now),
+            )
+            if sha256 is not None:
+                connection.execute(
+                    """INSERT INTO blobs (sha256, path, refcount, created_at) VALUES (?, ?, 1, ?)
+                       ON CONFLICT (sha256) DO UPDATE SET refcount = refcount + 1, path = excluded.path""",
+                    (sha256, path, now),
+                )
+        return self.get_recording(user_id, cursor.lastrowid)
+
+    def delete_recording(self, user_id: int, recording_id: int) -> Optional[List[str]]:
+        connection = self._connection()
+        with _transaction(connection):
+            row = connection.execute(
+                "SELECT path, preview_path, sha256, status FROM recordings WHERE user_id = ? AND id = ?",
+                (user_id, recording_id),
+            ).fetchone()
+            if row is None:
+                return None
+            # Its job would fail to store the score, and may be reading the audio
+            if row["status"] in (JOB_QUEUED, JOB_RUNNING):
+                raise RecordingBusy(f"Recording {recording_id} is being analyzed")
+            connection.execute("DELETE FROM recordings WHERE id = ?", (recording_id,))
+            if row["sha256"] is not None:
+                connection.execute("UPDATE blobs SET refcount = refcount - 1 WHERE sha256 = ?", (row["sha256"],))
+                connection.execute("DELETE FROM blobs WHERE sha256 = ? AND refcount <= 0", (row["sha256"],))
+            # Recordings from before the blob store may still share a file by name
+            return [
+                path for path in (row["path"], row["preview_path"])
+                if path is not None and connection.execute(
+                    """SELECT EXISTS (SELECT 1 FROM recordings WHERE path = ?1 OR preview_path = ?1)
+                       OR EXISTS (SELECT 1 FROM blobs WHERE path = ?1)""",
+                    (path,),
+                ).fetchone()[0] == 0
+            ]
+
+    def get_blob(self, sha256: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            "SELECT sha256, path, refcount FROM blobs WHERE sha256 = ?", (sha256,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def find_duplicate(self, user_id: int, sha256: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            f"""SELECT {_RECORDING_COLUMNS} FROM recordings WHERE user_id = ? AND sha256 = ?
+                ORDER BY status = '{RECORDING_ANALYZED}' DESC, analyzed_at DESC, id DESC LIMIT 1""",
+            (user_id, sha256),
+        ).fetchone()
+        return _recording(row) if row else None
+
+    def get_recording(self, user_id: int, recording_id: int) -> Optional[Dict]:
+        row = self._connection().execute(
+            f"SELECT {_RECORDING_COLUMNS} FROM recordings WHERE user_id = ? AND id = ?", (user_id, recording_id)
+        ).fetchone()
+        return _recording(row) if row else None
+
+    def list_recordings(self, user_id: int, limit: Optional[int] = None, offset: int = 0,
+                        sort: str = "created_at", descending: bool = False) -> List[Dict]:
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Can't sort recordings by {sort!r}")
+        order = "DESC" if descending else "ASC"
+        # Served by the (user_id, <sort column>) indexes; id breaks ties so pages never overlap
+        rows = self._connection().execute(
+            f"""SELECT {_RECORDING_COLUMNS} FROM recordings WHERE user_id = ?
+                ORDER BY {sort} {order}, id {order} LIMIT ? OFFSET ?""",
+            (user_id, -1 if limit is None else limit, offset),
+        ).fetchall()
+        return [_recording(row) for row in rows]
+
+    def count_recordings(self, user_id: int) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM recordings WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+    def get_transcript(self, user_id: int, recording_id: int) -> Optional[str]:
+        row = self._connection().execute(
+            """SELECT s.transcript FROM scores s JOIN recordings r ON r.id = s.recording_id
+               WHERE r.user_id = ? AND r.id = ? ORDER BY s.created_at DESC, s.id DESC LIMIT 1""",
+            (user_id, recording_id),
+        ).fetchone()
+        return row["transcript"] if row else None
+
+    def set_recording_job(self, recording_id: int, job_id: str):
+        self._connection().execute("UPDATE recordings SET job_id = ? WHERE id = ?", (job_id, recording_id))
+
+    def set_recording_status(self, recording_id: int, status: str, error: Optional[str] = None):
+        self._connection().execute(
+            "UPDATE recordings SET status = ?, error = ? WHERE id = ?", (status, error, recording_id)
+        )
+
+    def queue_recording(self, recording_id: int) -> bool:
+        return self._connection().execute(
+            f"""UPDATE recordings SET status = ?, error = NULL
+                WHERE id = ? AND status NOT IN ('{JOB_QUEUED}', '{JOB_RUNNING}')""",
+            (JOB_QUEUED, recording_id),
+        ).rowcount == 1
+
+    def set_recording_preview(self, recording_id: int, preview_path: str):
+        self._connection().execute("UPDATE recordings SET preview_path = ? WHERE id = ?", (preview_path, recording_id))
+
+    def job_owner(self, job_id: str) -> Optional[int]:
+        row = self._connection().execute("SELECT user_id FROM recordings WHERE job_id = ?", (job_id,)).fetchone()
+        return row["user_id"] if row else None
+
+    def create_upload(self, upload_id: str, user_id: int, filename: str, length: int) -> Dict:
+        now = _now()
+        self._connection().execute(
+            "INSERT INTO uploads (id, user_id, filename, length, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (upload_id, user_id, filename, length, now, now),
+        )
+        return self.get_upload(user_id, upload_id)
+
+    def get_upload(self, user_id: int, upload_id: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            f"SELECT {_UPLOAD_COLUMNS} FROM uploads WHERE user_id = ? AND id = ?", (user_id, upload_id)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def advance_upload(self, upload_id: str, expected: int, received: int) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE uploads SET received = ?, updated_at = ? WHERE id = ? AND received = ?",
+            (received, _now(), upload_id, expected),
+        )
+        return cursor.rowcount == 1
+
+    def complete_upload(self, upload_id: str, recording_id: int):
+        self._connection().execute(
+            "UPDATE uploads SET recording_id = ?, updated_at = ? WHERE id = ?", (recording_id, _now(), upload_id)
+        )
+
+    def fail_upload(self, upload_id: str, error: str):
+        self._connection().execute(
+            "UPDATE uploads SET error = ?, updated_at = ? WHERE id = ?", (error, _now(), upload_id)
+        )
+
+    def add_score(self, recording_id: int, ai_score: float, transcript: Optional[str]):
+        connection = self._connection()
+        now = _now()
+        with _transaction(connection):
+            connection.execute(
+                "INSERT INTO scores (recording_id, ai_score, transcript, created_at) VALUES (?, ?, ?, ?)",
+                (recording_id, float(ai_score), transcript, now),
+            )
+            connection.execute(
+                "UPDATE recordings SET status = ?, error = NULL, ai_score = ?, analyzed_at = ? WHERE id = ?",
+                (RECORDING_ANALYZED, float(ai_score), now, recording_id),
+            )
+
+    def save_job(self, job: Dict):
+        values = [job["id"]] + [_job_value(field, job.get(field)) for field in _JOB_FIELDS] + [_now()]
+        self._connection().execute(
+            f"INSERT OR REPLACE INTO jobs (id, {', '.join(_JOB_FIELDS)}, heartbeat) "
+            f"VALUES (?{', ?' * len(_JOB_FIELDS)}, ?)",
+            values,
+        )
+
+    def update_job(self, job_id: str, **fields):
+        unknown = set(fields) - set(_JOB_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+        if not fields:
+            return
+        assignments = ", ".join(f"{field} = ?" for field in fields)
+        values = [_job_value(field, value) for field, value in fields.items()]
+        self._connection().execute(
+            f"UPDATE jobs SET {assignments}, heartbeat = ? WHERE id = ?", values + [_now(), job_id]
+        )
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {key: row[key] for key in ("id",) + _JOB_FIELDS}
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def touch_jobs(self, job_ids: List[str]):
+        if not job_ids:
+            return
+        self._connection().execute(
+            f"UPDATE jobs SET heartbeat = ? WHERE id IN ({', '.join('?' * len(job_ids))})",
+            [_now()] + list(job_ids),
+        )
+
+    def fail_stale_jobs(self, stale_after: float, error: str) -> int:
+        cutoff = (datetime.now() - timedelta(seconds=stale_after)).isoformat()
+        stale = (
+            f"SELECT id FROM jobs WHERE status IN ('{JOB_QUEUED}', '{JOB_RUNNING}') "
+            "AND (heartbeat IS NULL OR heartbeat < ?)"
+        )
+        connection = self._connection()
+        with _transaction(connection):
+            connection.execute(
+                f"""UPDATE recordings SET status = ?, error = ?
+                    WHERE status IN ('{JOB_QUEUED}', '{JOB_RUNNING}') AND job_id IN ({stale})""",
+                (JOB_FAILED, error, cutoff),
+            )
+            return connection.execute(
+                f"UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id IN ({stale})",
+                (JOB_FAILED, error, _now(), cutoff),
+            ).rowcount
+
+    def close(self):
+        """Close this thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections can't cross threads, nor a fork (gunicorn preloads the app before forking)
+        pid = os.getpid()
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid == pid:
+            return connection
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        # Autocommit; multi-statement writes open their own transaction
+        connection = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        connection.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        # Full fsync on checkpoints only; a crash can lose the last commits but never corrupts the file
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute("PRAGMA foreign_keys = ON")
+        self._local.connection = connection
+        self._local.pid = pid
+
+        with self._migrate_lock:
+            if self._migrated_pid != pid:
+                self._migrate(connection)
+                self._migrated_pid = pid
+        return connection
+
+    def _migrate(self, connection: sqlite3.Connection):
+        # The write lock is taken before reading the version, so concurrent workers migrate once
+        with _transaction(connection):
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+                for statement in statements:
+                    connection.execute(statement)
+                connection.execute(f"PRAGMA user_version = {number}")
+
+
+@contextmanager
+def _transaction(connection: sqlite3.Connection):
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield connection
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+def _recording(row: sqlite3.Row) -> Dict:
+    recording = dict(row)
+    recording["analyzed"] = recording["status"] == RECORDING_ANALYZED
+    return recording
+
+
+def _job_value(field: str, value):
+    return json.dumps(value) if field == "result" and value is not None else value
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
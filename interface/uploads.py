@@ -0,0 +1,259 @@
+import base64
+import fcntl
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Optional, Tuple
+
+import yaml
+
+from utils.logger import default_logger as logger
+
+# Load configuration
+with open("config.yaml", "r") as file:
+    config = yaml.safe_load(file)
+
+TUS_VERSION = "1.0.0"
+WRITE_BLOCK_SIZE = config["uploads"]["block_size_kb"] * 1024
+CHUNK_SIZE = config["uploads"]["chunk_size_mb"] * 1024 * 1024
+PREPROCESS_EARLY = config["uploads"]["preprocess_early"]
+IDLE_TIMEOUT = config["uploads"]["idle_timeout"]
+UPLOAD_WORKERS = config["uploads"]["workers"]
+
+# Formats ffmpeg decodes front to back from a pipe, so preprocessing can follow the upload as it arrives
+STREAMABLE_EXTENSIONS = {".wav", ".mp3"}
+# Lowest bitrate an upload is assumed to have (32 kbit/s MP3), to tell which are too short to stream
+MIN_BYTES_PER_SECOND = 4000
+
+# Running hashes of uploads not written to for this long are dropped; a resumed upload rehashes from disk
+HASHER_TTL = 3600.0
+
+# Running SHA-256 of each upload this process has been writing: {upload_id: (bytes hashed, hash, last written)}
+_hashers = {}
+_hashers_lock = threading.Lock()
+
+
+class UploadLocked(Exception):
+    """Another request is already writing to the same upload."""
+
+
+def parse_metadata(header: str) -> Dict[str, str]:
+    """
+    Decode a tus Upload-Metadata header: comma-separated "key base64(value)" pairs.
+
+    Args:
+        header: Header value
+
+    Returns:
+        Dict[str, str]: Decoded values (empty for keys sent without one)
+    """
+    metadata = {}
+    for pair in filter(None, (part.strip() for part in header.split(","))):
+        key, _, value = pair.partition(" ")
+        try:
+            metadata[key] = base64.b64decode(value, validate=True).decode() if value else ""
+        except ValueError:
+            continue
+    return metadata
+
+
+def incoming_path(upload_folder: str, upload_id: str) -> str:
+    """Where the bytes of an upload in progress are written."""
+    return os.path.join(upload_folder, "incoming", upload_id)
+
+
+@contextmanager
+def locked(path: str):
+    """
+    Open a partial upload for writing, holding an exclusive lock across processes.
+
+    Raises:
+        UploadLocked: If another request holds the lock
+    """
+    with open(path, "r+b") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadLocked(f"Upload {os.path.basename(path)} is being written by another request")
+        yield f
+
+
+def write_chunk(f: BinaryIO, upload_id: str, received: int, length: int, stream: BinaryIO) -> Tuple[int, Optional[str]]:
+    """
+    Stream a request body to disk at the upload's current offset, hashing it on the way.
+
+    Whatever arrives before the client disconnects is kept, so the upload can
+    resume from there.
+
+    Args:
+        f: Partial file from locked()
+        upload_id: Upload ID
+        received: Bytes already stored
+        length: Total size of the upload
+        stream: Request body
+
+    Returns:
+        Tuple[int, Optional[str]]: Bytes stored now, and the hex SHA-256 once the upload is complete
+    """
+    hasher = _hasher_at(upload_id, f, received)
+    f.seek(received)
+    offset = received
+    try:
+        while offset < length:
+            data = stream.read(min(WRITE_BLOCK_SIZE, length - offset))
+            if not data:
+                break
+            f.write(data)
+            hasher.update(data)
+            offset += len(data)
+    except Exception as e:
+        logger.log_warning(f"Upload {upload_id} interrupted at byte {offset}: {e}")
+    finally:
+        f.flush()
+        # Drop anything left over from an earlier attempt that never got recorded
+        f.truncate(offset)
+
+    if offset == length:
+        return offset, hasher.hexdigest()
+    now = time.monotonic()
+    with _hashers_lock:
+        # Abandoned uploads would otherwise keep their hasher for the life of the process
+        for stale in [key for key, entry in _hashers.items() if now - entry[2] > HASHER_TTL]:
+            del _hashers[stale]
+        _hashers[upload_id] = (offset, hasher, now)
+    return offset, None
+
+
+def _hasher_at(upload_id: str, f: BinaryIO, received: int):
+    with _hashers_lock:
+        hashed, hasher, _ = _hashers.pop(upload_id, (None, None, None))
+    if hashed == received:
+        return hasher
+
+    # Earlier chunks went to another worker, or this one restarted: hash what's on disk so far
+    hasher = hashlib.sha256()
+    f.seek(0)
+    remaining = received
+    while remaining:
+        data = f.read(min(WRITE_BLOCK_SIZE, remaining))
+        if not data:
+            raise IOError(f"Upload {upload_id} is shorter on disk than the {received} bytes recorded")
+        hasher.update(data)
+        remaining -= len(data)
+    return hasher
+
+
+class GrowingFile:
+    """
+    Reads a file that is still being written, waiting for more bytes until it reaches its full length.
+
+    Everything read is hashed, so the reader ends up with the file's SHA-256.
+    Safe to read from several threads.
+    """
+
+    def __init__(self, f: BinaryIO, length: int, idle_timeout: float = IDLE_TIMEOUT, poll_interval: float = 0.1):
+        """
+        Initialize the reader.
+
+        Args:
+            f: File opened for reading, before the upload completes (it may be renamed meanwhile)
+            length: Size the file will reach
+            idle_timeout: Seconds without new bytes after which reading gives up
+            poll_interval: Seconds between checks for new bytes
+        """
+        self.f = f
+        self.length = length
+        self.idle_timeout = idle_timeout
+        self.poll_interval = poll_interval
+        self.position = 0
+        self._hasher = hashlib.sha256()
+        self._lock = threading.Lock()
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Read up to size bytes, blocking until some are available.
+
+        Returns:
+            bytes: Data, or b"" once the whole length has been read
+
+        Raises:
+            TimeoutError: If the file stops growing for longer than idle_timeout
+        """
+        idle_since = time.monotonic()
+        while True:
+            with self._lock:
+                if self.position >= self.length:
+                    return b""
+                available = min(os.fstat(self.f.fileno()).st_size, self.length) - self.position
+                if available > 0:
+                    n = available if size is None or size < 0 else min(size, available)
+                    self.f.seek(self.position)
+                    data = self.f.read(n)
+                    self._hasher.update(data)
+                    self.position += len(data)
+                    return data
+            if time.monotonic() - idle_since > self.idle_timeout:
+                raise TimeoutError(f"No new upload data for {self.idle_timeout}s")
+            time.sleep(self.poll_interval)
+
+    def drain(self):
+        """Read (and hash) whatever the consumer left unread."""
+        while self.read(WRITE_BLOCK_SIZE):
+            pass
+
+    def hexdigest(self) -> str:
+        """SHA-256 of everything read so far."""
+        with self._lock:
+            return self._hasher.hexdigest()
+
+    def close(self):
+        self.f.close()
+
+
+def may_stream(length: int) -> bool:
+    """Whether an upload of this many bytes could be long enough for the streaming pipeline."""
+    from preprocessing.streaming import STREAM_MIN_DURATION
+
+    return length >= STREAM_MIN_DURATION * MIN_BYTES_PER_SECOND
+
+
+def preprocess_upload(f: BinaryIO, path: str, length: int, cache=None) -> Dict:
+    """
+    Decode, denoise and extract features from an upload while it is still arriving.
+
+    The features come from the streaming pipeline and are cached under the
+    file's SHA-256 as such, so analyzing the recording once the upload
+    completes skips the DSP stage if it is long enough to stream (see
+    may_stream()), and computes in-memory features as usual if not.
+
+    Args:
+        f: The partial file, opened for reading
+        path: Its path (used to name it in errors)
+        length: Size of the complete upload
+        cache: FeatureCache to fill (the default one if None)
+
+    Returns:
+        Dict: The "sha256" the features were cached under
+
+    Raises:
+        TimeoutError: If the upload stops arriving for IDLE_TIMEOUT seconds
+    """
+    from detection.scoring import REQUIRED_FEATURES
+    from preprocessing.cache import default_feature_cache
+    from preprocessing.decode import decode_blocks
+    from preprocessing.streaming import stream_features
+
+    cache = cache or default_feature_cache
+    reader = GrowingFile(f, length)
+    try:
+        blocks = decode_blocks(path, source=reader)
+        features = stream_features(path, features=REQUIRED_FEATURES, blocks=blocks)
+        # ffmpeg can stop before trailing metadata; the hash must cover every byte
+        reader.drain()
+    finally:
+        reader.close()
+    digest = reader.hexdigest()
+    cache.put(cache.key_for(digest=digest, streamed=True), features)
+    return {"sha256": digest}
@@ -0,0 +1,243 @@
+"""
+Batch analyzer for archived interview recordings.
+
+Fans recordings out across a process pool, saves features and scores through
+FileHandler and skips recordings that already have results, so an interrupted
+run picks up where it stopped. With --force, audio seen before is rescored
+from the feature cache without repeating the DSP stage. With --transcribe,
+recordings without a saved transcript are transcribed by the configured
+backend: through Gladia, concurrently on one event loop before the pool
+starts; with local Whisper, in each worker from the audio it decoded (or,
+for recordings long enough to stream, from the file).
+
+Usage:
+    python main.py --input data/input_audio
+    python main.py --input data/input_audio/sample.wav --force
+    GLADIA_API_KEY=... python main.py --input data/input_audio --transcribe --concurrency 100
+    TRANSCRIPTION_BACKEND=whisper python main.py --input data/input_audio --transcribe
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from urllib.parse import quote
+
+import yaml
+from threadpoolctl import threadpool_limits
+
+from transcription.backends import TRANSCRIPTION_BACKEND
+from utils.file_handler import FileHandler
+from utils.logger import default_logger as logger
+
+# Load configuration
+with open("config.yaml", "r") as file:
+    config = yaml.safe_load(file)
+
+INPUT_DIR = config["audio"]["input_dir"]
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".m4a", ".flac", ".mp4"}
+
+
+def find_recordings(input_path):
+    """Lists the audio files under a directory, or the single file given."""
+    if os.path.isfile(input_path):
+        return [input_path]
+    return sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(input_path)
+        for name in names
+        if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS
+    )
+
+
+def file_id_for(path, root=None):
+    """
+    Name a recording's saved features, transcript and results after its path under the input root.
+
+    The extension and any subdirectories are kept (escaped, so the ID is one
+    file name), so a/interview.wav, b/interview.wav and interview.mp3 never
+    share results.
+
+    Args:
+        path: Recording
+        root: Directory the recordings were found under (the recording's own directory if None)
+
+    Returns:
+        str: File ID for FileHandler
+    """
+    if root is None or os.path.isfile(root):
+        root = os.path.dirname(path)
+    return quote(os.path.relpath(path, root).replace(os.sep, "/"), safe="")
+
+
+def _init_worker():
+    # One process per core: keep each worker's BLAS/FFT pools single-threaded
+    threadpool_limits(1)
+
+
+def analyze_file(path, data_dir, backend=None, api_key=None, root=None):
+    """
+    Analyze one recording in a worker process and save its features and score.
+
+    A transcript saved by an earlier run is reused; otherwise the recording is
+    transcribed when a backend is given, and scored on audio alone if not.
+
+    Args:
+        path: Recording to analyze
+        data_dir: FileHandler base directory
+        backend: Transcription backend name, or None to not transcribe here
+        api_key: Gladia API key for the gladia backend
+        root: Directory the recording was found under, for its file ID
+
+    Returns:
+        dict: The saved analysis results
+    """
+    from detection.pipeline import extract_audio_features
+    from preprocessing.cache import FeatureCache
+    from preprocessing.preprocess_audio import load_and_preprocess
+    from preprocessing.streaming import should_stream
+    from detection.scoring import compute_likelihood
+    from transcription.backends import get_backend
+
+    handler = FileHandler(data_dir)
+    cache = FeatureCache(handler)
+    file_id = file_id_for(path, root)
+    started = time.perf_counter()
+
+    transcriber = None
+    if backend and not handler.has_transcript(file_id):
+        transcriber = get_backend(backend, api_key)
+    # Decode once for both the DSP stage and a local transcription model, unless
+    # the recording is long enough that the DSP stage streams it instead
+    share_audio = transcriber is not None and transcriber.uses_audio and not should_stream(path)
+    audio = load_and_preprocess(path) if share_audio else None
+
+    features = extract_audio_features(path, cache=cache, audio=audio)
+    features_path = handler.save_features(features, file_id)
+
+    transcript = ""
+    if handler.has_transcript(file_id):
+        transcript = handler.load_transcript(file_id)
+    elif transcriber is not None:
+        transcript = transcriber.transcribe(path, audio)
+        handler.save_transcript(transcript, file_id)
+
+    results = {
+        "file": path,
+        "file_id": file_id,
+        "ai_score": compute_likelihood(transcript, features),
+        "has_transcript": bool(transcript),
+        "feature_cache_hit": cache.hits > 0,
+        "features_path": features_path,
+        "processing_time_s": round(time.perf_counter() - started, 3),
+        "processed_at": datetime.now().isoformat(),
+    }
+    handler.save_analysis_results(results, file_id)
+    return results
+
+
+def transcribe_pending(paths, data_dir, api_key, concurrency=None, root=None):
+    """
+    Transcribe the recordings that have no saved transcript, many at a time.
+
+    Returns:
+        int: Number of recordings that failed to transcribe
+    """
+    from transcription.async_gladia import CONCURRENCY, transcribe_all
+
+    handler = FileHandler(data_dir)
+    missing = [p for p in paths if not handler.has_transcript(file_id_for(p, root))]
+    if not missing:
+        return 0
+
+    concurrency = concurrency or CONCURRENCY
+    print(f"Transcribing {len(missing)} recordings, {concurrency} at a time")
+    started = time.perf_counter()
+    failed = 0
+    for result in transcribe_all(missing, api_key, concurrency=concurrency):
+        if result["error"] is None:
+            handler.save_transcript(result["transcript"], file_id_for(result["path"], root))
+        else:
+            failed += 1
+    print(f"Transcribed {len(missing) - failed} recordings ({failed} failed) in {time.perf_counter() - started:.1f}s")
+    return failed
+
+
+def run_batch(paths, data_dir="data", workers=None, api_key=None, force=False, concurrency=None,
+              transcribe=False, backend=TRANSCRIPTION_BACKEND, root=None):
+    """
+    Analyze recordings in parallel, skipping those with existing results.
+
+    With transcribe, Gladia transcripts are fetched up front by
+    transcribe_pending() and local backends transcribe in the workers;
+    recordings whose transcription failed are scored on audio alone.
+    Results are keyed by each recording's path under root (see file_id_for).
+
+    Returns:
+        dict: Counts of processed, skipped and failed files plus throughput
+    """
+    handler = FileHandler(data_dir)
+    pending = [p for p in paths if force or not handler.has_results(file_id_for(p, root))]
+    skipped = len(paths) - len(pending)
+    workers = workers or os.cpu_count() or 1
+    print(f"{len(paths)} recordings: {skipped} already analyzed, {len(pending)} to process on {workers} workers")
+
+    worker_backend = None
+    if transcribe and backend == "gladia":
+        if pending:
+            transcribe_pending(pending, data_dir, api_key, concurrency, root)
+    elif transcribe:
+        worker_backend = backend
+
+    processed = failed = cache_hits = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(analyze_file, path, data_dir, worker_backend, api_key, root): path for path in pending}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+                processed += 1
+                cache_hits += result["feature_cache_hit"]
+                print(f"[{processed + failed}/{len(pending)}] {path}: score {result['ai_score']:.3f}")
+            except Exception as e:
+                failed += 1
+                logger.log_error(f"Batch analysis failed for {path}", e)
+
+    elapsed = time.perf_counter() - started
+    files_per_minute = processed / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"Processed {processed} files ({failed} failed) in {elapsed:.1f}s: {files_per_minute:.1f} files/min")
+    print(f"Feature cache: {cache_hits} hits, {processed - cache_hits} misses")
+    return {
+        "processed": processed,
+        "feature_cache_hits": cache_hits,
+        "skipped": skipped,
+        "failed": failed,
+        "elapsed_s": elapsed,
+        "files_per_minute": files_per_minute,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=INPUT_DIR, help="Recording or directory of recordings to analyze")
+    parser.add_argument("--data-dir", default="data", help="FileHandler base directory for features and results")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per core)")
+    parser.add_argument("--force", action="store_true", help="Re-analyze recordings that already have results")
+    parser.add_argument("--transcribe", action="store_true",
+                        help="Transcribe recordings without a saved transcript "
+                             "(the gladia backend needs GLADIA_API_KEY)")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Transcription jobs in flight at once (default: transcription.gladia.concurrency)")
+    args = parser.parse_args()
+
+    api_key = os.getenv("GLADIA_API_KEY") if args.transcribe else None
+    if args.transcribe and TRANSCRIPTION_BACKEND == "gladia" and not api_key:
+        parser.error("--transcribe with the gladia backend requires the GLADIA_API_KEY environment variable")
+
+    run_batch(find_recordings(args.input), args.data_dir, args.workers, api_key, args.force, args.concurrency,
+              transcribe=args.transcribe, root=args.input)
+
+
+if __name__ == "__main__":
+    main()
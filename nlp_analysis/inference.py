@@ -0,0 +1,181 @@
+import os
+import re
+from types import SimpleNamespace
+from typing import Optional
+
+import yaml
+
+from utils.logger import default_logger as logger
+
+# Load configuration
+with open("config.yaml", "r") as file:
+    config = yaml.safe_load(file)
+
+# Classifier inference backends: fp32 PyTorch, dynamically quantized int8
+# PyTorch, and an ONNX export run by ONNX Runtime
+BACKEND_TORCH = "torch"
+BACKEND_TORCH_INT8 = "torch_int8"
+BACKEND_ONNX = "onnx"
+BACKENDS = (BACKEND_TORCH, BACKEND_TORCH_INT8, BACKEND_ONNX)
+
+CLASSIFIER_BACKEND = config["models"]["backend"]
+ONNX_DIR = config["models"]["onnx_dir"]
+ONNX_OPSET = 17
+# Seeds the classification head of checkpoints that lack a trained one (e.g. roberta-base),
+# so every load, and the int8 and ONNX models built from it, share the same head
+CLASSIFIER_SEED = 0
+
+
+def onnx_path(model_name: str, onnx_dir: str = ONNX_DIR) -> str:
+    """Where the ONNX export of a model is stored."""
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name.strip("/"))
+    return os.path.join(onnx_dir, safe_name, "model.onnx")
+
+
+class OnnxSequenceClassifier:
+    """ONNX Runtime session exposing the model(**inputs).logits call AIDetectionModel makes."""
+
+    def __init__(self, path: str, num_threads: Optional[int] = None):
+        """
+        Open an exported classifier.
+
+        Args:
+            path: ONNX file written by export_onnx()
+            num_threads: Intra-op threads (ONNX Runtime's default if None)
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def __call__(self, **inputs):
+        import torch
+
+        feeds = {name: inputs[name].cpu().numpy() for name in self.input_names}
+        logits = self.session.run(["logits"], feeds)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+    def eval(self):
+        return self
+
+
+def load_fp32_model(model_name: str):
+    """
+    Load a sequence classifier in fp32.
+
+    A checkpoint without a trained classification head gets one initialized
+    from CLASSIFIER_SEED, the same on every load, and a warning: its scores
+    mean nothing until the model is fine-tuned.
+
+    Args:
+        model_name: Hugging Face model name or local path
+
+    Returns:
+        The model, in eval mode
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification
+
+    # Seeded without disturbing the caller's random state
+    with torch.random.fork_rng(devices=[]):
+        torch.manual_seed(CLASSIFIER_SEED)
+        model, loading_info = AutoModelForSequenceClassification.from_pretrained(
+            model_name, num_labels=2, output_loading_info=True
+        )
+    if loading_info["missing_keys"]:
+        logger.log_warning(
+            f"{model_name} has no trained classification head; {len(loading_info['missing_keys'])} weights "
+            f"were initialized from seed {CLASSIFIER_SEED}, so its AI probabilities are not meaningful"
+        )
+    return model.eval()
+
+
+def quantize_int8(model):
+    """
+    Dynamically quantized copy of an fp32 classifier.
+
+    Weights of every Linear layer are stored as int8 and activations are
+    quantized per batch; the fp32 model is left untouched.
+    """
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def export_onnx(model_name: str, onnx_dir: str = ONNX_DIR, model=None, tokenizer=None) -> str:
+    """
+    Export a sequence classifier to ONNX with dynamic batch and sequence axes.
+
+    Args:
+        model_name: Hugging Face model name or local path
+        onnx_dir: Directory the export is written under
+        model: fp32 model to export, so it matches one already loaded (loaded from model_name if None)
+        tokenizer: Its tokenizer (loaded from model_name if None)
+
+    Returns:
+        str: Path of the exported model
+    """
+    import torch
+    from transformers import AutoTokenizer
+
+    tokenizer = tokenizer or AutoTokenizer.from_pretrained(model_name)
+    model = model if model is not None else load_fp32_model(model_name)
+    input_names = list(tokenizer.model_input_names)
+
+    # Two rows of different lengths so padding is traced through the mask
+    sample = tokenizer(
+        ["An example sentence for tracing.", "Short one."], return_tensors="pt", padding=True
+    )
+    path = onnx_path(model_name, onnx_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET,
+            dynamo=False,
+        )
+    return path
+
+
+def load_classifier(model_name: str, backend: str = CLASSIFIER_BACKEND, onnx_dir: str = ONNX_DIR):
+    """
+    Load a sequence classifier's tokenizer and model for the given backend.
+
+    Args:
+        model_name: Hugging Face model name or local path
+        backend: One of BACKENDS
+        onnx_dir: Directory holding ONNX exports (onnx backend only)
+
+    Returns:
+        tuple: (tokenizer, model), the model callable as model(**inputs).logits
+    """
+    from transformers import AutoTokenizer
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}, expected one of {BACKENDS}")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if backend == BACKEND_ONNX:
+        path = onnx_path(model_name, onnx_dir)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"No ONNX export of {model_name} at {path}; "
+                f"run python -m benchmarks.bench_classifier_backends --model {model_name} --export"
+            )
+        return tokenizer, OnnxSequenceClassifier(path)
+
+    model = load_fp32_model(model_name)
+    if backend == BACKEND_TORCH_INT8:
+        model = quantize_int8(model)
+    return tokenizer, model
@@ -1,21 +1,85 @@
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import numpy as np
 from typing import Dict, List, Tuple
+from collections import OrderedDict
+import hashlib
+import math
 import re
+import threading
+
+from nlp_analysis.text_stats import max_ngram_count, token_ids
+from nlp_analysis.inference import CLASSIFIER_BACKEND
+from utils.model_registry import (
+    CLASSIFIER_MODEL, LANGUAGE_MODEL, USE_LANGUAGE_MODEL, get_classifier, get_language_model
+)
 
 class AIDetectionModel:
-    def __init__(self):
-        """Initialize the AI detection model with pre-trained transformers."""
-        # Load pre-trained model and tokenizer for AI text detection
-        self.model_name = "roberta-base"  # Can be replaced with a fine-tuned model
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name, num_labels=2)
+    def __init__(self, model_name: str = CLASSIFIER_MODEL, perplexity_model_name: str = LANGUAGE_MODEL,
+                 cache_size: int = 256, windowed: bool = True, window_size: int = 512,
+                 window_overlap: int = 128, window_batch_size: int = 32, backend: str = CLASSIFIER_BACKEND,
+                 use_language_model: bool = USE_LANGUAGE_MODEL):
+        """
+        Initialize the AI detection model with pre-trained transformers.
+        
+        The transformers are loaded through the model registry on first use and
+        shared with every other instance using the same model names.
+        
+        Args:
+            model_name: Sequence classifier (can be replaced with a fine-tuned model)
+            perplexity_model_name: Causal language model used to measure perplexity
+            cache_size: Number of texts whose model outputs are memoized
+            windowed: Score long texts over overlapping windows instead of truncating them
+            window_size: Tokens per classifier window (the model's maximum input length)
+            window_overlap: Tokens shared by consecutive windows
+            window_batch_size: Windows per classifier forward pass
+            backend: Classifier inference backend ("torch", "torch_int8" or "onnx")
+            use_language_model: Measure perplexity with the causal language model; otherwise the
+                classifier's AI probability stands in for the perplexity score, so each text
+                takes a single forward pass
+        """
+        # Pre-trained model and tokenizer for AI text detection
+        self.model_name = model_name
+        self.backend = backend
+        
+        # Causal language model used to measure perplexity, if enabled
+        self.perplexity_model_name = perplexity_model_name
+        self.use_language_model = use_language_model
+        
+        # Sliding-window inference for transcripts longer than one model input
+        self.windowed = windowed
+        self.window_size = window_size
+        self.window_overlap = window_overlap
+        self.window_batch_size = window_batch_size
         
         # Thresholds for different features
         self.repetition_threshold = 0.3
         self.complexity_threshold = 0.7
         self.consistency_threshold = 0.8
+        
+        # Perplexity range mapped onto the 0-1 score: fluent, predictable text
+        # (low perplexity) scores as AI-like, erratic text as human-like
+        self.perplexity_low = 10.0
+        self.perplexity_high = 100.0
+        
+        # LRU memo of model outputs keyed by text hash
+        self.cache_size = cache_size
+        self._output_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @property
+    def tokenizer(self):
+        return get_classifier(self.model_name, self.backend)[0]
+
+    @property
+    def model(self):
+        return get_classifier(self.model_name, self.backend)[1]
+
+    @property
+    def lm_tokenizer(self):
+        return get_language_model(self.perplexity_model_name)[0]
+
+    @property
+    def lm_model(self):
+        return get_language_model(self.perplexity_model_name)[1]
 
     def analyze_text(self, text: str) -> Dict[str, float]:
         """
@@ -27,17 +91,40 @@ class AIDetectionModel:
         Returns:
             Dict[str, float]: Dictionary containing various confidence scores
         """
-        # Clean and preprocess the text
-        cleaned_text = self._preprocess_text(text)
+        return self.analyze_batch([text])[0]
+
+    def analyze_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """
+        Analyze several texts, batching their transformer inference.
         
+        All windows of all uncached texts are tokenized into padded batches and run
+        window_batch_size at a time, so per-call overhead is paid once per batch.
+        Results match analyze_text on each text.
+        
+        Args:
+            texts (List[str]): Transcript texts to analyze
+            
+        Returns:
+            List[Dict[str, float]]: One dictionary of confidence scores per text
+        """
+        # Clean and preprocess the texts
+        cleaned_texts = [self._preprocess_text(text) for text in texts]
+        outputs = self._get_model_outputs_batch(cleaned_texts)
+        return [
+            self._score_text(cleaned_text, model_outputs)
+            for cleaned_text, model_outputs in zip(cleaned_texts, outputs)
+        ]
+
+    def _score_text(self, cleaned_text: str, model_outputs: Dict) -> Dict[str, float]:
+        """Combine the text statistics with the model outputs for one preprocessed text."""
         # Extract various features
         repetition_score = self._analyze_repetition(cleaned_text)
         complexity_score = self._analyze_complexity(cleaned_text)
         consistency_score = self._analyze_consistency(cleaned_text)
-        perplexity_score = self._calculate_perplexity(cleaned_text)
+        perplexity_score = self._perplexity_score_for(model_outputs)
         
         # Get model prediction
-        model_confidence = self._get_model_prediction(cleaned_text)
+        model_confidence = model_outputs['ai_probability']
         
         # Combine scores into final confidence
         final_confidence = self._combine_scores([
@@ -73,14 +160,10 @@ class AIDetectionModel:
         if not words:
             return 0.0
             
-        # Check for repeated phrases
-        phrase_counts = {}
-        for i in range(len(words) - 2):
-            phrase = ' '.join(words[i:i+3])
-            phrase_counts[phrase] = phrase_counts.get(phrase, 0) + 1
+        # Check for repeated phrases, counting trigrams of token IDs
+        max_repetition = max_ngram_count(token_ids(words), n=3)
             
         # Calculate repetition score
-        max_repetition = max(phrase_counts.values()) if phrase_counts else 0
         repetition_score = min(1.0, max_repetition / (len(words) / 10))
         
         return repetition_score
@@ -134,37 +217,201 @@ class AIDetectionModel:
         Calculate language model perplexity as a measure of text naturalness.
         Returns a score between 0 (natural/human-like) and 1 (potentially AI).
         """
-        # Tokenize text
-        encodings = self.tokenizer(text, return_tensors='pt', truncation=True, max_length=512)
-        
-        # Calculate perplexity using model
-        with torch.no_grad():
-            outputs = self.model(**encodings)
-            logits = outputs.logits
-            
-        # Convert logits to probability score
-        probs = torch.softmax(logits, dim=1)
-        ai_prob = probs[0][1].item()  # Probability of AI-generated class
+        return self._perplexity_score_for(self._get_model_outputs(text))
+
+    def _perplexity_score_for(self, model_outputs: Dict) -> float:
+        """Perplexity score from the language model, or the classifier's AI probability without it."""
+        if model_outputs['perplexity'] is None:
+            return model_outputs['ai_probability']
+        return self._perplexity_score(model_outputs['perplexity'])
+
+    def _perplexity_score(self, perplexity: float) -> float:
+        """Map a perplexity onto a 0 (human-like) to 1 (AI-like) score."""
+        if not math.isfinite(perplexity):
+            return 0.0
         
-        return ai_prob
+        # Interpolate on a log scale between the low and high perplexity bounds
+        log_low, log_high = math.log(self.perplexity_low), math.log(self.perplexity_high)
+        score = (log_high - math.log(perplexity)) / (log_high - log_low)
+        return min(1.0, max(0.0, score))
 
     def _get_model_prediction(self, text: str) -> float:
         """
         Get direct model prediction for AI-generated text.
         Returns a confidence score between 0 (human) and 1 (AI).
         """
-        # Tokenize and get model prediction
-        encodings = self.tokenizer(text, return_tensors='pt', truncation=True, max_length=512)
+        return self._get_model_outputs(text)['ai_probability']
+
+    def _get_model_outputs(self, text: str) -> Dict:
+        """
+        Run each model once per text and memoize the outputs.
         
-        with torch.no_grad():
-            outputs = self.model(**encodings)
-            logits = outputs.logits
+        Args:
+            text: Preprocessed text
             
-        # Convert to probability
-        probs = torch.softmax(logits, dim=1)
-        ai_confidence = probs[0][1].item()
+        Returns:
+            Dict: Classifier AI probability and per-window scores, language model perplexity
+            (None unless use_language_model)
+        """
+        return self._get_model_outputs_batch([text])[0]
+
+    def _get_model_outputs_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Model outputs for several preprocessed texts, running only the uncached ones.
+        
+        Empty texts are not run through the models: they get AI probability 0
+        and no windows (and an infinite perplexity, which scores 0).
+        
+        Args:
+            texts: Preprocessed texts
+            
+        Returns:
+            List[Dict]: Outputs in the same order as texts
+        """
+        keys = [hashlib.sha256(text.encode('utf-8')).hexdigest() for text in texts]
+        found = {}
+        with self._cache_lock:
+            for key in keys:
+                if key in self._output_cache:
+                    self._output_cache.move_to_end(key)
+                    found[key] = self._output_cache[key]
+        
+        # Each distinct uncached text is inferred once
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            # A batch of nothing but empty texts would be a zero-width tensor
+            for key in [key for key, text in missing.items() if not text.strip()]:
+                found[key] = {
+                    'ai_probability': 0.0,
+                    'window_scores': [],
+                    'perplexity': float('inf') if self.use_language_model else None,
+                }
+            run = {key: text for key, text in missing.items() if key not in found}
+            missing_texts = list(run.values())
+            if missing_texts:
+                classifications = self._classify_batch(missing_texts)
+                if self.use_language_model:
+                    perplexities = self._language_model_perplexity_batch(missing_texts)
+                else:
+                    perplexities = [None] * len(missing_texts)
+                for key, (ai_probability, window_scores), perplexity in zip(run, classifications, perplexities):
+                    found[key] = {
+                        'ai_probability': ai_probability,
+                        'window_scores': window_scores,
+                        'perplexity': perplexity,
+                    }
+            
+            with self._cache_lock:
+                for key in missing:
+                    self._output_cache[key] = found[key]
+                    self._output_cache.move_to_end(key)
+                while len(self._output_cache) > self.cache_size:
+                    self._output_cache.popitem(last=False)
+        
+        return [found[key] for key in keys]
+
+    def _classify_batch(self, texts: List[str]) -> List[Tuple[float, List[float]]]:
+        """
+        Classify texts, scoring every window of every text in shared padded batches.
+        
+        Returns:
+            List[Tuple[float, List[float]]]: Per text, the token-weighted mean AI
+            probability and the per-window probabilities
+        """
+        if not self.windowed:
+            encodings = self.tokenizer(
+                texts, return_tensors='pt', truncation=True, max_length=self.window_size, padding=True
+            )
+            return [(prob, [prob]) for prob in self._forward_windows(encodings)]
+        
+        # Overlapping windows of at most window_size tokens, padded into one batch
+        encodings = self.tokenizer(
+            texts,
+            return_tensors='pt',
+            truncation=True,
+            max_length=self.window_size,
+            stride=self.window_overlap,
+            return_overflowing_tokens=True,
+            padding=True,
+        )
+        sample_mapping = encodings.pop('overflow_to_sample_mapping').tolist()
+        window_probs = self._forward_windows(encodings)
+        window_tokens = encodings['attention_mask'].sum(dim=1).tolist()
+        
+        results = []
+        for i in range(len(texts)):
+            rows = [row for row, sample in enumerate(sample_mapping) if sample == i]
+            window_scores = [window_probs[row] for row in rows]
+            weights = [window_tokens[row] for row in rows]
+            results.append((float(np.average(window_scores, weights=weights)), window_scores))
+        return results
+
+    def _forward_windows(self, encodings) -> List[float]:
+        """AI-class probability for each row of a padded batch, window_batch_size rows per forward pass."""
+        import torch
+        
+        n_rows = encodings['input_ids'].shape[0]
+        probs = []
+        with torch.no_grad():
+            for start in range(0, n_rows, self.window_batch_size):
+                batch = {name: tensor[start:start + self.window_batch_size] for name, tensor in encodings.items()}
+                logits = self.model(**batch).logits
+                probs.extend(torch.softmax(logits, dim=1)[:, 1].tolist())
+        return probs
+
+    def _language_model_perplexity_batch(self, texts: List[str]) -> List[float]:
+        """
+        Perplexity of each whole text under the causal language model (inf if too short to score).
         
-        return ai_confidence
+        Long texts are split into consecutive context-length windows; the windows of
+        all texts run as padded batches and each text pools the token losses of its
+        own windows.
+        """
+        import torch
+        
+        max_length = getattr(self.lm_model.config, 'n_positions', 1024)
+        encodings = self.lm_tokenizer(
+            texts,
+            return_tensors='pt',
+            truncation=True,
+            max_length=max_length,
+            return_overflowing_tokens=True,
+            padding=True,
+        )
+        sample_mapping = encodings.pop('overflow_to_sample_mapping')
+        
+        # Each token is predicted from the ones before it within its window
+        token_nll = []
+        with torch.no_grad():
+            for start in range(0, encodings['input_ids'].shape[0], self.window_batch_size):
+                batch = {name: tensor[start:start + self.window_batch_size] for name, tensor in encodings.items()}
+                logits = self.lm_model(**batch).logits
+                token_nll.append(torch.nn.functional.cross_entropy(
+                    logits[:, :-1].transpose(1, 2), batch['input_ids'][:, 1:], reduction='none'
+                ))
+        token_nll = torch.cat(token_nll)
+        attention = encodings['attention_mask'].bool()
+        scored = attention[:, 1:] & attention[:, :-1]
+        
+        perplexities = []
+        for i in range(len(texts)):
+            rows = sample_mapping == i
+            losses = token_nll[rows][scored[rows]]
+            perplexities.append(math.exp(losses.mean().item()) if losses.numel() else float('inf'))
+        return perplexities
+
+    def predict_windows(self, text: str) -> Tuple[float, List[float]]:
+        """
+        Get the transcript-level model prediction together with the per-window scores.
+        
+        Args:
+            text: The transcript text to analyze
+            
+        Returns:
+            Tuple[float, List[float]]: Combined AI probability and one probability per window
+        """
+        outputs = self._get_model_outputs(self._preprocess_text(text))
+        return outputs['ai_probability'], outputs['window_scores']
 
     def _combine_scores(self, scores_and_weights: List[Tuple[float, float]]) -> float:
         """
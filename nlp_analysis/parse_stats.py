@@ -0,0 +1,60 @@
+import numpy as np
+from spacy.attrs import HEAD
+
+from nlp_analysis.text_stats import token_ids
+
+
+def dependency_depths(heads: np.ndarray) -> np.ndarray:
+    """
+    Number of ancestors of every token, from an array of absolute head indices.
+
+    All tokens climb the tree together, one level per step, so the cost is
+    O(n * max depth) vectorized operations instead of one Python ancestor
+    chain per token.
+
+    Args:
+        heads: Head index of each token (a root is its own head)
+
+    Returns:
+        np.ndarray: len(token.ancestors) for each token
+    """
+    depths = np.zeros(len(heads), dtype=np.int64)
+    current = np.arange(len(heads))
+    climbing = heads[current] != current
+    while climbing.any():
+        depths += climbing
+        current = np.where(climbing, heads[current], current)
+        climbing = heads[current] != current
+    return depths
+
+
+class DocStats:
+    """Token and sentence statistics of one spaCy parse, shared by the text features."""
+
+    def __init__(self, doc):
+        """
+        Compute the statistics in a few array passes over the doc.
+
+        Args:
+            doc: Parsed spaCy Doc
+        """
+        self.n_tokens = len(doc)
+
+        # Sentence boundaries as token offsets
+        sentences = list(doc.sents) if self.n_tokens else []
+        self.sentence_starts = np.array([sent.start for sent in sentences], dtype=np.int64)
+        self.sentence_ends = np.array([sent.end for sent in sentences], dtype=np.int64)
+        self.sentence_lengths = self.sentence_ends - self.sentence_starts
+
+        # HEAD is stored as an offset relative to the token
+        relative_heads = doc.to_array([HEAD]).ravel().astype(np.int64)
+        self.heads = np.arange(self.n_tokens) + relative_heads
+        self.depths = dependency_depths(self.heads)
+        self.sentence_depths = (
+            np.maximum.reduceat(self.depths, self.sentence_starts)
+            if len(self.sentence_starts) else np.zeros(0, dtype=np.int64)
+        )
+
+        # Lowercased alphabetic words, and the same words as integer IDs
+        self.words = [token.text.lower() for token in doc if token.is_alpha]
+        self.word_ids = token_ids(self.words)
@@ -1,20 +1,35 @@
-import spacy
 import numpy as np
 from typing import Dict, List, Tuple, Optional
 from collections import Counter
 import re
 from scipy.stats import entropy
+from spacy.attrs import ORTH
 from textblob import TextBlob
 
+from nlp_analysis.parse_stats import DocStats
+from nlp_analysis.text_stats import moving_average_ttr, token_ids
+from utils.model_registry import SPACY_MODEL, get_spacy
+
 class TranscriptAnalyzer:
-    def __init__(self):
+    def __init__(self, spacy_model: str = SPACY_MODEL):
         """Initialize the transcript analyzer with NLP models and tools."""
-        # Load spaCy model for linguistic analysis
-        self.nlp = spacy.load("en_core_web_sm")
+        # spaCy model for linguistic analysis, loaded through the model registry on first use
+        self.spacy_model = spacy_model
         
         # Initialize feature extractors
         self.min_segment_length = 50  # minimum words for segment analysis
         self.max_segment_length = 200  # maximum words for segment analysis
+        
+        # Past this many sentences, semantic consistency is estimated from a
+        # random sample of sentence pairs instead of the full similarity matrix
+        self.max_similarity_sentences = 2000
+        self.similarity_sample_pairs = 500000
+        # Sampled pairs whose vectors are gathered at once (rows of dim floats each)
+        self.similarity_chunk_pairs = 20000
+
+    @property
+    def nlp(self):
+        return get_spacy(self.spacy_model)
 
     def analyze_transcript(self, text: str) -> Dict[str, float]:
         """
@@ -32,19 +47,40 @@ class TranscriptAnalyzer:
         # Process with spaCy
         doc = self.nlp(cleaned_text)
         
-        # Extract features
+        return self._extract_features(doc, text)
+
+    def analyze_batch(self, texts: List[str], batch_size: int = 32, n_process: int = 1) -> List[Dict[str, float]]:
+        """
+        Analyze several transcripts, parsing them together with nlp.pipe.
+        
+        Args:
+            texts (List[str]): The transcript texts to analyze
+            batch_size (int): Texts buffered per spaCy batch
+            n_process (int): Worker processes spaCy parses with
+            
+        Returns:
+            List[Dict[str, float]]: Features for each text, as analyze_transcript returns them
+        """
+        cleaned_texts = (self._clean_text(text) for text in texts)
+        docs = self.nlp.pipe(cleaned_texts, batch_size=batch_size, n_process=n_process)
+        return [self._extract_features(doc, text) for doc, text in zip(docs, texts)]
+
+    def _extract_features(self, doc, text: str) -> Dict[str, float]:
+        """Compute every feature from a parsed transcript and its raw text."""
+        stats = DocStats(doc)
+        sentence_vectors = self._sentence_vectors(doc)
         features = {
             # Linguistic diversity features
-            'lexical_diversity': self._calculate_lexical_diversity(doc),
-            'syntactic_complexity': self._calculate_syntactic_complexity(doc),
-            'response_coherence': self._calculate_response_coherence(doc),
+            'lexical_diversity': self._calculate_lexical_diversity(doc, stats),
+            'syntactic_complexity': self._calculate_syntactic_complexity(doc, stats),
+            'response_coherence': self._calculate_response_coherence(doc, sentence_vectors),
             
             # Statistical features
-            'word_distribution': self._analyze_word_distribution(doc),
-            'sentence_variance': self._calculate_sentence_variance(doc),
+            'word_distribution': self._analyze_word_distribution(doc, stats),
+            'sentence_variance': self._calculate_sentence_variance(doc, stats),
             
             # Semantic features
-            'semantic_consistency': self._analyze_semantic_consistency(doc),
+            'semantic_consistency': self._analyze_semantic_consistency(doc, sentence_vectors),
             'topic_coherence': self._calculate_topic_coherence(doc),
             
             # Temporal features
@@ -64,12 +100,13 @@ class TranscriptAnalyzer:
         text = re.sub(r'\s+', ' ', text)
         return text.strip()
 
-    def _calculate_lexical_diversity(self, doc) -> float:
+    def _calculate_lexical_diversity(self, doc, stats: Optional[DocStats] = None) -> float:
         """
         Calculate lexical diversity using multiple metrics.
         Returns a score between 0 (low diversity) and 1 (high diversity).
         """
-        words = [token.text.lower() for token in doc if token.is_alpha]
+        stats = stats or DocStats(doc)
+        words = stats.words
         if not words:
             return 0.0
             
@@ -79,22 +116,13 @@ class TranscriptAnalyzer:
         ttr = unique_words / total_words if total_words > 0 else 0
         
         # Calculate Moving Average TTR (MATTR)
-        window_size = 50
-        if len(words) >= window_size:
-            mattrs = []
-            for i in range(len(words) - window_size + 1):
-                window = words[i:i + window_size]
-                window_ttr = len(set(window)) / window_size
-                mattrs.append(window_ttr)
-            mattr = np.mean(mattrs)
-        else:
-            mattr = ttr
+        mattr = moving_average_ttr(stats.word_ids, window_size=50)
             
         # Combine metrics
         diversity_score = (ttr + mattr) / 2
         return min(1.0, diversity_score)
 
-    def _calculate_syntactic_complexity(self, doc) -> float:
+    def _calculate_syntactic_complexity(self, doc, stats: Optional[DocStats] = None) -> float:
         """
         Analyze syntactic complexity using dependency parsing.
         Returns a score between 0 (simple) and 1 (complex).
@@ -103,12 +131,10 @@ class TranscriptAnalyzer:
             return 0.0
             
         # Calculate average dependency tree depth
-        depths = []
-        for sent in doc.sents:
-            depth = max(len(list(token.ancestors)) for token in sent)
-            depths.append(depth)
+        stats = stats or DocStats(doc)
+        depths = stats.sentence_depths
             
-        if not depths:
+        if not len(depths):
             return 0.0
             
         # Normalize complexity score
@@ -117,37 +143,62 @@ class TranscriptAnalyzer:
         
         return complexity_score
 
-    def _calculate_response_coherence(self, doc) -> float:
+    def _calculate_response_coherence(self, doc, sentence_vectors=None) -> float:
         """
         Analyze coherence between sentences using semantic similarity.
         Returns a score between 0 (incoherent) and 1 (coherent).
         """
-        sentences = list(doc.sents)
-        if len(sentences) < 2:
+        if sentence_vectors is None:
+            sentence_vectors = self._sentence_vectors(doc)
+        vectors, sentence_ids = sentence_vectors
+        if len(vectors) < 2:
             return 1.0  # Single sentence is considered coherent
             
         # Calculate semantic similarity between adjacent sentences
-        similarities = []
-        for i in range(len(sentences) - 1):
-            similarity = sentences[i].similarity(sentences[i + 1])
-            similarities.append(similarity)
+        similarities = np.einsum('ij,ij->i', vectors[:-1], vectors[1:])
+        similarities = similarities.astype(np.float64)
+        similarities[sentence_ids[:-1] == sentence_ids[1:]] = 1.0
             
         # Average similarity score
-        coherence_score = np.mean(similarities) if similarities else 0.0
+        coherence_score = np.mean(similarities) if len(similarities) else 0.0
         return coherence_score
 
-    def _analyze_word_distribution(self, doc) -> float:
+    def _sentence_vectors(self, doc) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Stack the sentence vectors of a document into one unit-normalized matrix.
+        
+        Dot products of its rows reproduce Span.similarity: sentences without a
+        vector get a zero row (similarity 0), and sentences made of the same
+        tokens share an ID so they can be given similarity 1, as spaCy does.
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (n_sentences x dim) unit vectors and one ID per distinct sentence
+        """
+        sentences = list(doc.sents)
+        if not sentences:
+            return np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=np.int64)
+        
+        vectors = np.stack([sent.vector for sent in sentences]).astype(np.float32, copy=False)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+        
+        attr = getattr(doc.vocab.vectors, 'attr', ORTH)
+        keys = doc.to_array([attr]).ravel()
+        sentence_ids = token_ids([tuple(keys[sent.start:sent.end]) for sent in sentences])
+        return vectors, sentence_ids
+
+    def _analyze_word_distribution(self, doc, stats: Optional[DocStats] = None) -> float:
         """
         Analyze word frequency distribution for unusual patterns.
         Returns a score between 0 (natural distribution) and 1 (unusual distribution).
         """
-        words = [token.text.lower() for token in doc if token.is_alpha]
+        stats = stats or DocStats(doc)
+        words = stats.words
         if not words:
             return 0.0
             
         # Calculate word frequencies
-        word_freq = Counter(words)
-        frequencies = np.array(list(word_freq.values()))
+        frequencies = np.bincount(stats.word_ids)
         
         # Calculate entropy of distribution
         prob_dist = frequencies / len(words)
@@ -157,17 +208,15 @@ class TranscriptAnalyzer:
         normalized_score = 1 - min(1.0, distribution_entropy / 4)  # 4 is typical entropy for natural text
         return normalized_score
 
-    def _calculate_sentence_variance(self, doc) -> float:
+    def _calculate_sentence_variance(self, doc, stats: Optional[DocStats] = None) -> float:
         """
         Analyze variance in sentence structure and length.
         Returns a score between 0 (high variance/natural) and 1 (low variance/suspicious).
         """
-        sentences = list(doc.sents)
-        if len(sentences) < 2:
+        stats = stats or DocStats(doc)
+        lengths = stats.sentence_lengths
+        if len(lengths) < 2:
             return 0.0
-            
-        # Calculate sentence lengths
-        lengths = [len(sent) for sent in sentences]
         
         # Calculate variance in lengths
         variance = np.var(lengths)
@@ -179,25 +228,39 @@ class TranscriptAnalyzer:
         
         return variance_score
 
-    def _analyze_semantic_consistency(self, doc) -> float:
+    def _analyze_semantic_consistency(self, doc, sentence_vectors=None) -> float:
         """
         Analyze semantic consistency across the text.
         Returns a score between 0 (natural variation) and 1 (suspicious consistency).
         """
         # Split into segments
-        segments = list(doc.sents)
-        if len(segments) < 2:
+        if sentence_vectors is None:
+            sentence_vectors = self._sentence_vectors(doc)
+        vectors, sentence_ids = sentence_vectors
+        n_segments = len(vectors)
+        if n_segments < 2:
             return 0.0
             
-        # Calculate semantic similarity between all segment pairs
-        similarities = []
-        for i in range(len(segments)):
-            for j in range(i + 1, len(segments)):
-                similarity = segments[i].similarity(segments[j])
-                similarities.append(similarity)
+        # Calculate semantic similarity between all segment pairs, or a random
+        # sample of them for very long transcripts
+        if n_segments <= self.max_similarity_sentences:
+            first, second = np.triu_indices(n_segments, k=1)
+            similarities = (vectors @ vectors.T)[first, second]
+        else:
+            rng = np.random.default_rng(0)
+            first = rng.integers(n_segments, size=self.similarity_sample_pairs)
+            second = rng.integers(n_segments, size=self.similarity_sample_pairs)
+            distinct = first != second
+            first, second = first[distinct], second[distinct]
+            similarities = np.empty(len(first), dtype=np.float64)
+            for start in range(0, len(first), self.similarity_chunk_pairs):
+                chunk = slice(start, start + self.similarity_chunk_pairs)
+                similarities[chunk] = np.einsum('ij,ij->i', vectors[first[chunk]], vectors[second[chunk]])
+        similarities = similarities.astype(np.float64, copy=False)
+        similarities[sentence_ids[first] == sentence_ids[second]] = 1.0
                 
         # Calculate variance in similarities
-        variance = np.var(similarities) if similarities else 0
+        variance = np.var(similarities) if len(similarities) else 0
         
         # Normalize score (higher variance = more natural)
         consistency_score = 1 - min(1.0, variance * 2)
@@ -0,0 +1,110 @@
+from collections import Counter
+
+import numpy as np
+from typing import Dict, Optional, Sequence
+
+
+def token_ids(words: Sequence[str], vocabulary: Optional[Dict[str, int]] = None) -> np.ndarray:
+    """
+    Map words to dense integer IDs, equal words sharing an ID.
+
+    Args:
+        words: Word sequence
+        vocabulary: Mapping to extend with unseen words (a fresh one if None)
+
+    Returns:
+        np.ndarray: One int64 ID per word
+    """
+    if vocabulary is None:
+        vocabulary = {}
+    return np.fromiter(
+        (vocabulary.setdefault(word, len(vocabulary)) for word in words),
+        dtype=np.int64,
+        count=len(words),
+    )
+
+
+def moving_average_ttr(ids: np.ndarray, window_size: int = 50) -> float:
+    """
+    Mean type-token ratio over every window of window_size consecutive tokens.
+
+    Distinct types are tracked with per-ID counters that take one token in and
+    one token out per step, so the cost is linear in the transcript length.
+
+    Args:
+        ids: Token IDs from token_ids()
+        window_size: Tokens per window
+
+    Returns:
+        float: MATTR, or the plain type-token ratio if there are fewer tokens than one window
+    """
+    n_tokens = len(ids)
+    if n_tokens == 0:
+        return 0.0
+    if n_tokens < window_size:
+        return len(np.unique(ids)) / n_tokens
+
+    counts = np.bincount(ids[:window_size], minlength=int(ids.max()) + 1).tolist()
+    distinct = sum(1 for count in counts if count)
+    total_distinct = distinct
+
+    ids = ids.tolist()
+    for incoming, outgoing in zip(ids[window_size:], ids):
+        counts[outgoing] -= 1
+        if counts[outgoing] == 0:
+            distinct -= 1
+        if counts[incoming] == 0:
+            distinct += 1
+        counts[incoming] += 1
+        total_distinct += distinct
+
+    n_windows = n_tokens - window_size + 1
+    return total_distinct / (n_windows * window_size)
+
+
+def ngram_keys(ids: np.ndarray, n: int = 3) -> np.ndarray:
+    """
+    Pack every run of n consecutive token IDs into one integer key.
+
+    Keys are base-V positional hashes (V = vocabulary size) and therefore collision
+    free; if V**n would overflow int64 the n-grams are returned as rows instead.
+
+    Args:
+        ids: Token IDs from token_ids()
+        n: N-gram length
+
+    Returns:
+        np.ndarray: One key (or row) per n-gram, in text order
+    """
+    if len(ids) < n:
+        return np.zeros(0, dtype=np.int64)
+
+    windows = np.lib.stride_tricks.sliding_window_view(ids, n)
+    base = int(ids.max()) + 1
+    if base ** n >= 2 ** 63:
+        return windows
+
+    keys = np.zeros(len(windows), dtype=np.int64)
+    for column in range(n):
+        keys = keys * base + windows[:, column]
+    return keys
+
+
+def max_ngram_count(ids: np.ndarray, n: int = 3) -> int:
+    """
+    Occurrences of the most frequent n-gram, counted in one hashed pass over the packed keys.
+
+    Args:
+        ids: Token IDs from token_ids()
+        n: N-gram length
+
+    Returns:
+        int: Highest n-gram count (0 if the text is shorter than n tokens)
+    """
+    keys = ngram_keys(ids, n)
+    if not len(keys):
+        return 0
+    # Hash counting is linear, where np.unique would sort; rows (large vocabularies) count as tuples
+    counts = Counter(keys.tolist() if keys.ndim == 1 else map(tuple, keys.tolist()))
+    return max(counts.values())
+
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+import yaml
+
+from preprocessing.feature_extraction import AVAILABLE_FEATURES
+from utils.blob_store import file_digest
+from utils.file_handler import FileHandler, default_handler
+from utils.logger import default_logger as logger
+
+# Load configuration
+with open("config.yaml", "r") as file:
+    config = yaml.safe_load(file)
+
+# Bump when preprocessing or feature extraction changes output for the same settings
+CACHE_VERSION = 1
+MAX_CACHE_BYTES = int(config["cache"]["features"]["max_size_mb"] * 1024 * 1024)
+
+
+def preprocessing_settings() -> Dict:
+    """The config.yaml settings that change DSP output, folded into every cache key."""
+    return {
+        "version": CACHE_VERSION,
+        "sample_rate": config["audio"]["sample_rate"],
+        "noise_reduction": config["preprocessing"]["noise_reduction"],
+        "n_mfcc": config["preprocessing"]["mfcc"]["n_mfcc"],
+        "hop_length": config["preprocessing"]["mfcc"]["hop_length"],
+    }
+
+
+class FeatureCache:
+    """Content-addressed, size-capped LRU cache of extracted audio features."""
+
+    def __init__(self, handler: FileHandler = default_handler, max_bytes: int = MAX_CACHE_BYTES):
+        """
+        Initialize the cache under the file handler's data tree.
+
+        Args:
+            handler: FileHandler whose cache directory stores the entries
+            max_bytes: Total size above which least recently used entries are evicted
+        """
+        self.handler = handler
+        self.max_bytes = max_bytes
+        self.cache_dir = os.path.join(handler.cache_dir, "features")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def key_for(self, path: Optional[str] = None, digest: Optional[str] = None, streamed: bool = False) -> str:
+        """
+        Build the cache key for a recording.
+
+        Args:
+            path: Audio file to hash (ignored when digest is given)
+            digest: Precomputed SHA-256 of the audio bytes
+            streamed: Whether the features come from the block-wise streaming pipeline,
+                which differs slightly from the in-memory one
+
+        Returns:
+            str: Hex key combining the audio hash, pipeline and preprocessing settings
+        """
+        if digest is None:
+            digest = file_digest(path)
+        settings = json.dumps(
+            {**preprocessing_settings(), "pipeline": "streaming" if streamed else "in-memory"}, sort_keys=True
+        )
+        return hashlib.sha256(f"{digest}:{settings}".encode()).hexdigest()
+
+    def get(self, key: str, features: Iterable[str] = AVAILABLE_FEATURES) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Look up cached features, counting a hit only if every requested feature is present.
+
+        Args:
+            key: Key from key_for()
+            features: Feature names needed
+
+        Returns:
+            Optional[Dict[str, np.ndarray]]: The requested features, or None on a miss
+        """
+        wanted = set(features)
+        cached = self._load(key)
+        if cached is None or not wanted <= set(cached):
+            self._count(hit=False)
+            return None
+
+        self._count(hit=True)
+        return {name: cached[name] for name in cached if name in wanted}
+
+    def put(self, key: str, features: Dict[str, np.ndarray]):
+        """
+        Store features, merging with any already cached for the same key.
+
+        Args:
+            key: Key from key_for()
+            features: Mapping of feature name to array
+        """
+        merged = dict(self._load(key) or {})
+        merged.update(features)
+
+        # Write to a temp file and rename so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **merged)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._evict()
+
+    def get_or_compute(
+        self,
+        path: str,
+        compute: Callable[[tuple], Dict[str, np.ndarray]],
+        features: Optional[Iterable[str]] = None,
+        digest: Optional[str] = None,
+        streamed: bool = False,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Return cached features for a recording, computing and storing them on a miss.
+
+        Args:
+            path: Audio file the features belong to
+            compute: Called with the names of the features missing from the cache
+            features: Feature names needed (all of them if None)
+            digest: Precomputed SHA-256 of the audio bytes
+            streamed: Whether compute runs the streaming pipeline (see key_for)
+
+        Returns:
+            Dict[str, np.ndarray]: Mapping of feature name to array
+        """
+        features = tuple(features) if features is not None else AVAILABLE_FEATURES
+        key = self.key_for(path, digest, streamed)
+        cached = self._load(key) or {}
+        missing = tuple(name for name in features if name not in cached)
+        self._count(hit=not missing)
+        if not missing:
+            return {name: cached[name] for name in features}
+
+        # Only extract what the entry lacks; put() merges it with what's there
+        feats = compute(missing)
+        try:
+            self.put(key, feats)
+        except Exception as e:
+            logger.log_error(f"Error caching features for {path}", e)
+        return {**{name: cached[name] for name in features if name in cached}, **feats}
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size, for monitoring."""
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def _load(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        path = self._path(key)
+        try:
+            with np.load(path) as archive:
+                features = {name: archive[name] for name in archive.files}
+            # Touch the entry so eviction sees it as recently used
+            os.utime(path)
+            return features
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.log_warning(f"Discarding unreadable feature cache entry {path}: {e}")
+            self.handler.delete_file(path)
+            return None
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".npz"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+                with self._lock:
+                    self.evictions += 1
+            except FileNotFoundError:
+                pass
+
+
+# Create a default feature cache instance
+default_feature_cache = FeatureCache()
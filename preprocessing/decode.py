@@ -0,0 +1,280 @@
+import functools
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import BinaryIO, Iterator, Optional
+
+import numpy as np
+import yaml
+
+# Load configuration
+with open("config.yaml", "r") as file:
+    config = yaml.safe_load(file)
+
+SAMPLE_RATE = config["audio"]["sample_rate"]
+READ_BLOCK_SIZE = config["preprocessing"]["streaming"]["block_size"]
+
+PREVIEW_CODEC = config["audio"]["preview"]["codec"]
+PREVIEW_BITRATE = config["audio"]["preview"]["bitrate"]
+
+# Browser playback copies: ffmpeg encoder arguments, container and file extension
+PREVIEW_FORMATS = {
+    "opus": {"args": ["-c:a", "libopus", "-application", "voip"], "format": "ogg", "extension": ".ogg"},
+    "mp3": {"args": ["-c:a", "libmp3lame"], "format": "mp3", "extension": ".mp3"},
+}
+
+# Containers libsndfile reads directly; everything else (mp3, m4a, mp4, ...) is decoded by ffmpeg
+SOUNDFILE_FORMATS = {".wav", ".flac", ".ogg"}
+
+_DURATION = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+def uses_soundfile(path: str) -> bool:
+    """Whether a file is read with libsndfile rather than decoded by ffmpeg."""
+    return os.path.splitext(path)[1].lower() in SOUNDFILE_FORMATS
+
+
+@functools.lru_cache(maxsize=None)
+def ffmpeg_binary() -> str:
+    """
+    Locate ffmpeg: FFMPEG_BINARY, then ffmpeg on the PATH, then the build bundled with imageio-ffmpeg.
+
+    Returns:
+        str: Path of the executable
+    """
+    binary = os.getenv("FFMPEG_BINARY") or shutil.which("ffmpeg")
+    if binary:
+        return binary
+    try:
+        import imageio_ffmpeg
+
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception as e:
+        raise RuntimeError("ffmpeg not found: install it or the imageio-ffmpeg package") from e
+
+
+@functools.lru_cache(maxsize=None)
+def _has_soxr(binary: str) -> bool:
+    result = subprocess.run([binary, "-hide_banner", "-buildconf"], capture_output=True, text=True)
+    return "--enable-libsoxr" in result.stdout
+
+
+def _decode_command(path: str, sr: int) -> list:
+    binary = ffmpeg_binary()
+    # SoX resampling at its default precision matches librosa.load's soxr_hq, and a
+    # downmix normalized to unit gain averages the channels like librosa's to_mono
+    resample = f"aresample={sr}:rematrix_maxval=1"
+    if _has_soxr(binary):
+        resample += ":resampler=soxr"
+    return [
+        binary, "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", path,
+        "-map", "0:a:0", "-vn",
+        "-ac", "1", "-af", resample,
+        "-f", "f32le", "-acodec", "pcm_f32le", "pipe:1",
+    ]
+
+
+def decode_blocks(path: str, sr: int = SAMPLE_RATE, block_size: int = READ_BLOCK_SIZE,
+                  source: Optional[BinaryIO] = None) -> Iterator[np.ndarray]:
+    """
+    Decode any audio or video container with one ffmpeg process, straight to mono float32 PCM at sr.
+
+    Samples are streamed from ffmpeg's stdout; nothing is written to disk.
+
+    Args:
+        path: Audio or video file (only named in errors when source is given)
+        sr: Output sample rate
+        block_size: Samples per yielded block (the last may be shorter)
+        source: Binary stream to decode instead of reading path, fed to ffmpeg's stdin.
+            Only formats that don't need seeking (WAV, MP3, ...) can be read this way.
+
+    Yields:
+        np.ndarray: Successive float32 blocks
+
+    Raises:
+        RuntimeError: If ffmpeg can't decode the file
+        Exception: Whatever reading source raised, e.g. TimeoutError from a stalled upload
+    """
+    # stderr goes to a file so a chatty decoder can never fill a pipe and stall
+    with tempfile.TemporaryFile() as errors:
+        command = _decode_command("pipe:0" if source is not None else path, sr)
+        process = subprocess.Popen(command, stdin=subprocess.PIPE if source is not None else None,
+                                   stdout=subprocess.PIPE, stderr=errors)
+        feeder, failures = None, []
+        if source is not None:
+            feeder = threading.Thread(target=_feed, args=(source, process, failures), daemon=True)
+            feeder.start()
+        try:
+            while True:
+                block = np.empty(block_size, dtype=np.float32)
+                n_bytes = process.stdout.readinto(block)
+                if not n_bytes:
+                    break
+                yield block[:n_bytes // block.itemsize]
+            if feeder is not None:
+                feeder.join()
+            if failures:
+                # The source failed (e.g. an upload stalled): the audio decoded so far is incomplete
+                raise failures[0]
+            if process.wait() != 0:
+                errors.seek(0)
+                message = errors.read().decode(errors="replace").strip()
+                raise RuntimeError(f"ffmpeg couldn't decode {path}: {message}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+
+
+def _feed(source: BinaryIO, process: subprocess.Popen, failures: list):
+    # Runs on its own thread, so a source that blocks for more data never stalls reading ffmpeg's output
+    pipe = process.stdin
+    try:
+        while True:
+            data = source.read(1 << 20)
+            if not data:
+                break
+            pipe.write(data)
+    except (BrokenPipeError, ValueError):
+        # ffmpeg exited (or was killed) before taking everything
+        pass
+    except Exception as e:
+        # Kept for decode_blocks to raise; ffmpeg is killed so it doesn't finish on truncated input
+        failures.append(e)
+        process.kill()
+    finally:
+        try:
+            pipe.close()
+        except BrokenPipeError:
+            pass
+
+
+def decode_audio(path: str, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode a whole file with ffmpeg into memory.
+
+    Args:
+        path: Audio or video file
+        sr: Output sample rate
+
+    Returns:
+        np.ndarray: Mono float32 samples at sr
+    """
+    blocks = list(decode_blocks(path, sr, block_size=max(READ_BLOCK_SIZE, 16 * sr)))
+    return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+
+
+def load_audio(path: str, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Load a recording as mono float32 at sr in a single decode.
+
+    WAV, FLAC and Ogg files are read by libsndfile and resampled like
+    librosa.load; other containers, including mp3, m4a and mp4, go through
+    one ffmpeg pass with no intermediate files.
+
+    Args:
+        path: Audio or video file
+        sr: Output sample rate
+
+    Returns:
+        np.ndarray: Mono float32 samples at sr
+    """
+    if uses_soundfile(path):
+        import librosa
+
+        return librosa.load(path, sr=sr)[0]
+    return decode_audio(path, sr)
+
+
+def ffmpeg_duration(path: str) -> Optional[float]:
+    """Duration in seconds reported by ffmpeg for a container, or None if unknown."""
+    result = subprocess.run(
+        [ffmpeg_binary(), "-nostdin", "-hide_banner", "-i", path], capture_output=True, text=True
+    )
+    match = _DURATION.search(result.stderr)
+    if match is None:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def extract_audio(src: str, dest: str, sr: int = SAMPLE_RATE) -> str:
+    """
+    Write a video's (or any container's) first audio track as a compact 16-bit mono WAV at sr.
+
+    One ffmpeg process demuxes only the audio stream, so video frames are
+    never decoded, and resamples and downmixes it on the way out. The file
+    appears at dest only once it is complete.
+
+    Args:
+        src: Video or audio file
+        dest: WAV file to write
+        sr: Output sample rate
+
+    Returns:
+        str: dest
+
+    Raises:
+        RuntimeError: If ffmpeg can't read an audio track from src
+    """
+    # Same decode as load_audio, encoded as 16-bit PCM instead of piped as float
+    command = _decode_command(src, sr)[:-5] + ["-f", "wav", "-acodec", "pcm_s16le"]
+    return _write_with_ffmpeg(command, src, dest)
+
+
+def encode_preview(src: str, dest: str, codec: str = PREVIEW_CODEC, bitrate: str = PREVIEW_BITRATE) -> str:
+    """
+    Encode a small mono copy of a recording for playback in the browser.
+
+    Args:
+        src: Audio or video file
+        dest: File to write, with the extension from PREVIEW_FORMATS
+        codec: Key of PREVIEW_FORMATS
+        bitrate: Target bitrate, e.g. "32k"
+
+    Returns:
+        str: dest
+
+    Raises:
+        RuntimeError: If ffmpeg can't encode the file
+    """
+    command = [
+        ffmpeg_binary(), "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", src, "-map", "0:a:0", "-vn", "-ac", "1",
+        *PREVIEW_FORMATS[codec]["args"], "-b:a", bitrate, "-f", PREVIEW_FORMATS[codec]["format"],
+    ]
+    return _write_with_ffmpeg(command, src, dest)
+
+
+def _write_with_ffmpeg(command: list, src: str, dest: str) -> str:
+    # Written under a temporary name so a half-finished file is never served or analyzed, unique so
+    # that two jobs writing the same file (e.g. previews of one blob) can't clobber each other's output
+    fd, partial = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(dest)), prefix=f"{os.path.basename(dest)}.", suffix=".part"
+    )
+    os.close(fd)
+    result = subprocess.run(command + ["-y", partial], stdin=subprocess.DEVNULL, capture_output=True)
+    if result.returncode != 0:
+        if os.path.exists(partial):
+            os.remove(partial)
+        message = result.stderr.decode(errors="replace").strip()
+        raise RuntimeError(f"ffmpeg couldn't convert {src}: {message}")
+    os.replace(partial, dest)
+    return dest
+
+
+def audio_duration(path: str) -> Optional[float]:
+    """Length of a recording in seconds, read from its header by libsndfile or ffmpeg; None if unknown."""
+    try:
+        if uses_soundfile(path):
+            import soundfile as sf
+
+            return sf.info(path).duration
+        return ffmpeg_duration(path)
+    except Exception:
+        return None
@@ -8,6 +8,82 @@ with open("config.yaml", "r") as file:
 
 N_MFCC = config["preprocessing"]["mfcc"]["n_mfcc"]
 HOP_LENGTH = config["preprocessing"]["mfcc"]["hop_length"]
+N_FFT = 2048
+TOP_DB = 80.0
+
+# Every feature the engine can derive from the shared spectrogram
+AVAILABLE_FEATURES = ("mfccs", "spectral_centroid", "spectral_bandwidth", "spectral_rolloff")
+
+
+class FeatureEngine:
+    """Derives all audio features from one magnitude spectrogram per signal."""
+
+    def __init__(self, sr, n_mfcc=N_MFCC, hop_length=HOP_LENGTH, n_fft=N_FFT):
+        self.sr = sr
+        self.n_mfcc = n_mfcc
+        self.hop_length = hop_length
+        self.n_fft = n_fft
+
+    def spectrogram(self, y):
+        """Computes the float32 magnitude STFT shared by every feature."""
+        y = np.asarray(y, dtype=np.float32)
+        S = np.abs(librosa.stft(y, n_fft=self.n_fft, hop_length=self.hop_length))
+        return S.astype(np.float32, copy=False)
+
+    def log_mel(self, S):
+        """Computes the unclipped log-power mel spectrogram the MFCCs are based on."""
+        mel = librosa.feature.melspectrogram(S=S ** 2, sr=self.sr, n_fft=self.n_fft)
+        return librosa.power_to_db(mel, top_db=None)
+
+    def from_spectrogram(self, S, features=None, db_max=None):
+        """
+        Derives the requested features from a magnitude spectrogram.
+
+        The log-mel floor sits TOP_DB below the loudest bin, as in librosa's
+        power_to_db. Block-wise callers pass the loudest level of the whole
+        signal as db_max so every block is clipped against the same floor.
+        """
+        features = self._resolve(features)
+        results = {}
+
+        if "mfccs" in features:
+            log_mel = self.log_mel(S)
+            if db_max is None:
+                db_max = log_mel.max()
+            results["mfccs"] = librosa.feature.mfcc(
+                S=np.maximum(log_mel, db_max - TOP_DB), sr=self.sr, n_mfcc=self.n_mfcc
+            )
+
+        centroid = None
+        if "spectral_centroid" in features or "spectral_bandwidth" in features:
+            centroid = librosa.feature.spectral_centroid(S=S, sr=self.sr, n_fft=self.n_fft)
+            if "spectral_centroid" in features:
+                results["spectral_centroid"] = centroid
+
+        if "spectral_bandwidth" in features:
+            results["spectral_bandwidth"] = librosa.feature.spectral_bandwidth(
+                S=S, sr=self.sr, n_fft=self.n_fft, centroid=centroid
+            )
+
+        if "spectral_rolloff" in features:
+            results["spectral_rolloff"] = librosa.feature.spectral_rolloff(
+                S=S, sr=self.sr, n_fft=self.n_fft
+            )
+
+        return {name: results[name].astype(np.float32, copy=False) for name in features}
+
+    def extract(self, y, features=None):
+        """Computes the spectrogram once and derives the requested features from it."""
+        return self.from_spectrogram(self.spectrogram(y), features)
+
+    @staticmethod
+    def _resolve(features):
+        if features is None:
+            return AVAILABLE_FEATURES
+        unknown = set(features) - set(AVAILABLE_FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown features requested: {sorted(unknown)}")
+        return tuple(name for name in AVAILABLE_FEATURES if name in features)
 
 
 def extract_mfcc(y, sr):
@@ -24,16 +100,9 @@ def extract_spectral_features(y, sr):
     return spectral_centroid, spectral_bandwidth, spectral_rolloff
 
 
-def extract_features(y, sr):
-    """Extracts all relevant audio features for analysis."""
-    mfccs = extract_mfcc(y, sr)
-    spectral_centroid, spectral_bandwidth, spectral_rolloff = extract_spectral_features(y, sr)
-    return {
-        "mfccs": mfccs,
-        "spectral_centroid": spectral_centroid,
-        "spectral_bandwidth": spectral_bandwidth,
-        "spectral_rolloff": spectral_rolloff,
-    }
+def extract_features(y, sr, features=None):
+    """Extracts audio features for analysis, all of them unless a subset is requested."""
+    return FeatureEngine(sr).extract(y, features)
 
 if __name__ == "__main__":
     sample_audio_path = "./data/input_audio/sample.wav"
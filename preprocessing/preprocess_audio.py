@@ -1,10 +1,10 @@
 import os
-import librosa
 import numpy as np
 import yaml
 import noisereduce as nr
 import soundfile as sf
-from pydub import AudioSegment
+
+from preprocessing.decode import load_audio
 
 # Load configuration
 with open("config.yaml", "r") as file:
@@ -23,13 +23,9 @@ def load_and_preprocess(audio_input):
     """Load audio, apply noise reduction, segment silence, and extract MFCCs."""
     
     if isinstance(audio_input, str):  # If it's a file path
-        if not audio_input.endswith(".wav"):
-            audio = AudioSegment.from_file(audio_input)
-            audio_input = audio_input.replace(os.path.splitext(audio_input)[-1], ".wav")
-            audio.export(audio_input, format="wav")
-        
-        # Load audio file
-        y, sr = librosa.load(audio_input, sr=SAMPLE_RATE)
+        # One decode straight to mono SAMPLE_RATE, whatever the container
+        y = load_audio(audio_input, SAMPLE_RATE)
+        sr = SAMPLE_RATE
 
     elif isinstance(audio_input, np.ndarray):  # If raw NumPy array is passed
         y = audio_input
@@ -45,9 +41,14 @@ def load_and_preprocess(audio_input):
 
 
 if __name__ == "__main__":
+    from preprocessing.vad import apply_vad
+    from preprocessing.feature_extraction import extract_features
+
+    # For parallel, resumable batch runs use `python main.py --input INPUT_DIR`
     for filename in os.listdir(INPUT_DIR):
         if filename.endswith(".wav") or filename.endswith(".mp3"):
             file_path = os.path.join(INPUT_DIR, filename)
-            processed_audio, mfccs = load_and_preprocess(file_path)
+            processed_audio, sr = load_and_preprocess(file_path)
+            mfccs = extract_features(apply_vad(processed_audio), sr, ("mfccs",))["mfccs"]
             np.save(os.path.join(OUTPUT_DIR, f"{os.path.splitext(filename)[0]}_mfcc.npy"), mfccs)
             print(f"Processed: {filename}")
@@ -0,0 +1,301 @@
+import math
+import os
+import tempfile
+
+import librosa
+import noisereduce as nr
+import numpy as np
+import soundfile as sf
+import soxr
+import yaml
+
+from preprocessing.decode import audio_duration, decode_blocks, uses_soundfile
+from preprocessing.feature_extraction import FeatureEngine, HOP_LENGTH, N_FFT
+
+# Load configuration
+with open("config.yaml", "r") as file:
+    config = yaml.safe_load(file)
+
+SAMPLE_RATE = config["audio"]["sample_rate"]
+STREAM_MIN_DURATION = config["preprocessing"]["streaming"]["min_duration"]
+READ_BLOCK_SIZE = config["preprocessing"]["streaming"]["block_size"]
+
+# noisereduce filters long signals in chunks padded with their neighbours;
+# denoising block by block with the same geometry reproduces its output.
+NR_CHUNK_SIZE = 600000
+NR_PADDING = 30000
+
+# librosa.effects.split defaults used by apply_vad
+VAD_FRAME_LENGTH = 2048
+VAD_HOP_LENGTH = 512
+AMIN = 1e-5
+
+
+class _Framer:
+    """Cuts a sample stream into overlapping frames, centred like librosa's center=True."""
+
+    def __init__(self, frame_length, hop_length):
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self._buffer = np.zeros(frame_length // 2, dtype=np.float32)
+
+    def push(self, samples):
+        """Adds samples and returns the span holding every frame now complete."""
+        self._buffer = np.concatenate([self._buffer, np.asarray(samples, dtype=np.float32)])
+        if len(self._buffer) < self.frame_length:
+            return self._buffer[:0]
+
+        n_frames = 1 + (len(self._buffer) - self.frame_length) // self.hop_length
+        span = self._buffer[: (n_frames - 1) * self.hop_length + self.frame_length]
+        self._buffer = self._buffer[n_frames * self.hop_length:]
+        return span
+
+    def finish(self):
+        """Pads the end of the stream and returns the remaining frames."""
+        return self.push(np.zeros(self.frame_length // 2, dtype=np.float32))
+
+    def frames(self, blocks):
+        """Yields the non-empty framed spans of a whole block stream."""
+        for block in blocks:
+            span = self.push(block)
+            if len(span):
+                yield span
+        span = self.finish()
+        if len(span):
+            yield span
+
+
+def _rechunk(blocks, size):
+    """Regroups a stream of arrays into arrays of exactly `size` samples (the last may be shorter)."""
+    pending = []
+    pending_len = 0
+    for block in blocks:
+        pending.append(block)
+        pending_len += len(block)
+        if pending_len < size:
+            continue
+        joined = np.concatenate(pending)
+        n_full = len(joined) // size
+        for i in range(n_full):
+            yield joined[i * size:(i + 1) * size]
+        rest = joined[n_full * size:]
+        pending, pending_len = [rest], len(rest)
+    if pending_len:
+        yield np.concatenate(pending)
+
+
+def read_blocks(path, sr=SAMPLE_RATE, block_size=READ_BLOCK_SIZE):
+    """Reads an audio file block by block as mono float32 at `sr`."""
+    if not uses_soundfile(path):
+        yield from decode_blocks(path, sr, block_size)
+        return
+
+    info = sf.info(path)
+    resampler = None
+    if info.samplerate != sr:
+        resampler = soxr.ResampleStream(info.samplerate, sr, 1, dtype="float32", quality="HQ")
+
+    total_in = 0
+    total_out = 0
+    for block in sf.blocks(path, blocksize=block_size, dtype="float32", always_2d=True):
+        block = block.mean(axis=1, dtype=np.float32)
+        total_in += len(block)
+        if resampler is not None:
+            block = resampler.resample_chunk(block)
+        total_out += len(block)
+        if len(block):
+            yield block
+
+    if resampler is not None:
+        # Match librosa.load's fixed output length of ceil(n * sr_out / sr_in)
+        tail = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+        expected = math.ceil(total_in * sr / info.samplerate)
+        missing = expected - total_out
+        tail = tail[:max(missing, 0)]
+        if len(tail) < missing:
+            tail = np.concatenate([tail, np.zeros(missing - len(tail), dtype=np.float32)])
+        if len(tail):
+            yield tail
+
+
+def denoise_blocks(blocks, sr=SAMPLE_RATE, chunk_size=NR_CHUNK_SIZE, padding=NR_PADDING):
+    """Applies noise reduction block by block, holding only one chunk plus padding in memory."""
+    chunks = _rechunk(blocks, chunk_size)
+    previous_tail = np.zeros(padding, dtype=np.float32)
+    current = next(chunks, None)
+    first = True
+    while current is not None:
+        following = next(chunks, None)
+        ahead = following[:padding] if following is not None else current[:0]
+        # Like noisereduce, a short final chunk of a multi-chunk signal is
+        # zero-filled to the full chunk length before filtering.
+        fill = 0 if first else chunk_size - len(current)
+        ahead = np.concatenate([ahead, np.zeros(fill + padding - len(ahead), dtype=np.float32)])
+
+        padded = np.concatenate([previous_tail, current, ahead])
+        filtered = nr.reduce_noise(y=padded, sr=sr, chunk_size=len(padded), padding=0)
+        yield filtered[padding:padding + len(current)].astype(np.float32, copy=False)
+
+        previous_tail = np.concatenate([previous_tail, current])[-padding:]
+        current = following
+        first = False
+
+
+def _voiced_intervals(rms, n_samples, top_db=20, hop_length=VAD_HOP_LENGTH):
+    """Converts per-frame RMS into sample intervals exactly as librosa.effects.split does."""
+    if not len(rms):
+        return np.zeros((0, 2), dtype=int)
+    ref_db = 20.0 * np.log10(max(AMIN, float(rms.max())))
+    non_silent = 20.0 * np.log10(np.maximum(AMIN, rms)) - ref_db > -top_db
+
+    edges = [np.flatnonzero(np.diff(non_silent.astype(int))) + 1]
+    if non_silent[0]:
+        edges.insert(0, np.array([0]))
+    if non_silent[-1]:
+        edges.append(np.array([len(non_silent)]))
+    edges = librosa.frames_to_samples(np.concatenate(edges), hop_length=hop_length)
+    return np.minimum(edges, n_samples).reshape((-1, 2))
+
+
+def _select_intervals(block, offset, intervals):
+    """Returns the parts of a block at `offset` that fall inside the voiced intervals."""
+    end = offset + len(block)
+    pieces = [
+        block[max(start, offset) - offset:min(stop, end) - offset]
+        for start, stop in intervals
+        if start < end and stop > offset
+    ]
+    return np.concatenate(pieces) if pieces else block[:0]
+
+
+def _rms_frames(span):
+    return librosa.feature.rms(
+        y=span, frame_length=VAD_FRAME_LENGTH, hop_length=VAD_HOP_LENGTH, center=False
+    )[0]
+
+
+def _spool_denoised(path, spool, sr, top_db, block_size, blocks=None):
+    """
+    Writes the noise-reduced signal to `spool` while measuring VAD frame levels.
+
+    The VAD threshold is relative to the loudest frame of the whole recording,
+    so voiced intervals can only be decided once everything has been read.
+    Only per-frame RMS values (one float per hop) are kept in memory.
+
+    Returns:
+        tuple: (voiced sample intervals, total samples written)
+    """
+    if blocks is None:
+        blocks = read_blocks(path, sr, block_size)
+    if config["preprocessing"]["noise_reduction"]:
+        blocks = denoise_blocks(blocks, sr)
+
+    n_samples = 0
+
+    def spool_blocks():
+        nonlocal n_samples
+        for block in blocks:
+            block.astype(np.float32, copy=False).tofile(spool)
+            n_samples += len(block)
+            yield block
+
+    framer = _Framer(VAD_FRAME_LENGTH, VAD_HOP_LENGTH)
+    rms = [_rms_frames(span) for span in framer.frames(spool_blocks())]
+    rms = np.concatenate(rms) if rms else np.zeros(0, dtype=np.float32)
+    return _voiced_intervals(rms, n_samples, top_db), n_samples
+
+
+def _replay_voiced(spool_path, intervals, n_samples, block_size):
+    """Reads the spooled signal back block by block, keeping only voiced samples."""
+    offset = 0
+    with open(spool_path, "rb") as spool:
+        while offset < n_samples:
+            block = np.fromfile(spool, dtype=np.float32, count=block_size)
+            voiced = _select_intervals(block, offset, intervals)
+            offset += len(block)
+            if len(voiced):
+                yield voiced
+
+
+class _DenoisedSpool:
+    """Temporary on-disk copy of the denoised signal plus its voiced intervals."""
+
+    def __init__(self, path, sr, top_db, block_size, blocks=None):
+        self.block_size = block_size
+        fd, self.spool_path = tempfile.mkstemp(suffix=".f32")
+        try:
+            with os.fdopen(fd, "wb") as spool:
+                self.intervals, self.n_samples = _spool_denoised(path, spool, sr, top_db, block_size, blocks)
+        except Exception:
+            self.close()
+            raise
+
+    def voiced_blocks(self):
+        return _replay_voiced(self.spool_path, self.intervals, self.n_samples, self.block_size)
+
+    def close(self):
+        if os.path.exists(self.spool_path):
+            os.remove(self.spool_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def stream_preprocess(path, sr=SAMPLE_RATE, top_db=20, block_size=READ_BLOCK_SIZE):
+    """
+    Streaming counterpart of load_and_preprocess followed by apply_vad.
+
+    Yields the voiced, noise-reduced signal block by block. The denoised audio
+    is spooled to a temporary file so memory stays bounded by the block size.
+    """
+    with _DenoisedSpool(path, sr, top_db, block_size) as spool:
+        yield from spool.voiced_blocks()
+
+
+def _spectrogram_blocks(blocks):
+    """Yields magnitude STFT columns of a sample stream, framed exactly like librosa.stft."""
+    framer = _Framer(N_FFT, HOP_LENGTH)
+    for span in framer.frames(blocks):
+        S = np.abs(librosa.stft(span, n_fft=N_FFT, hop_length=HOP_LENGTH, center=False))
+        yield S.astype(np.float32, copy=False)
+
+
+def stream_features(path, sr=SAMPLE_RATE, features=None, top_db=20, block_size=READ_BLOCK_SIZE, blocks=None):
+    """
+    Streaming counterpart of load_and_preprocess -> apply_vad -> extract_features.
+
+    Features are computed block by block from a running STFT, so peak memory
+    is bounded by the block size rather than the recording length. MFCCs are
+    clipped relative to the loudest mel bin of the whole signal, which takes
+    one extra STFT pass over the spooled audio to find.
+
+    `blocks`, if given, supplies the samples (mono float32 at `sr`) in place
+    of reading `path`, e.g. decode_blocks over an upload still in progress.
+    """
+    engine = FeatureEngine(sr)
+    with _DenoisedSpool(path, sr, top_db, block_size, blocks) as spool:
+        if not len(spool.intervals):
+            raise ValueError(f"No voiced audio found in {path}")
+
+        db_max = None
+        if features is None or "mfccs" in features:
+            db_max = max(
+                float(engine.log_mel(S).max()) for S in _spectrogram_blocks(spool.voiced_blocks())
+            )
+
+        parts = [
+            engine.from_spectrogram(S, features, db_max=db_max)
+            for S in _spectrogram_blocks(spool.voiced_blocks())
+        ]
+
+    return {name: np.concatenate([part[name] for part in parts], axis=-1) for name in parts[0]}
+
+
+def should_stream(path):
+    """Whether a recording is long enough to be processed block by block."""
+    duration = audio_duration(path)
+    # Files that can't be probed go through the in-memory path
+    return duration is not None and duration >= STREAM_MIN_DURATION
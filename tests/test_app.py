@@ -0,0 +1,315 @@
+import io
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+import interface.app as app_module
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Test client on a fresh database and upload folder, logged in as alice."""
+    overrides = {
+        "TESTING": True,
+        "DATABASE_PATH": str(tmp_path / "app.db"),
+        "UPLOAD_FOLDER": str(tmp_path / "uploads"),
+        "USE_X_ACCEL_REDIRECT": False,
+        "PREPROCESS_EARLY": False,
+    }
+    saved = {key: app_module.app.config.get(key) for key in overrides}
+    app_module.app.config.update(overrides)
+    app_module._store = None
+    client = app_module.app.test_client()
+    client.post("/register", data={"username": "alice", "password": "pw"})
+    client.post("/login", data={"username": "alice", "password": "pw"})
+    yield client
+    app_module.app.config.update(saved)
+    app_module._store = None
+
+
+def add_recording(tmp_path, seconds=2.0):
+    path = tmp_path / "uploads" / "answer.wav"
+    path.parent.mkdir(exist_ok=True)
+    sr = 16000
+    sf.write(str(path), 0.1 * np.sin(2 * np.pi * 220 * np.arange(int(sr * seconds)) / sr), sr)
+    store = app_module.get_store()
+    user_id = store.authenticate("alice", "pw")["id"]
+    return store.add_recording(user_id, path.name, str(path)), path
+
+
+def test_audio_supports_ranges_and_conditional_requests(client, tmp_path):
+    """Players can seek with byte ranges and revalidate with ETag or Last-Modified."""
+    recording, path = add_recording(tmp_path)
+    url = f"/audio/{recording['id']}"
+
+    full = client.get(url)
+    assert full.status_code == 200
+    assert full.mimetype == "audio/wav"
+    assert full.headers["Accept-Ranges"] == "bytes"
+    assert "private" in full.headers["Cache-Control"]
+    assert full.data == path.read_bytes()
+
+    partial = client.get(url, headers={"Range": "bytes=100-199"})
+    assert partial.status_code == 206
+    assert partial.headers["Content-Range"] == f"bytes 100-199/{path.stat().st_size}"
+    assert partial.data == path.read_bytes()[100:200]
+
+    assert client.get(url, headers={"If-None-Match": full.headers["ETag"]}).status_code == 304
+    assert client.get(url, headers={"If-Modified-Since": full.headers["Last-Modified"]}).status_code == 304
+
+
+def test_preview_is_encoded_and_served(client, tmp_path):
+    """The compressed preview is much smaller than the WAV and served as Ogg Opus."""
+    from preprocessing.decode import ffmpeg_duration
+
+    recording, path = add_recording(tmp_path, seconds=10.0)
+    assert client.get(f"/audio/{recording['id']}/preview").status_code == 404
+
+    app_module.run_preview_job(recording["id"], str(path))
+    recording = app_module.get_store().get_recording(recording["user_id"], recording["id"])
+    assert recording["preview_path"].endswith(".preview.ogg")
+    assert abs(ffmpeg_duration(recording["preview_path"]) - 10.0) < 0.1
+
+    preview = client.get(f"/audio/{recording['id']}/preview")
+    assert preview.status_code == 200
+    assert preview.mimetype == "audio/ogg"
+    assert len(preview.data) < path.stat().st_size / 5
+    assert 'type="audio/ogg"' in client.get("/dashboard").get_data(as_text=True)
+
+
+def test_nginx_sends_audio_with_x_accel_redirect(client, tmp_path):
+    """With USE_X_ACCEL_REDIRECT the app checks ownership and leaves the transfer to nginx."""
+    recording, _ = add_recording(tmp_path)
+    app_module.app.config["USE_X_ACCEL_REDIRECT"] = True
+
+    response = client.get(f"/audio/{recording['id']}")
+    assert response.status_code == 200
+    assert response.headers["X-Accel-Redirect"] == "/protected-uploads/answer.wav"
+    assert response.mimetype == "audio/wav"
+    assert response.data == b""
+
+    client.get("/logout")
+    assert client.get(f"/audio/{recording['id']}").status_code == 401
+
+
+class _Disconnect(io.BytesIO):
+    """Request body whose client goes away after `limit` bytes."""
+
+    def __init__(self, data, limit):
+        super().__init__(data)
+        self.limit = limit
+
+    def readinto(self, buffer):
+        if self.tell() >= self.limit:
+            raise OSError("client disconnected")
+        return super().readinto(memoryview(buffer)[:self.limit - self.tell()])
+
+
+def test_resumable_upload_survives_interruptions(client, tmp_path):
+    """Chunks land on disk as they arrive; a dropped or out-of-order chunk resumes from the stored offset."""
+    import base64
+    import hashlib
+    from interface import uploads
+
+    data = (tmp_path / "source.wav")
+    sf.write(str(data), 0.1 * np.sin(np.arange(16000 * 3) / 10), 16000)
+    data = data.read_bytes()
+    tus = {"Tus-Resumable": "1.0.0"}
+    patch = {**tus, "Content-Type": "application/offset+octet-stream"}
+
+    assert client.options("/uploads").headers["Tus-Extension"] == "creation"
+    created = client.post("/uploads", headers={
+        **tus, "Upload-Length": str(len(data)),
+        "Upload-Metadata": "filename " + base64.b64encode(b"answer.wav").decode(),
+    })
+    assert created.status_code == 201
+    url = created.headers["Location"]
+
+    assert client.patch(url, data=data[:40000], headers={**patch, "Upload-Offset": "0"}).status_code == 204
+    # The connection drops partway through the next chunk; what arrived is kept
+    response = client.patch(url, input_stream=_Disconnect(data[40000:], 10000),
+                            headers={**patch, "Upload-Offset": "40000", "Content-Length": str(len(data) - 40000)})
+    assert response.headers["Upload-Offset"] == "50000"
+    assert client.head(url).headers["Upload-Offset"] == "50000"
+    assert client.patch(url, data=data[40000:], headers={**patch, "Upload-Offset": "40000"}).status_code == 409
+    assert client.patch(url, data=data[50000:], headers=patch).status_code == 400
+
+    # The rest goes to "another worker", which rebuilds the running hash from disk
+    uploads._hashers.clear()
+    done = client.patch(url, data=data[50000:], headers={**patch, "Upload-Offset": "50000"})
+    assert done.status_code == 204 and done.headers["Upload-Offset"] == str(len(data))
+
+    store = app_module.get_store()
+    recording = store.get_recording(store.authenticate("alice", "pw")["id"], int(done.headers["X-Recording-Id"]))
+    assert recording["sha256"] == hashlib.sha256(data).hexdigest()
+    assert open(recording["path"], "rb").read() == data
+    # Stored under a name of its own, so another user's answer.wav can't replace it
+    assert recording["filename"] == "answer.wav" and not recording["path"].endswith("answer.wav")
+    assert abs(recording["duration"] - 3.0) < 1e-6
+    assert client.head(url).headers["X-Recording-Id"] == str(recording["id"])
+    assert client.patch(url, data=b"x", headers={**patch, "Upload-Offset": str(len(data))}).status_code == 413
+
+    bad = client.post("/uploads", headers={**tus, "Upload-Length": "10",
+                                           "Upload-Metadata": "filename " + base64.b64encode(b"a.exe").decode()})
+    assert bad.status_code == 400
+
+
+def test_abandoned_uploads_drop_their_running_hash(tmp_path, monkeypatch):
+    """Hashers of uploads nobody resumes are evicted; resuming later rehashes what's on disk."""
+    import hashlib
+    from interface import uploads
+
+    monkeypatch.setattr(uploads, "_hashers", {})
+    data = bytes(range(256)) * 100
+    for upload_id in ("abandoned", "active"):
+        with open(tmp_path / upload_id, "w+b") as f:
+            uploads.write_chunk(f, upload_id, 0, len(data), io.BytesIO(data[:1000]))
+    assert set(uploads._hashers) == {"abandoned", "active"}
+
+    monkeypatch.setattr(uploads, "HASHER_TTL", 0.0)
+    time.sleep(0.01)
+    with open(tmp_path / "active", "r+b") as f:
+        uploads.write_chunk(f, "active", 1000, len(data), io.BytesIO(data[1000:2000]))
+    assert set(uploads._hashers) == {"active"}
+
+    with open(tmp_path / "abandoned", "r+b") as f:
+        _, digest = uploads.write_chunk(f, "abandoned", 1000, len(data), io.BytesIO(data[1000:]))
+    assert digest == hashlib.sha256(data).hexdigest()
+
+
+def test_upload_that_cant_be_processed_is_ended(client, tmp_path):
+    """A complete upload that fails to become a recording reports the failure and leaves no file behind."""
+    import base64
+    import os
+
+    data = b"not really a video" * 100
+    tus = {"Tus-Resumable": "1.0.0"}
+    patch = {**tus, "Content-Type": "application/offset+octet-stream"}
+    url = client.post("/uploads", headers={
+        **tus, "Upload-Length": str(len(data)),
+        "Upload-Metadata": "filename " + base64.b64encode(b"clip.mp4").decode(),
+    }).headers["Location"]
+
+    assert client.patch(url, data=data, headers={**patch, "Upload-Offset": "0"}).status_code == 422
+    head = client.head(url)
+    assert head.status_code == 410 and "X-Recording-Id" not in head.headers
+    assert client.patch(url, data=b"", headers={**patch, "Upload-Offset": str(len(data))}).status_code == 410
+    assert os.listdir(tmp_path / "uploads" / "incoming") == []
+    assert app_module.get_store().count_recordings(app_module.get_store().authenticate("alice", "pw")["id"]) == 0
+
+
+def test_features_extracted_while_upload_arrives(tmp_path):
+    """Early preprocessing follows the partial file and caches features under the finished file's hash."""
+    import hashlib
+    import threading
+    from detection.pipeline import extract_audio_features
+    from interface.uploads import may_stream, preprocess_upload
+    from preprocessing.cache import FeatureCache
+    from preprocessing.streaming import stream_features
+    from utils.file_handler import FileHandler
+
+    sr = 16000
+    t = np.arange(sr * 4) / sr
+    y = (0.3 * np.sin(2 * np.pi * 180 * t) * (np.sin(2 * np.pi * 0.5 * t) > 0)).astype(np.float32)
+    source = tmp_path / "source.wav"
+    sf.write(str(source), y, sr)
+    data = source.read_bytes()
+
+    partial = tmp_path / "partial"
+    partial.write_bytes(b"")
+
+    def arrive():
+        with open(partial, "ab") as f:
+            for start in range(0, len(data), 8192):
+                f.write(data[start:start + 8192])
+                f.flush()
+                time.sleep(0.002)
+
+    writer = threading.Thread(target=arrive)
+    writer.start()
+    cache = FeatureCache(FileHandler(str(tmp_path / "data")))
+    result = preprocess_upload(open(partial, "rb"), str(partial), len(data), cache=cache)
+    writer.join()
+
+    assert result["sha256"] == hashlib.sha256(data).hexdigest()
+    cached = cache.get(cache.key_for(digest=result["sha256"], streamed=True), ("mfccs",))
+    expected = stream_features(str(source), features=("mfccs",))
+    np.testing.assert_allclose(cached["mfccs"], expected["mfccs"], rtol=1e-4, atol=1e-3)
+
+    # Too short to stream: analysis runs the in-memory pipeline rather than reuse streamed features
+    assert not may_stream(len(data))
+    extract_audio_features(str(source), ("mfccs",), cache=cache)
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_stalled_upload_fails_preprocessing_once(tmp_path):
+    """When the upload stops arriving, feature extraction fails after one idle timeout instead of using partial audio."""
+    from interface.uploads import GrowingFile
+    from preprocessing.decode import decode_blocks
+    from preprocessing.streaming import stream_features
+
+    source = tmp_path / "source.wav"
+    sf.write(str(source), 0.1 * np.sin(np.arange(16000 * 4) / 10), 16000)
+    data = source.read_bytes()
+    partial = tmp_path / "partial"
+    partial.write_bytes(data[:len(data) // 2])
+
+    with open(partial, "rb") as f:
+        reader = GrowingFile(f, len(data), idle_timeout=0.3, poll_interval=0.01)
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            stream_features(str(partial), blocks=decode_blocks(str(partial), source=reader))
+    assert time.monotonic() - started < 0.3 + 2.0
+
+
+def test_duplicate_uploads_share_one_blob_and_analysis(client, tmp_path):
+    """Uploading the same audio again stores no new file, reuses the score, and the blob lives until its last recording goes."""
+    import os
+    from utils.blob_store import file_digest
+
+    source = tmp_path / "source.wav"
+    sf.write(str(source), 0.1 * np.sin(np.arange(16000 * 2) / 10), 16000)
+
+    def upload(name):
+        with open(source, "rb") as f:
+            client.post("/upload", data={"file": (f, name)}, content_type="multipart/form-data")
+        return store.list_recordings(user_id, descending=True)[0]
+
+    store = app_module.get_store()
+    user_id = store.authenticate("alice", "pw")["id"]
+    first = upload("take1.wav")
+    assert first["path"].endswith(file_digest(str(source)) + ".wav")
+    store.add_score(first["id"], 0.8, "the transcript")
+
+    second = upload("take2.wav")
+    assert second["filename"] == "take2.wav"
+    assert second["path"] == first["path"]
+    assert (second["status"], second["ai_score"]) == ("analyzed", 0.8)
+    assert store.get_transcript(user_id, second["id"]) == "the transcript"
+    assert store.get_blob(second["sha256"])["refcount"] == 2
+    blobs = os.path.join(app_module.app.config["UPLOAD_FOLDER"], "blobs")
+    assert [name for name in os.listdir(blobs) if name.endswith(".wav")] == [os.path.basename(first["path"])]
+
+    client.post(f"/recordings/{first['id']}/delete")
+    assert os.path.exists(second["path"])
+    assert store.get_blob(second["sha256"])["refcount"] == 1
+    # Another user can't delete it
+    client.get("/logout")
+    client.post("/register", data={"username": "mallory", "password": "pw"})
+    client.post("/login", data={"username": "mallory", "password": "pw"})
+    client.post(f"/recordings/{second['id']}/delete")
+    assert os.path.exists(second["path"])
+
+    client.get("/logout")
+    client.post("/login", data={"username": "alice", "password": "pw"})
+    # Not while it is being analyzed
+    store.set_recording_status(second["id"], "running")
+    client.post(f"/recordings/{second['id']}/delete")
+    assert store.get_recording(user_id, second["id"]) is not None
+    store.set_recording_status(second["id"], "failed", "stopped")
+    client.post(f"/recordings/{second['id']}/delete")
+    assert not os.path.exists(second["path"])
+    assert store.get_blob(second["sha256"]) is None
+    assert store.count_recordings(user_id) == 0
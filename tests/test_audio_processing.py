@@ -29,3 +29,240 @@ def test_audio_pipeline():
     assert "spectral_rolloff" in features
     
     print("Audio processing pipeline test passed.")
+
+
+def test_feature_engine_matches_per_feature_extraction():
+    """The shared-spectrogram engine reproduces the individual librosa calls."""
+    from preprocessing.feature_extraction import extract_mfcc, extract_spectral_features
+
+    sr = 16000
+    y = np.random.default_rng(0).standard_normal(sr * 3).astype(np.float32)
+
+    features = extract_features(y, sr)
+    centroid, bandwidth, rolloff = extract_spectral_features(y, sr)
+    expected = {
+        "mfccs": extract_mfcc(y, sr),
+        "spectral_centroid": centroid,
+        "spectral_bandwidth": bandwidth,
+        "spectral_rolloff": rolloff,
+    }
+    for name, value in expected.items():
+        assert features[name].dtype == np.float32
+        np.testing.assert_allclose(features[name], value, rtol=1e-4, atol=1e-2)
+
+    # Only the requested features are computed and returned
+    assert set(extract_features(y, sr, ("mfccs",))) == {"mfccs"}
+
+
+def test_streaming_pipeline_matches_batch(tmp_path):
+    """Block-wise denoise/VAD/features agree with the in-memory pipeline."""
+    import soundfile as sf
+    from preprocessing.streaming import stream_features, stream_preprocess
+
+    sr = 16000
+    t = np.arange(sr * 45) / sr
+    # Harmonic "speech" gated on and off, long enough to span several denoise chunks
+    voiced = sum(np.sin(2 * np.pi * k * (140 + 20 * np.sin(2 * np.pi * 0.5 * t)) * t) / k for k in range(1, 5))
+    y = 0.3 * voiced * (np.sin(2 * np.pi * 0.15 * t) > -0.3)
+    y = (y + 0.01 * np.random.default_rng(0).standard_normal(len(t))).astype(np.float32)
+    path = str(tmp_path / "long.wav")
+    sf.write(path, y, sr)
+
+    processed, _ = load_and_preprocess(path)
+    y_vad = apply_vad(processed)
+    batch = extract_features(y_vad, sr)
+
+    streamed_audio = np.concatenate(list(stream_preprocess(path, block_size=20000)))
+    np.testing.assert_allclose(streamed_audio, y_vad, atol=1e-5)
+
+    streamed = stream_features(path, block_size=20000)
+    for name, value in batch.items():
+        assert streamed[name].shape == value.shape
+        np.testing.assert_allclose(streamed[name], value, rtol=1e-4, atol=1e-3)
+
+
+def test_feature_cache_hits_and_evicts(tmp_path):
+    """Cached features skip recomputation; the size cap evicts least recently used entries."""
+    import os
+    from preprocessing.cache import FeatureCache
+    from utils.file_handler import FileHandler
+
+    cache = FeatureCache(FileHandler(str(tmp_path / "data")), max_bytes=10 ** 9)
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"same bytes")
+    calls = []
+
+    def compute(names):
+        calls.append(names)
+        return {name: np.ones((13, 10), dtype=np.float32) for name in names}
+
+    cache.get_or_compute(str(audio), compute, ("mfccs",))
+    features = cache.get_or_compute(str(audio), compute, ("mfccs",))
+    assert calls == [("mfccs",)]
+    assert features["mfccs"].shape == (13, 10)
+
+    # A wider request only computes what the entry lacks
+    cache.get_or_compute(str(audio), compute, ("mfccs", "spectral_rolloff"))
+    assert calls[-1] == ("spectral_rolloff",)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    # Shrinking the cap keeps only the most recently used entry
+    first_key = cache.key_for(digest="a" * 64)
+    cache.put(first_key, {"mfccs": np.zeros(1000, dtype=np.float32)})
+    os.utime(cache._path(first_key), (0, 0))
+    cache.max_bytes = os.path.getsize(cache._path(first_key))
+    cache.put(cache.key_for(digest="b" * 64), {"mfccs": np.zeros(1000, dtype=np.float32)})
+    assert cache.get(first_key, ("mfccs",)) is None
+    assert cache.stats()["evictions"] >= 1
+
+
+def test_compressed_uploads_decode_in_one_pass(tmp_path):
+    """mp3/m4a/mp4 decode straight to 16 kHz mono like librosa.load of the WAV, writing nothing to disk."""
+    import subprocess
+    import soundfile as sf
+    from preprocessing.decode import audio_duration, decode_audio, decode_blocks, ffmpeg_binary, ffmpeg_duration
+    from preprocessing.streaming import read_blocks
+
+    sr = 44100
+    t = np.arange(sr * 2) / sr
+    stereo = np.stack([np.sin(2 * np.pi * 220 * t), 0.5 * np.sin(2 * np.pi * 330 * t)], axis=1) * 0.3
+    source = tmp_path / "source.wav"
+    sf.write(str(source), stereo.astype(np.float32), sr)
+    expected, _ = librosa.load(str(source), sr=16000)
+
+    # Same samples as librosa for the same PCM, channels averaged and resampled alike
+    np.testing.assert_allclose(decode_audio(str(source)), expected, atol=1e-4)
+
+    for name in ("answer.mp3", "answer.m4a", "answer.mp4"):
+        encoded = tmp_path / name
+        subprocess.run([ffmpeg_binary(), "-nostdin", "-loglevel", "error", "-i", str(source), str(encoded)], check=True)
+        before = set(tmp_path.iterdir())
+
+        y, sr_out = load_and_preprocess(str(encoded))
+        assert sr_out == 16000 and y.dtype == np.float32
+        assert abs(len(y) - len(expected)) < 2048
+        assert set(tmp_path.iterdir()) == before
+        np.testing.assert_array_equal(np.concatenate(list(decode_blocks(str(encoded), block_size=1000))),
+                                      decode_audio(str(encoded)))
+        np.testing.assert_array_equal(np.concatenate(list(read_blocks(str(encoded)))), decode_audio(str(encoded)))
+        assert abs(ffmpeg_duration(str(encoded)) - 2.0) < 0.1
+        assert abs(audio_duration(str(encoded)) - 2.0) < 0.1
+
+    with pytest.raises(RuntimeError):
+        decode_audio(str(tmp_path / "missing.mp3"))
+
+
+def test_video_audio_extracted_without_moviepy(tmp_path):
+    """Only the audio stream of an upload is demuxed, written as a 16 kHz mono 16-bit WAV."""
+    import subprocess
+    import soundfile as sf
+    from preprocessing.decode import decode_audio, extract_audio, ffmpeg_binary
+
+    video = tmp_path / "answer.mp4"
+    subprocess.run([
+        ffmpeg_binary(), "-nostdin", "-loglevel", "error",
+        "-f", "lavfi", "-i", "testsrc2=s=320x240:r=25:d=2",
+        "-f", "lavfi", "-i", "sine=f=440:r=44100:d=2",
+        "-filter_complex", "[1:a]aformat=channel_layouts=stereo[a]", "-map", "0:v", "-map", "[a]",
+        "-c:v", "libx264", "-c:a", "aac", str(video),
+    ], check=True)
+
+    wav = tmp_path / "answer.wav"
+    assert extract_audio(str(video), str(wav)) == str(wav)
+    info = sf.info(str(wav))
+    assert (info.samplerate, info.channels, info.subtype) == (16000, 1, "PCM_16")
+    assert abs(info.duration - 2.0) < 0.1
+    y, _ = sf.read(str(wav), dtype="float32")
+    np.testing.assert_allclose(y, decode_audio(str(video))[:len(y)], atol=1 / 2 ** 15 + 1e-6)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["answer.mp4", "answer.wav"]
+
+    with pytest.raises(RuntimeError):
+        extract_audio(str(tmp_path / "missing.mp4"), str(tmp_path / "missing.wav"))
+    assert not (tmp_path / "missing.wav").exists()
+
+
+def test_saved_audio_is_content_addressed(tmp_path):
+    """Same-named files no longer overwrite each other, and identical audio is kept once."""
+    import io
+    import os
+    import soundfile as sf
+    from utils.file_handler import FileHandler
+
+    handler = FileHandler(str(tmp_path / "data"))
+    first, second = tmp_path / "a" / "answer.wav", tmp_path / "b" / "answer.wav"
+    for path, freq in ((first, 220), (second, 440)):
+        path.parent.mkdir()
+        sf.write(str(path), 0.1 * np.sin(2 * np.pi * freq * np.arange(16000) / 16000), 16000)
+
+    saved_first = handler.save_audio_file(str(first))
+    saved_second = handler.save_audio_file(str(second))
+    assert saved_first != saved_second
+    assert open(saved_first, "rb").read() == first.read_bytes()
+    assert handler.save_audio_file(io.BytesIO(first.read_bytes()), "copy.wav") == saved_first
+    assert sorted(handler.list_audio_files()) == sorted([saved_first, saved_second])
+    # Blob names and cache keys come from the same hash
+    assert os.path.basename(saved_first) == handler.get_file_hash(str(first)) + ".wav"
+
+
+def test_long_recordings_stream_alongside_local_transcription(tmp_path, monkeypatch):
+    """A backend that takes decoded audio only gets it for recordings short enough to load whole."""
+    import soundfile as sf
+    from detection import pipeline
+    from preprocessing import streaming
+    from transcription.backends import TranscriptionBackend
+
+    class LocalBackend(TranscriptionBackend):
+        name = "local"
+        uses_audio = True
+
+        def transcribe_result(self, path, audio=None):
+            self.audio = audio
+            return {"transcript": "Indeed.", "response": {}}
+
+    sr = 16000
+    t = np.arange(sr * 2) / sr
+    path = str(tmp_path / "answer.wav")
+    sf.write(path, 0.3 * np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * t) > 0), sr)
+
+    backend = LocalBackend()
+    pipeline.analyze_audio(path, None, cache=None, backend=backend, transcripts=None)
+    assert backend.audio is not None and backend.audio[1] == sr
+
+    def decode_whole(path):
+        raise AssertionError("a long recording was decoded whole")
+
+    monkeypatch.setattr(streaming, "STREAM_MIN_DURATION", 1.0)
+    monkeypatch.setattr(pipeline, "load_and_preprocess", decode_whole)
+    result = pipeline.analyze_audio(path, None, cache=None, backend=backend, transcripts=None)
+    assert backend.audio is None
+    assert result["transcript"] == "Indeed." and "mfccs" in result["features"]
+
+
+def test_concurrent_previews_of_one_file_both_complete(tmp_path):
+    """Two jobs encoding the same preview each write their own partial file and leave one whole copy."""
+    import os
+    import threading
+    import soundfile as sf
+    from preprocessing.decode import PREVIEW_CODEC, PREVIEW_FORMATS, audio_duration, encode_preview
+
+    source = str(tmp_path / "source.wav")
+    sf.write(source, 0.1 * np.sin(np.arange(16000 * 3) / 10), 16000)
+    dest = str(tmp_path / ("preview" + PREVIEW_FORMATS[PREVIEW_CODEC]["extension"]))
+
+    errors = []
+
+    def encode():
+        try:
+            encode_preview(source, dest)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=encode) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(os.listdir(tmp_path)) == sorted(["source.wav", os.path.basename(dest)])
+    assert abs(audio_duration(dest) - 3.0) < 0.1
@@ -0,0 +1,43 @@
+import threading
+import time
+
+from interface.jobs import JobQueue, JOB_DONE, JOB_FAILED
+
+
+def _wait_for(queue, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in (JOB_DONE, JOB_FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_job_queue_runs_jobs_in_background():
+    """Submitting returns immediately and the result is recorded on completion."""
+    queue = JobQueue(num_workers=2)
+    release = threading.Event()
+
+    job_id = queue.submit(lambda x: release.wait(5) and x * 2, 21)
+    assert queue.get(job_id)["status"] in ("queued", "running")
+
+    release.set()
+    job = _wait_for(queue, job_id)
+    assert job["status"] == JOB_DONE
+    assert job["result"] == 42
+    queue.shutdown()
+
+
+def test_job_queue_records_failures():
+    """Exceptions raised by a job mark it failed with the error message."""
+    queue = JobQueue(num_workers=1)
+
+    def boom():
+        raise RuntimeError("pipeline exploded")
+
+    job = _wait_for(queue, queue.submit(boom))
+    assert job["status"] == JOB_FAILED
+    assert "pipeline exploded" in job["error"]
+    assert queue.get("missing") is None
+    queue.shutdown()
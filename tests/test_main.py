@@ -0,0 +1,30 @@
+import numpy as np
+import soundfile as sf
+
+from main import file_id_for, find_recordings, run_batch
+from utils.file_handler import FileHandler
+
+
+def test_batch_keys_results_by_path_under_the_input_root(tmp_path):
+    """Recordings sharing a name in different folders, or with another extension, keep separate results."""
+    root = tmp_path / "input"
+    sr = 16000
+    for relative, freq in (("a/interview.wav", 220), ("b/interview.wav", 440), ("interview.flac", 330)):
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        sf.write(str(path), 0.1 * np.sin(2 * np.pi * freq * np.arange(sr) / sr), sr)
+
+    paths = find_recordings(str(root))
+    ids = [file_id_for(path, str(root)) for path in paths]
+    assert ids == ["a%2Finterview.wav", "b%2Finterview.wav", "interview.flac"]
+    assert file_id_for(paths[0], paths[0]) == "interview.wav"
+
+    data_dir = str(tmp_path / "data")
+    summary = run_batch(paths, data_dir, workers=1, root=str(root))
+    assert (summary["processed"], summary["failed"]) == (3, 0)
+    handler = FileHandler(data_dir)
+    assert [handler.load_analysis_results(file_id)["file"] for file_id in ids] == paths
+    assert not np.allclose(handler.load_features(ids[0])["mfccs"], handler.load_features(ids[1])["mfccs"])
+
+    # Resuming skips all three, and only those
+    assert run_batch(paths, data_dir, workers=1, root=str(root))["skipped"] == 3
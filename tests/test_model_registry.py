@@ -0,0 +1,34 @@
+import threading
+import time
+
+from utils.model_registry import ModelRegistry, warm_models
+
+
+def test_registry_loads_each_model_once():
+    """Concurrent first uses share a single load, and later calls reuse the loaded model."""
+    registry = ModelRegistry()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        time.sleep(0.05)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("m", loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(model is results[0] for model in results)
+    assert registry.is_loaded("m") and "m" in registry.stats()
+
+    registry.unload("m")
+    assert registry.get("m", loader) is not results[0]
+    assert len(loads) == 2
+
+
+def test_warm_models_skips_unknown_names():
+    assert warm_models(["no_such_model"]) == {}
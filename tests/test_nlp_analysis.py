@@ -0,0 +1,301 @@
+import os
+import threading
+from collections import Counter, OrderedDict
+
+import numpy as np
+import pytest
+import spacy
+from spacy.tokens import Doc
+
+from nlp_analysis.inference import load_classifier, onnx_path
+from nlp_analysis.language_model import AIDetectionModel
+from nlp_analysis.parse_stats import DocStats
+from nlp_analysis.text_analysis import TranscriptAnalyzer
+from nlp_analysis.text_stats import max_ngram_count, moving_average_ttr, token_ids
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    """AIDetectionModel with its transformer calls replaced by counters (no model download)."""
+    model = AIDetectionModel.__new__(AIDetectionModel)
+    model.cache_size = 2
+    model.perplexity_low, model.perplexity_high = 10.0, 100.0
+    model.use_language_model = True
+    model._output_cache = OrderedDict()
+    model._cache_lock = threading.Lock()
+    model.calls = []
+
+    def classify_batch(texts):
+        model.calls.extend(("cls", text) for text in texts)
+        return [(0.7, [0.6, 0.8]) for _ in texts]
+
+    def perplexity_batch(texts):
+        model.calls.extend(("lm", text) for text in texts)
+        return [10.0 for _ in texts]
+
+    monkeypatch.setattr(model, "_classify_batch", classify_batch)
+    monkeypatch.setattr(model, "_language_model_perplexity_batch", perplexity_batch)
+    return model
+
+
+def test_model_outputs_computed_once_per_text(detector):
+    """Perplexity and prediction share one memoized inference per text."""
+    assert detector._get_model_prediction("some text") == 0.7
+    assert detector._calculate_perplexity("some text") == 1.0
+    detector.analyze_text("Some text")
+    assert detector.predict_windows("Some text") == (0.7, [0.6, 0.8])
+    assert detector.calls == [("cls", "some text"), ("lm", "some text")]
+
+
+def test_single_forward_pass_without_language_model(detector):
+    """By default only the classifier runs, and its probability stands in for the perplexity score."""
+    detector.use_language_model = False
+    scores = detector.analyze_text("Some text")
+    assert detector.calls == [("cls", "some text")]
+    assert scores["perplexity_score"] == scores["model_confidence"] == 0.7
+    assert AIDetectionModel().use_language_model is False
+
+
+def test_model_output_cache_is_bounded_lru(detector):
+    """The least recently used text is evicted once cache_size is exceeded."""
+    for text in ("a", "b", "a", "c"):
+        detector._get_model_outputs(text)
+    detector._get_model_outputs("a")
+    detector._get_model_outputs("b")
+    assert [t for kind, t in detector.calls if kind == "cls"] == ["a", "b", "c", "b"]
+
+
+def test_analyze_batch_matches_single_calls(detector):
+    """A batch infers each distinct uncached text once and scores like analyze_text."""
+    texts = ["First answer here.", "Second answer.", "First answer here."]
+    batch = detector.analyze_batch(texts)
+    assert detector.calls == [("cls", "first answer here."), ("cls", "second answer."),
+                              ("lm", "first answer here."), ("lm", "second answer.")]
+    assert batch == [detector.analyze_text(text) for text in texts]
+
+
+def tiny_tokenizer():
+    """Word-level fast tokenizer over "w0".."w49", wrapping each text in <s> ... </s>."""
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors
+    from transformers import PreTrainedTokenizerFast
+
+    words = ["<pad>", "<s>", "</s>", "<unk>"] + [f"w{i}" for i in range(50)]
+    backend = Tokenizer(models.WordLevel({word: i for i, word in enumerate(words)}, unk_token="<unk>"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    backend.post_processor = processors.TemplateProcessing(
+        single="<s> $A </s>", special_tokens=[("<s>", 1), ("</s>", 2)]
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=backend, pad_token="<pad>", bos_token="<s>", eos_token="</s>", unk_token="<unk>"
+    )
+
+
+def tiny_detector(**kwargs):
+    """AIDetectionModel on a word-level tokenizer and tiny random RoBERTa and GPT-2 models (no download)."""
+    import torch
+    from transformers import GPT2Config, GPT2LMHeadModel, RobertaConfig, RobertaForSequenceClassification
+
+    tokenizer = tiny_tokenizer()
+    torch.manual_seed(0)
+    small = dict(num_hidden_layers=1, num_attention_heads=2, hidden_size=16, intermediate_size=32)
+    classifier = RobertaForSequenceClassification(RobertaConfig(
+        vocab_size=len(tokenizer), max_position_embeddings=64, pad_token_id=0, num_labels=2, **small
+    )).eval()
+    language_model = GPT2LMHeadModel(GPT2Config(
+        vocab_size=len(tokenizer), n_positions=12, n_embd=16, n_layer=1, n_head=2, pad_token_id=0
+    )).eval()
+
+    class TinyDetector(AIDetectionModel):
+        tokenizer = lm_tokenizer = None
+        model = lm_model = None
+
+    detector = TinyDetector(**kwargs)
+    detector.tokenizer = detector.lm_tokenizer = tokenizer
+    detector.model, detector.lm_model = classifier, language_model
+    return detector
+
+
+def test_sliding_windows_on_a_real_model():
+    """Long texts are scored over overlapping windows, pooled by token count, and batching doesn't change a window's score."""
+    import torch
+
+    detector = tiny_detector(window_size=12, window_overlap=4, window_batch_size=2, use_language_model=True)
+    long_text = " ".join(f"w{i % 50}" for i in range(30))
+    texts = [long_text, "w1 w2 w3"]
+
+    # Windows hold at most 12 tokens (10 of text plus <s> and </s>) and repeat the last 4 of the one before
+    encodings = detector.tokenizer(texts, truncation=True, max_length=12, stride=4, return_overflowing_tokens=True)
+    windows = [ids[1:-1] for ids, sample in zip(encodings["input_ids"], encodings["overflow_to_sample_mapping"])
+               if sample == 0]
+    content = detector.tokenizer(long_text, add_special_tokens=False)["input_ids"]
+    assert windows == [content[start:start + 10] for start in range(0, 30 - 4, 6)]
+
+    def alone(ids):
+        with torch.no_grad():
+            logits = detector.model(input_ids=torch.tensor([ids])).logits
+        return torch.softmax(logits, dim=1)[0, 1].item()
+
+    expected = []
+    for i in range(len(texts)):
+        rows = [ids for ids, sample in zip(encodings["input_ids"], encodings["overflow_to_sample_mapping"])
+                if sample == i]
+        scores = [alone(ids) for ids in rows]
+        expected.append((np.average(scores, weights=[len(ids) for ids in rows]), scores))
+
+    results = detector._classify_batch(texts)
+    assert [len(scores) for _, scores in results] == [5, 1]
+    for (probability, scores), (expected_probability, expected_scores) in zip(results, expected):
+        np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+        assert probability == pytest.approx(expected_probability, rel=1e-5)
+
+    # Perplexity pools the token losses of every context-length window of a text
+    def perplexity_alone(text):
+        losses = []
+        for ids in detector.lm_tokenizer(text, truncation=True, max_length=12, return_overflowing_tokens=True)["input_ids"]:
+            ids = torch.tensor([ids])
+            with torch.no_grad():
+                logits = detector.lm_model(input_ids=ids).logits
+            losses.append(torch.nn.functional.cross_entropy(logits[0, :-1], ids[0, 1:], reduction="none"))
+        return float(torch.exp(torch.cat(losses).mean()))
+
+    perplexities = detector._language_model_perplexity_batch(texts)
+    assert perplexities == pytest.approx([perplexity_alone(text) for text in texts], rel=1e-5)
+
+
+def test_analyze_batch_matches_single_calls_on_a_real_model():
+    """Batched inference scores each text as analyze_text does, in the order given, empty texts included."""
+    detector = tiny_detector(window_size=12, window_overlap=4, window_batch_size=3, use_language_model=True)
+    texts = [
+        " ".join(f"w{i % 50}" for i in range(40)),
+        "w3 w4 w5.",
+        "   ",
+        " ".join(f"w{(7 * i) % 50}" for i in range(17)),
+        "w3 w4 w5.",
+    ]
+    batch = detector.analyze_batch(texts)
+
+    detector._output_cache.clear()
+    for text, scores in zip(reversed(texts), reversed(batch)):
+        single = detector.analyze_text(text)
+        assert single.keys() == scores.keys()
+        for name in single:
+            assert single[name] == pytest.approx(scores[name], rel=1e-5, abs=1e-9)
+    assert batch[2]["model_confidence"] == 0.0 and batch[2]["perplexity_score"] == 0.0
+    assert batch[1] == batch[4] and batch[0] != batch[3]
+
+    # Without special tokens, one-word texts leave the language model nothing to predict
+    import copy
+    from tokenizers import processors
+    detector.lm_tokenizer = copy.deepcopy(detector.lm_tokenizer)
+    detector.lm_tokenizer.backend_tokenizer.post_processor = processors.TemplateProcessing(single="$A")
+    assert detector._language_model_perplexity_batch(["w1", "w2"]) == [float("inf")] * 2
+
+    # Nothing to run for a batch of empty texts, or no texts at all
+    detector.model = detector.lm_model = None
+    assert [scores["model_confidence"] for scores in detector.analyze_batch(["", " \n "])] == [0.0, 0.0]
+    assert detector.analyze_batch([]) == []
+
+
+def test_text_stats_match_naive_counting():
+    """Incremental MATTR and integer trigram counts agree with the set/dict versions."""
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in rng.zipf(1.5, size=400) % 60]
+    ids = token_ids(words)
+
+    windows = [len(set(words[i:i + 50])) / 50 for i in range(len(words) - 49)]
+    assert moving_average_ttr(ids, 50) == pytest.approx(np.mean(windows))
+    assert moving_average_ttr(ids[:10], 50) == len(set(words[:10])) / 10
+
+    trigrams = Counter(" ".join(words[i:i + 3]) for i in range(len(words) - 2))
+    assert max_ngram_count(ids, 3) == max(trigrams.values())
+    assert max_ngram_count(ids[:2], 3) == 0
+    # Too many distinct IDs to pack three into an int64: counted as rows, same answer
+    assert max_ngram_count(ids * 10 ** 7 + 3 * 10 ** 6, 3) == max(trigrams.values())
+
+
+def test_sentence_similarity_matrix_matches_span_similarity():
+    """Matrix-based coherence and consistency reproduce the pairwise Span.similarity loops."""
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    rng = np.random.default_rng(0)
+    for word in ("i", "like", "python", "code", "we", "ship", "it", "daily", "tests", "pass"):
+        nlp.vocab.set_vector(word, rng.standard_normal(8).astype(np.float32))
+    doc = nlp("I like python code. We ship it daily. I like python code. Tests pass. Zzz qqq. We ship code.")
+
+    analyzer = TranscriptAnalyzer.__new__(TranscriptAnalyzer)
+    analyzer.max_similarity_sentences = 2000
+    analyzer.similarity_sample_pairs = 500000
+    analyzer.similarity_chunk_pairs = 20000
+    sents = list(doc.sents)
+    adjacent = [sents[i].similarity(sents[i + 1]) for i in range(len(sents) - 1)]
+    pairs = [sents[i].similarity(sents[j]) for i in range(len(sents)) for j in range(i + 1, len(sents))]
+
+    assert analyzer._calculate_response_coherence(doc) == pytest.approx(np.mean(adjacent), abs=1e-6)
+    assert analyzer._analyze_semantic_consistency(doc) == pytest.approx(1 - min(1.0, np.var(pairs) * 2), abs=1e-6)
+
+    # Sampled mode approximates the exact variance
+    analyzer.max_similarity_sentences = 2
+    sampled = analyzer._analyze_semantic_consistency(doc)
+    assert sampled == pytest.approx(1 - min(1.0, np.var(pairs) * 2), abs=0.02)
+    # Gathering the sampled vectors a few pairs at a time gives the same similarities
+    analyzer.similarity_chunk_pairs = 7
+    assert analyzer._analyze_semantic_consistency(doc) == sampled
+
+
+def test_doc_stats_depths_match_token_ancestors():
+    """Vectorized dependency depths equal the per-token ancestor chains."""
+    words = ["The", "quick", "fox", "jumped", "over", "the", "dog", ".", "It", "ran", "."]
+    heads = [2, 2, 3, 3, 3, 6, 4, 3, 9, 9, 9]
+    deps = ["det", "amod", "nsubj", "ROOT", "prep", "det", "pobj", "punct", "nsubj", "ROOT", "punct"]
+    doc = Doc(spacy.blank("en").vocab, words=words, heads=heads, deps=deps)
+
+    stats = DocStats(doc)
+    assert stats.depths.tolist() == [len(list(token.ancestors)) for token in doc]
+    assert stats.sentence_depths.tolist() == [max(len(list(t.ancestors)) for t in sent) for sent in doc.sents]
+    assert stats.sentence_lengths.tolist() == [8, 3]
+    assert stats.words == ["the", "quick", "fox", "jumped", "over", "the", "dog", "it", "ran"]
+
+
+def test_inference_backend_selection():
+    """Unknown backends are rejected and ONNX exports get a filesystem-safe path per model."""
+    with pytest.raises(ValueError):
+        load_classifier("roberta-base", backend="tensorrt")
+    assert onnx_path("org/model v2", "exports") == os.path.join("exports", "org_model_v2", "model.onnx")
+
+
+def test_int8_and_onnx_backends_track_fp32(tmp_path, monkeypatch):
+    """Every load of a checkpoint without a trained head gets the same head, so int8 and ONNX track fp32."""
+    import torch
+    from transformers import RobertaConfig, RobertaModel
+    from nlp_analysis import inference
+    from nlp_analysis.inference import export_onnx
+
+    checkpoint, onnx_dir = str(tmp_path / "checkpoint"), str(tmp_path / "onnx")
+    tokenizer = tiny_tokenizer()
+    torch.manual_seed(0)
+    RobertaModel(RobertaConfig(
+        vocab_size=len(tokenizer), max_position_embeddings=64, pad_token_id=0,
+        num_hidden_layers=2, num_attention_heads=4, hidden_size=64, intermediate_size=128,
+    )).save_pretrained(checkpoint)
+    tokenizer.save_pretrained(checkpoint)
+    # Exported from its own load, as the benchmark's --export run is
+    export_onnx(checkpoint, onnx_dir)
+
+    rng = np.random.default_rng(0)
+    texts = [" ".join(f"w{i}" for i in rng.integers(50, size=rng.integers(3, 40))) for _ in range(16)]
+
+    def probabilities(backend):
+        tokenizer, model = load_classifier(checkpoint, backend, onnx_dir)
+        inputs = tokenizer(texts, return_tensors="pt", padding=True)
+        with torch.no_grad():
+            return torch.softmax(model(**inputs).logits, dim=1)[:, 1].numpy()
+
+    fp32 = probabilities("torch")
+    np.testing.assert_array_equal(probabilities("torch"), fp32)
+    np.testing.assert_allclose(probabilities("onnx"), fp32, atol=1e-5)
+    int8_error = np.abs(probabilities("torch_int8") - fp32).max()
+    assert int8_error < 2e-3
+
+    # The comparison is meaningful: a head drawn from another seed is much further off
+    monkeypatch.setattr(inference, "CLASSIFIER_SEED", 1)
+    assert np.abs(probabilities("torch") - fp32).max() > 10 * int8_error
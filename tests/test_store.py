@@ -0,0 +1,198 @@
+import sqlite3
+import threading
+import time
+
+from interface.jobs import JobQueue, JOB_DONE, JOB_FAILED, JOB_RUNNING
+from interface.store import MIGRATIONS, SQLiteStore
+
+
+def test_store_persists_users_recordings_and_scores(tmp_path):
+    """Everything survives reopening the database, as after a restart or in another worker."""
+    path = str(tmp_path / "app.db")
+    store = SQLiteStore(path)
+
+    user_id = store.create_user("alice", "s3cret")
+    assert store.create_user("alice", "other") is None
+    assert store.authenticate("alice", "wrong") is None
+    assert store.authenticate("alice", "s3cret") == {"id": user_id, "username": "alice"}
+    # Only a salted hash is stored
+    stored = store._connection().execute("SELECT password_hash FROM users").fetchone()[0]
+    assert "s3cret" not in stored
+
+    first = store.add_recording(user_id, "a.wav", "/uploads/a.wav")
+    second = store.add_recording(user_id, "b.wav", "/uploads/b.wav")
+    assert first["analyzed"] is False and first["status"] == "uploaded"
+    store.add_score(second["id"], 0.25, "old")
+    store.add_score(second["id"], 0.75, "hello")
+    store.set_recording_job(second["id"], "job-1")
+
+    other = SQLiteStore(path)
+    assert other.schema_version == len(MIGRATIONS)
+    assert other._connection().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    recordings = other.list_recordings(user_id)
+    assert [r["filename"] for r in recordings] == ["a.wav", "b.wav"]
+    assert recordings[1]["analyzed"] and recordings[1]["ai_score"] == 0.75
+    assert other.get_transcript(user_id, second["id"]) == "hello"
+    assert other.get_transcript(user_id, first["id"]) is None
+    assert other.job_owner("job-1") == user_id
+
+    # Recordings are only visible to their owner
+    mallory = other.create_user("mallory", "pw")
+    assert other.get_recording(mallory, second["id"]) is None
+    assert other.list_recordings(mallory) == []
+
+
+def test_job_states_are_written_through_to_the_store(tmp_path):
+    """A job queued in one process can be looked up from another process's queue."""
+    store = SQLiteStore(str(tmp_path / "app.db"))
+    queue = JobQueue(num_workers=1, store=store)
+    release = threading.Event()
+    job_id = queue.submit(lambda: release.wait(5) and {"ai_score": 0.5})
+
+    elsewhere = JobQueue(num_workers=1, store=SQLiteStore(store.path))
+    assert elsewhere.get(job_id)["status"] in ("queued", "running")
+
+    release.set()
+    deadline = time.time() + 5
+    while elsewhere.get(job_id)["status"] != JOB_DONE and time.time() < deadline:
+        time.sleep(0.01)
+    job = elsewhere.get(job_id)
+    assert job["status"] == JOB_DONE
+    assert job["result"] == {"ai_score": 0.5}
+    assert job["finished"] is not None
+    queue.shutdown()
+    elsewhere.shutdown()
+
+
+def test_only_one_request_queues_a_recording(tmp_path):
+    """Concurrent analyze requests for one recording queue a single job between them."""
+    store = SQLiteStore(str(tmp_path / "app.db"))
+    user_id = store.create_user("alice", "pw")
+    recording = store.add_recording(user_id, "a.wav", "/uploads/a.wav")
+
+    start = threading.Barrier(8)
+    queued = []
+
+    def analyze():
+        start.wait()
+        queued.append(store.queue_recording(recording["id"]))
+
+    threads = [threading.Thread(target=analyze) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(queued) == [False] * 7 + [True]
+    assert store.get_recording(user_id, recording["id"])["status"] == "queued"
+
+    store.set_recording_status(recording["id"], JOB_FAILED, "stopped")
+    assert store.queue_recording(recording["id"])
+
+
+def test_jobs_orphaned_by_a_restart_are_failed(tmp_path):
+    """Unfinished jobs of a stopped process are failed with their recordings; a live queue's jobs are not."""
+    path = str(tmp_path / "app.db")
+    store = SQLiteStore(path)
+    user_id = store.create_user("alice", "pw")
+    orphaned = store.add_recording(user_id, "a.wav", "/uploads/a.wav")
+    store.set_recording_status(orphaned["id"], JOB_RUNNING)
+    store.save_job({"id": "orphan", "status": JOB_RUNNING, "created": "2026-01-01T00:00:00"})
+    store.set_recording_job(orphaned["id"], "orphan")
+    # Last heard of before the server went down
+    store._connection().execute("UPDATE jobs SET heartbeat = '2026-01-01T00:00:00'")
+
+    live = JobQueue(num_workers=1, store=store, heartbeat_interval=0.05, stale_after=0.5)
+    release = threading.Event()
+    job_id = live.submit(lambda: release.wait(5) and {"ai_score": 0.5})
+    assert store.get_job("orphan")["status"] == JOB_FAILED
+    recording = store.get_recording(user_id, orphaned["id"])
+    assert recording["status"] == JOB_FAILED and "Interrupted" in recording["error"]
+
+    # Another worker process starting up, and checking for orphans past stale_after
+    restarted = JobQueue(num_workers=1, store=SQLiteStore(path), heartbeat_interval=0.05, stale_after=0.5)
+    time.sleep(1.0)
+    assert restarted.get(job_id)["status"] == "running"
+    release.set()
+    live.shutdown()
+    restarted.shutdown()
+    assert restarted.get(job_id)["status"] == JOB_DONE
+
+
+def test_logout_keeps_accounts(tmp_path):
+    """Logging out ends the session without deleting anyone's account."""
+    import interface.app as app_module
+
+    app_module.app.config.update(TESTING=True, DATABASE_PATH=str(tmp_path / "app.db"))
+    app_module._store = None
+    client = app_module.app.test_client()
+
+    client.post("/register", data={"username": "bob", "password": "pw"})
+    client.post("/login", data={"username": "bob", "password": "pw"})
+    assert client.get("/dashboard").status_code == 200
+    client.get("/logout")
+    assert client.get("/dashboard").status_code == 302
+
+    response = client.post("/login", data={"username": "bob", "password": "pw"})
+    assert response.headers["Location"].endswith("/dashboard")
+
+    # Transcripts are served separately from the dashboard, to their owner only
+    store = app_module.get_store()
+    bob = store.authenticate("bob", "pw")["id"]
+    recording = store.add_recording(bob, "answer.wav", "/uploads/answer.wav")
+    store.add_score(recording["id"], 0.5, "full transcript")
+    page = client.get("/dashboard?sort=score&order=asc&page=7").get_data(as_text=True)
+    assert "answer.wav" in page and "full transcript" not in page
+    assert client.get(f"/recordings/{recording['id']}/transcript").get_json()["transcript"] == "full transcript"
+    client.get("/logout")
+    store.create_user("eve", "pw")
+    client.post("/login", data={"username": "eve", "password": "pw"})
+    assert client.get(f"/recordings/{recording['id']}/transcript").status_code == 404
+    app_module._store = None
+
+
+def test_recordings_page_by_precomputed_summaries(tmp_path):
+    """Pages are sorted on the summary columns and never overlap."""
+    store = SQLiteStore(str(tmp_path / "app.db"))
+    user_id = store.create_user("alice", "pw")
+    ids = [store.add_recording(user_id, f"{i:02d}.wav", f"/uploads/{i:02d}.wav", duration=60.0 * (i % 4))["id"]
+           for i in range(10)]
+    for i, recording_id in enumerate(ids[:5]):
+        store.add_score(recording_id, i / 10, f"transcript {i}")
+    store.set_recording_status(ids[5], "failed", "boom")
+
+    assert store.count_recordings(user_id) == 10
+    pages = [store.list_recordings(user_id, limit=4, offset=offset) for offset in (0, 4, 8)]
+    assert [r["id"] for page in pages for r in page] == ids
+    assert "transcript" not in pages[0][0]
+
+    newest = store.list_recordings(user_id, limit=3, descending=True)
+    assert [r["filename"] for r in newest] == ["09.wav", "08.wav", "07.wav"]
+    best = store.list_recordings(user_id, limit=2, sort="ai_score", descending=True)
+    assert [(r["ai_score"], r["status"]) for r in best] == [(0.4, "analyzed"), (0.3, "analyzed")]
+    assert [r["duration"] for r in store.list_recordings(user_id, sort="duration")][:3] == [0.0, 0.0, 0.0]
+    failed = store.get_recording(user_id, ids[5])
+    assert (failed["status"], failed["error"], failed["analyzed"]) == ("failed", "boom", False)
+
+
+def test_summary_migration_backfills_existing_rows(tmp_path):
+    """Databases created before the summary columns get them filled from scores and jobs."""
+    path = str(tmp_path / "app.db")
+    connection = sqlite3.connect(path)
+    for statement in MIGRATIONS[0]:
+        connection.execute(statement)
+    connection.executescript("""
+        PRAGMA user_version = 1;
+        INSERT INTO users VALUES (1, 'alice', 'x', '2024-01-01');
+        INSERT INTO recordings VALUES (1, 1, 'a.wav', '/a.wav', NULL, '2024-01-01');
+        INSERT INTO recordings VALUES (2, 1, 'b.wav', '/b.wav', 'job-2', '2024-01-02');
+        INSERT INTO jobs VALUES ('job-2', 'failed', 'no audio', NULL, '2024-01-02', NULL, NULL);
+        INSERT INTO scores VALUES (1, 1, 0.2, 'old', '2024-01-01T10');
+        INSERT INTO scores VALUES (2, 1, 0.9, 'new', '2024-01-01T11');
+    """)
+    connection.close()
+
+    store = SQLiteStore(path)
+    assert store.schema_version == len(MIGRATIONS)
+    analyzed, failed = store.list_recordings(1)
+    assert (analyzed["status"], analyzed["ai_score"], analyzed["analyzed_at"]) == ("analyzed", 0.9, "2024-01-01T11")
+    assert (failed["status"], failed["error"]) == ("failed", "no audio")
@@ -0,0 +1,318 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+import numpy as np
+import pytest
+from werkzeug.serving import make_server
+
+from interface.app import app
+from transcription import gladia_client
+from transcription.async_gladia import RateLimiter, transcribe_all
+from transcription.backends import GladiaBackend, WhisperBackend, get_backend
+from transcription.cache import TranscriptCache
+from transcription.callbacks import CallbackRegistry
+from utils.file_handler import FileHandler
+from transcription.gladia_client import GladiaClient, GladiaError, poll_intervals
+from transcription.mock_gladia import DEFAULT_TRANSCRIPT, MockGladiaServer
+from utils.model_registry import default_registry
+
+
+@pytest.fixture
+def gladia():
+    with MockGladiaServer(api_key="test-key", polls_until_done=2) as server:
+        yield server
+
+
+@pytest.fixture
+def fast_polling(monkeypatch):
+    monkeypatch.setitem(gladia_client.POLLING, "min_interval", 0.001)
+    monkeypatch.setitem(gladia_client.POLLING, "max_interval", 0.001)
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    path = tmp_path / "answer.wav"
+    path.write_bytes(bytes(range(256)) * 5000)
+    return path
+
+
+def make_client(server, **kwargs):
+    kwargs.setdefault("backoff_factor", 0.01)
+    return GladiaClient("test-key", base_url=server.url, **kwargs)
+
+
+def test_transcribe_streams_upload_over_one_connection(gladia, audio_file, fast_polling):
+    """Upload, job creation and every poll reuse one keep-alive connection."""
+    with make_client(gladia) as client:
+        assert client.transcribe(str(audio_file)) == DEFAULT_TRANSCRIPT
+
+    upload = gladia.uploads[0]
+    assert upload["filename"] == "answer.wav"
+    assert upload["sha256"] == hashlib.sha256(audio_file.read_bytes()).hexdigest()
+    assert gladia.counts["GET /v2/pre-recorded/<id>"] == 2
+    assert gladia.counts["connections"] == 1
+
+
+def test_retries_rate_limits_and_server_errors(gladia, audio_file):
+    """429 and 5xx responses are retried, and an upload body is re-sent whole."""
+    gladia.fail_next(429, retry_after=0)
+    gladia.fail_next(503)
+    with make_client(gladia) as client:
+        assert client.upload(str(audio_file)).startswith(gladia.url)
+    assert gladia.counts["POST /v2/upload"] == 3
+    assert gladia.uploads[0]["size"] == audio_file.stat().st_size
+
+
+def test_gives_up_after_max_retries(gladia, audio_file):
+    gladia.fail_next(500, times=3)
+    with make_client(gladia, max_retries=2) as client:
+        with pytest.raises(GladiaError):
+            client.upload(str(audio_file))
+    assert gladia.counts["POST /v2/upload"] == 3
+
+
+def test_job_creation_is_not_repeated_once_sent(gladia):
+    """A job request is retried when rate limited or unsent, never after a server error."""
+    gladia.fail_next(429, retry_after=0)
+    gladia.fail_next(503)
+    with make_client(gladia) as client:
+        with pytest.raises(GladiaError):
+            client.request_transcript("http://example/audio")
+    assert gladia.counts["POST /v2/pre-recorded"] == 2
+
+    # Nothing listens on a stopped server's port: every attempt fails to connect
+    url = gladia.url
+    gladia.stop()
+    attempts = []
+    with GladiaClient("test-key", base_url=url, max_retries=2, backoff_factor=0.01) as client:
+        send = client.session.request
+        client.session.request = lambda *args, **kwargs: attempts.append(args) or send(*args, **kwargs)
+        with pytest.raises(GladiaError):
+            client.request_transcript("http://example/audio")
+    assert len(attempts) == 3
+
+
+def test_rejects_bad_api_key(gladia):
+    with GladiaClient("wrong-key", base_url=gladia.url) as client:
+        with pytest.raises(GladiaError):
+            client.request_transcript("http://example/audio")
+
+
+def test_poll_intervals_scale_with_audio_duration():
+    """Short clips are polled almost at once; long ones back off to the cap, with jitter."""
+    rng = random.Random(0)
+    short = next(poll_intervals(10, rng))
+    schedule = poll_intervals(3600, rng)
+    long = [next(schedule) for _ in range(10)]
+
+    low, high, jitter = (gladia_client.POLLING[k] for k in ("min_interval", "max_interval", "jitter"))
+    assert short <= low * (1 + jitter)
+    assert all(high * (1 - jitter) <= delay <= high * (1 + jitter) for delay in long)
+    assert len(set(long)) == len(long)
+
+
+def test_webhook_wakes_waiting_transcription(audio_file, monkeypatch):
+    """With a callback URL, the job returns as soon as Gladia calls the webhook, not at the next poll."""
+    monkeypatch.setitem(app.config, "GLADIA_CALLBACK_TOKEN", "secret")
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    callback_url = f"http://127.0.0.1:{server.server_port}/webhooks/gladia?token=secret"
+    try:
+        with MockGladiaServer(polls_until_done=1000, callback_delay=0.2) as gladia:
+            with make_client(gladia, callback_url=callback_url) as client:
+                started = time.monotonic()
+                assert client.transcribe(str(audio_file)) == DEFAULT_TRANSCRIPT
+                elapsed = time.monotonic() - started
+            assert gladia.counts["callbacks"] == 1
+            assert gladia.counts["GET /v2/pre-recorded/<id>"] == 1
+        # The first scheduled poll for audio of unknown length is seconds away
+        assert elapsed < min(next(poll_intervals(None, random.Random(0))), 2.0)
+    finally:
+        server.shutdown()
+
+
+def test_webhook_rejects_wrong_token(monkeypatch):
+    client = app.test_client()
+    monkeypatch.setitem(app.config, "GLADIA_CALLBACK_TOKEN", "")
+    assert client.post("/webhooks/gladia", json={"id": "x"}).status_code == 403
+
+    monkeypatch.setitem(app.config, "GLADIA_CALLBACK_TOKEN", "secret")
+    assert client.post("/webhooks/gladia?token=nope", json={"id": "x"}).status_code == 403
+    assert client.post("/webhooks/gladia?token=secret", json={"id": "x"}).status_code == 200
+    assert client.post("/webhooks/gladia?token=secret", json={}).status_code == 400
+
+
+def test_polling_continues_on_schedule_after_a_callback(gladia, monkeypatch):
+    """A callback ends one pause; the polls after it still wait out their intervals."""
+    monkeypatch.setitem(gladia_client.POLLING, "min_interval", 0.05)
+    monkeypatch.setitem(gladia_client.POLLING, "max_interval", 0.05)
+    waiter = CallbackRegistry().expect("job")
+    waiter.set({"id": "job", "status": "done"})
+    with make_client(gladia) as client:
+        job = client.request_transcript("http://example/audio")
+        started = time.monotonic()
+        client.poll_for_result(job["id"], waiter=waiter)
+        elapsed = time.monotonic() - started
+    assert gladia.counts["GET /v2/pre-recorded/<id>"] == 2
+    assert elapsed >= 0.05 * (1 - gladia_client.POLLING["jitter"])
+
+
+def test_unclaimed_callbacks_are_capped():
+    registry = CallbackRegistry(early_limit=3)
+    for n in range(5):
+        assert not registry.notify(f"job-{n}", {"id": f"job-{n}"})
+    assert registry.expect("job-0").wait(0) is None
+    assert registry.expect("job-4").wait(0) == {"id": "job-4"}
+
+
+def test_transcribe_all_runs_jobs_concurrently(gladia, tmp_path, fast_polling):
+    """Jobs overlap up to the concurrency limit, and one failure doesn't stop the rest."""
+    gladia.processing_time = 0.2
+    paths = []
+    for i in range(12):
+        path = tmp_path / f"answer_{i}.wav"
+        path.write_bytes(bytes([i]) * 4096)
+        paths.append(str(path))
+    paths.append(str(tmp_path / "missing.wav"))
+    gladia.fail_next(503)
+
+    started = time.monotonic()
+    results = transcribe_all(paths, "test-key", concurrency=6, rate_limit=0, base_url=gladia.url, backoff_factor=0.01)
+    elapsed = time.monotonic() - started
+
+    assert [r["path"] for r in results] == paths
+    assert all(r["transcript"] == DEFAULT_TRANSCRIPT and r["error"] is None for r in results[:-1])
+    assert results[-1]["transcript"] is None and "missing.wav" in results[-1]["error"]
+    assert len(gladia.uploads) == 12
+    assert gladia.counts["connections"] <= 6
+    # Two waves of six 0.2 s jobs, not twelve in a row
+    assert elapsed < 12 * 0.2
+
+
+def test_transcribe_all_probes_durations_off_the_event_loop(gladia, tmp_path, fast_polling, monkeypatch):
+    """A slow duration probe (ffmpeg for compressed audio) doesn't hold up the other jobs."""
+    from transcription import async_gladia
+
+    def slow_probe(path):
+        time.sleep(0.2)
+        return 1.0
+
+    monkeypatch.setattr(async_gladia, "audio_duration", slow_probe)
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"answer_{i}.mp3"
+        path.write_bytes(bytes([i]) * 4096)
+        paths.append(str(path))
+
+    started = time.monotonic()
+    results = transcribe_all(paths, "test-key", concurrency=6, rate_limit=0, base_url=gladia.url, backoff_factor=0.01)
+    assert all(r["error"] is None for r in results)
+    assert time.monotonic() - started < 6 * 0.2
+
+
+def test_rate_limiter_spaces_requests():
+    async def acquire(limiter, n):
+        started = time.monotonic()
+        for _ in range(n):
+            await limiter.acquire()
+        return time.monotonic() - started
+
+    # A burst of 5 is free, the other 5 wait 1/50 s each
+    assert 0.09 <= asyncio.run(acquire(RateLimiter(50, burst=5), 10)) < 0.5
+    assert asyncio.run(acquire(RateLimiter(0), 1000)) < 0.1
+
+
+def test_get_backend_selects_configured_service():
+    assert isinstance(get_backend("gladia", api_key="key"), GladiaBackend)
+    assert isinstance(get_backend("whisper"), WhisperBackend)
+    with pytest.raises(ValueError):
+        get_backend("google")
+    with pytest.raises(Exception, match="API key"):
+        get_backend("gladia").transcribe("answer.wav")
+
+
+def test_whisper_backend_transcribes_decoded_audio():
+    """The local backend uses the samples it is given, resampled to 16 kHz float32, without reading the file."""
+    class RecordingModel:
+        def transcribe(self, audio, **options):
+            self.audio = audio
+            return {
+                "text": " I have five years of experience.",
+                "language": "en",
+                "segments": [{
+                    "start": 0.0, "end": 1.0, "text": " I have five years of experience.",
+                    "words": [{"word": " I", "start": 0.0, "end": np.float32(0.5), "probability": np.float64(0.9)}],
+                }],
+            }
+
+    model = RecordingModel()
+    key = "whisper:openai-whisper:test"
+    default_registry.get(key, lambda: model)
+    try:
+        backend = WhisperBackend("test", engine="openai-whisper")
+        assert backend.uses_audio
+        audio = (np.ones(32000), 32000)
+        result = backend.transcribe_result("missing.wav", audio)
+    finally:
+        default_registry.unload(key)
+    assert model.audio.dtype == np.float32
+    assert len(model.audio) == 16000
+    assert result["transcript"] == "I have five years of experience."
+    assert result["response"]["segments"][0]["words"][0] == {"word": "I", "start": 0.0, "end": 0.5, "probability": 0.9}
+    json.dumps(result)
+
+
+@pytest.fixture
+def transcript_cache(tmp_path):
+    return TranscriptCache(FileHandler(str(tmp_path / "data")), max_bytes=10_000, ttl=3600)
+
+
+def test_transcript_cache_keys_on_audio_and_settings(transcript_cache, audio_file, monkeypatch):
+    settings = GladiaBackend("key").settings()
+    key = transcript_cache.key_for(settings, str(audio_file))
+    result = {"transcript": "Hello.", "response": {"result": {"utterances": [{"start": 0.0, "end": 0.5}]}}}
+
+    assert transcript_cache.get(key) is None
+    transcript_cache.put(key, result, settings)
+    started = time.perf_counter()
+    assert transcript_cache.get(key) == result
+    assert time.perf_counter() - started < 0.05
+
+    assert key != transcript_cache.key_for(GladiaBackend("key", diarization=True).settings(), str(audio_file))
+    assert key != transcript_cache.key_for(settings, digest="0" * 64)
+
+    # Local Whisper transcribes the denoised audio: the denoising setting is part of its key, MFCC ones aren't
+    from preprocessing import cache as feature_cache
+
+    whisper_key = transcript_cache.key_for(WhisperBackend("test").settings(), str(audio_file))
+    monkeypatch.setitem(feature_cache.config["preprocessing"]["mfcc"], "n_mfcc", 20)
+    assert transcript_cache.key_for(WhisperBackend("test").settings(), str(audio_file)) == whisper_key
+    monkeypatch.setitem(feature_cache.config["preprocessing"], "noise_reduction", False)
+    assert transcript_cache.key_for(WhisperBackend("test").settings(), str(audio_file)) != whisper_key
+
+    # Per-recording transcripts in the same directory are not cache entries
+    transcript_cache.handler.save_transcript("plain text", "answer")
+    assert transcript_cache.stats()["entries"] == 1
+
+
+def test_transcript_cache_expires_and_evicts(transcript_cache):
+    result = {"transcript": "x" * 3000, "response": None}
+    keys = [transcript_cache.key_for({"backend": "gladia"}, digest=str(i)) for i in range(4)]
+    now = time.time()
+    for i, key in enumerate(keys):
+        transcript_cache.put(key, result)
+        os.utime(transcript_cache._path(key), (now - 10 + i, now - 10 + i))
+    transcript_cache._evict()
+
+    # Over 10 kB: the least recently used entry is gone
+    assert transcript_cache.get(keys[0]) is None
+    assert transcript_cache.get(keys[3]) == result
+
+    transcript_cache.ttl = 0
+    assert transcript_cache.get(keys[3]) is None
+    assert not os.path.exists(transcript_cache._path(keys[3]))
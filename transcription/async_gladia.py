@@ -0,0 +1,304 @@
+"""
+Asynchronous Gladia client for transcribing many recordings at once.
+
+Each job still runs upload -> request_transcript -> poll, but jobs share one
+event loop and one httpx connection pool, so hundreds can wait on Gladia
+concurrently without a thread each. A semaphore caps the jobs in flight and
+a token bucket caps the request rate across all of them.
+
+    results = transcribe_all(paths, api_key, concurrency=100, rate_limit=20)
+"""
+import asyncio
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence
+
+import httpx
+
+from preprocessing.decode import audio_duration
+from transcription.gladia_client import (
+    GLADIA_BASE_URL,
+    GLADIA_CONFIG,
+    RETRY_STATUSES,
+    GladiaError,
+    _MultipartFile,
+    job_status,
+    job_timeout,
+    poll_intervals,
+    retry_delay,
+    transcript_text,
+)
+from utils.logger import default_logger as logger
+
+CONCURRENCY = GLADIA_CONFIG["concurrency"]
+RATE_LIMIT = GLADIA_CONFIG["rate_limit"]
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` acquisitions per second on average."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second (0 or None disables limiting)
+            burst: Bucket size, i.e. acquisitions allowed back to back (default: one second's worth)
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate or 0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        if not self.rate:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncGladiaClient:
+    """
+    Gladia pre-recorded transcription API on an httpx.AsyncClient.
+
+    Mirrors GladiaClient's retries, streamed uploads and polling schedule.
+    Jobs are only polled: completion webhooks are delivered to the Flask app's
+    process, not to a batch run's event loop.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = GLADIA_BASE_URL,
+        connect_timeout: float = GLADIA_CONFIG["connect_timeout"],
+        read_timeout: float = GLADIA_CONFIG["read_timeout"],
+        max_retries: int = GLADIA_CONFIG["max_retries"],
+        backoff_factor: float = GLADIA_CONFIG["backoff_factor"],
+        max_connections: int = CONCURRENCY,
+        rate_limit: float = RATE_LIMIT,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            api_key: Gladia API key
+            base_url: API root, e.g. a local mock server for offline runs
+            connect_timeout: Seconds to wait for a connection
+            read_timeout: Seconds to wait between bytes of a response
+            max_retries: Retries after a 429/5xx response or connection failure
+            backoff_factor: Base delay; retry n waits about backoff_factor * 2**n seconds
+            max_connections: Connections opened to the API at most
+            rate_limit: Requests per second across all jobs, retries included (0 for no limit)
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers={"x-gladia-key": api_key},
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def _request(self, method: str, path: str, body_factory=None, idempotent: bool = True,
+                       **kwargs) -> httpx.Response:
+        """
+        Send a request, retrying rate-limited, failed and unreachable attempts.
+
+        Args:
+            method: HTTP method
+            path: Path below base_url
+            body_factory: Called before every attempt to build a fresh streamed body
+            idempotent: False for requests that must not be repeated once they may have
+                reached the server; only 429 responses and failures to connect are retried
+            **kwargs: Passed to httpx
+
+        Returns:
+            httpx.Response: The first response that is not retryable
+        """
+        retry_statuses = RETRY_STATUSES if idempotent else {429}
+        for attempt in range(self.max_retries + 1):
+            if body_factory is not None:
+                kwargs["content"] = body_factory()
+            await self.rate_limiter.acquire()
+            response = None
+            try:
+                response = await self.client.request(method, path, **kwargs)
+                if response.status_code not in retry_statuses or attempt == self.max_retries:
+                    return response
+                reason = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                # Only these are raised before any of the request was written
+                never_sent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+                if attempt == self.max_retries or not (idempotent or never_sent):
+                    raise GladiaError(f"{method} {path} failed after {attempt + 1} attempts: {e}") from e
+                reason = type(e).__name__
+
+            delay = retry_delay(attempt, self.backoff_factor, response.headers if response is not None else None)
+            logger.log_warning(f"Gladia {method} {path}: {reason}, retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def _json(self, response: httpx.Response) -> Dict:
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise GladiaError(str(e)) from e
+        return response.json()
+
+    async def upload(self, path: str) -> str:
+        """
+        Upload a local recording, streaming it from disk.
+
+        Returns:
+            str: The audio_url to transcribe
+        """
+        boundary = uuid.uuid4().hex
+        body = _MultipartFile(path, "audio", boundary)
+        response = await self._request(
+            "POST",
+            "/v2/upload",
+            body_factory=body.aiter_chunks,
+            headers={
+                "Content-Type": f"multipart/form-data; boundary={boundary}",
+                "Content-Length": str(len(body)),
+            },
+        )
+        return self._json(response)["audio_url"]
+
+    async def request_transcript(self, audio_url: str, diarization: bool = False, translation: bool = False,
+                                 **options) -> Dict:
+        """
+        Create a pre-recorded transcription job.
+
+        Args:
+            audio_url: URL returned by upload()
+            diarization: Ask for speaker separation
+            translation: Ask for translation
+            **options: Further request parameters
+
+        Returns:
+            Dict: The job, with its id and result_url
+        """
+        payload = {"audio_url": audio_url, "diarization": diarization, "translation": translation, **options}
+        # Not idempotent: a repeated job would be transcribed and billed twice
+        return self._json(await self._request("POST", "/v2/pre-recorded", idempotent=False, json=payload))
+
+    async def get_result(self, transcript_id: str) -> Optional[Dict]:
+        """The job's current state, or None if it isn't visible yet."""
+        response = await self._request("GET", f"/v2/pre-recorded/{transcript_id}")
+        if response.status_code == 404:
+            return None
+        return self._json(response)
+
+    async def poll_for_result(self, transcript_id: str, audio_duration: Optional[float] = None,
+                              timeout: Optional[float] = None) -> Dict:
+        """
+        Wait for a job to finish, polling on the schedule of poll_intervals().
+
+        Args:
+            transcript_id: Job id from request_transcript()
+            audio_duration: Length of the audio in seconds, if known
+            timeout: Seconds to wait in total (job_timeout(audio_duration) if None)
+
+        Returns:
+            Dict: The completed job
+
+        Raises:
+            GladiaError: If the job ends in error
+            TimeoutError: If it is still running when the timeout expires
+        """
+        deadline = time.monotonic() + (timeout if timeout is not None else job_timeout(audio_duration))
+        for delay in poll_intervals(audio_duration):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(delay, remaining))
+
+            data = await self.get_result(transcript_id)
+            status = job_status(data)
+            if status in ("done", "completed"):
+                return data
+            if status == "error":
+                raise GladiaError(f"Couldn't transcribe text. Response: {data}")
+
+        raise TimeoutError("Couldn't complete transcription within time limit.")
+
+    async def transcribe(self, path: str, diarization: bool = False, translation: bool = False,
+                         timeout: Optional[float] = None) -> str:
+        """
+        Upload a recording, transcribe it and wait for the transcript.
+
+        Returns:
+            str: The full transcript
+        """
+        # Probing may run ffmpeg; off the event loop so the other jobs keep going meanwhile
+        duration = await asyncio.to_thread(audio_duration, path)
+        audio_url = await self.upload(path)
+        job = await self.request_transcript(audio_url, diarization, translation)
+        data = await self.poll_for_result(job["id"], duration, timeout)
+        return transcript_text(data)
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+async def transcribe_many(paths: Sequence[str], api_key: str, concurrency: int = CONCURRENCY,
+                          rate_limit: float = RATE_LIMIT, **client_options) -> List[Dict]:
+    """
+    Transcribe recordings concurrently, collecting each job's outcome.
+
+    A failed job is recorded and does not stop the others.
+
+    Args:
+        paths: Audio files to transcribe
+        api_key: Gladia API key
+        concurrency: Jobs in flight at once
+        rate_limit: Requests per second across all jobs (0 for no limit)
+        **client_options: Passed to AsyncGladiaClient, e.g. base_url
+
+    Returns:
+        List[Dict]: One result per path, in order, with the path, its transcript
+        (None on failure), the error message (None on success) and elapsed_s
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with AsyncGladiaClient(api_key, max_connections=concurrency, rate_limit=rate_limit,
+                                 **client_options) as client:
+
+        async def run(path):
+            async with semaphore:
+                started = time.perf_counter()
+                transcript = error = None
+                try:
+                    transcript = await client.transcribe(path)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    logger.log_error(f"Transcription failed for {path}", e)
+                return {
+                    "path": path,
+                    "transcript": transcript,
+                    "error": error,
+                    "elapsed_s": round(time.perf_counter() - started, 3),
+                }
+
+        return await asyncio.gather(*(run(path) for path in paths))
+
+
+def transcribe_all(paths: Sequence[str], api_key: str, **kwargs) -> List[Dict]:
+    """Blocking wrapper running transcribe_many() on a new event loop."""
+    return asyncio.run(transcribe_many(paths, api_key, **kwargs))
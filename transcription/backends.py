@@ -0,0 +1,220 @@
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import yaml
+
+from utils.model_registry import WHISPER_CONFIG, WHISPER_MODEL, get_whisper
+
+# Load configuration
+with open("config.yaml", "r") as file:
+    config = yaml.safe_load(file)
+
+TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", config["transcription"]["backend"])
+# Entries of preprocessing_settings() that change the audio Whisper is given (not the MFCC ones)
+WHISPER_INPUT_SETTINGS = ("version", "sample_rate", "noise_reduction")
+# Whisper models take 16 kHz mono float32 audio
+WHISPER_SAMPLE_RATE = 16000
+
+
+class TranscriptionBackend:
+    """Speech-to-text service that turns one recording into its transcript."""
+
+    name = None
+    # Whether transcribe() makes use of audio already decoded by load_and_preprocess
+    uses_audio = False
+
+    def settings(self) -> Dict:
+        """Everything that changes this backend's output for the same audio, for cache keys."""
+        return {"backend": self.name}
+
+    def transcribe_result(self, path: str, audio: Optional[Tuple[np.ndarray, int]] = None) -> Dict:
+        """
+        Transcribe a recording, keeping the backend's structured output.
+
+        Args:
+            path: Audio file
+            audio: (samples, sample_rate) already decoded from path, if available
+
+        Returns:
+            Dict: "transcript" text and the JSON-serializable "response", with timestamps
+        """
+        raise NotImplementedError
+
+    def transcribe(self, path: str, audio: Optional[Tuple[np.ndarray, int]] = None) -> str:
+        """
+        Transcribe a recording.
+
+        Args:
+            path: Audio file
+            audio: (samples, sample_rate) already decoded from path, if available
+
+        Returns:
+            str: The transcript
+        """
+        return self.transcribe_result(path, audio)["transcript"]
+
+
+class GladiaBackend(TranscriptionBackend):
+    """Gladia's hosted API: uploads the file and waits for the job to finish."""
+
+    name = "gladia"
+
+    def __init__(self, api_key: Optional[str], diarization: bool = False, translation: bool = False):
+        self.api_key = api_key
+        self.diarization = diarization
+        self.translation = translation
+
+    def settings(self) -> Dict:
+        return {"backend": self.name, "diarization": self.diarization, "translation": self.translation}
+
+    def transcribe_result(self, path: str, audio: Optional[Tuple[np.ndarray, int]] = None) -> Dict:
+        from transcription.gladia_client import get_client, transcript_text
+
+        if not self.api_key:
+            raise Exception("Gladia API key not configured")
+        data = get_client(self.api_key).transcribe_result(path, self.diarization, self.translation)
+        return {"transcript": transcript_text(data), "response": data}
+
+
+class WhisperBackend(TranscriptionBackend):
+    """Whisper run locally on CPU, with no upload or network round-trips."""
+
+    name = "whisper"
+    uses_audio = True
+
+    def __init__(
+        self,
+        model_size: str = WHISPER_MODEL,
+        engine: str = WHISPER_CONFIG["engine"],
+        language: Optional[str] = WHISPER_CONFIG["language"],
+        beam_size: int = WHISPER_CONFIG["beam_size"],
+        word_timestamps: bool = WHISPER_CONFIG["word_timestamps"],
+    ):
+        """
+        Initialize the backend; the model is loaded through the model registry on first use.
+
+        Args:
+            model_size: Whisper model size or local model path
+            engine: "faster-whisper" (CTranslate2) or "openai-whisper"
+            language: Spoken language, or None to detect it
+            beam_size: Beam width for decoding
+            word_timestamps: Align each word to the audio as well as each segment
+        """
+        self.model_size = model_size
+        self.engine = engine
+        self.language = language
+        self.beam_size = beam_size
+        self.word_timestamps = word_timestamps
+
+    @property
+    def model(self):
+        return get_whisper(self.model_size, self.engine)
+
+    def settings(self) -> Dict:
+        from preprocessing.cache import preprocessing_settings
+
+        # Whisper hears the denoised output of load_and_preprocess, so the settings shaping it count too
+        audio_settings = {k: v for k, v in preprocessing_settings().items() if k in WHISPER_INPUT_SETTINGS}
+        return {
+            "backend": self.name,
+            "engine": self.engine,
+            "model": self.model_size,
+            "language": self.language,
+            "beam_size": self.beam_size,
+            "word_timestamps": self.word_timestamps,
+            "preprocessing": audio_settings,
+        }
+
+    def transcribe_result(self, path: str, audio: Optional[Tuple[np.ndarray, int]] = None) -> Dict:
+        samples = whisper_input(path, audio)
+        options = {"language": self.language, "beam_size": self.beam_size, "word_timestamps": self.word_timestamps}
+        if self.engine == "faster-whisper":
+            segments, info = self.model.transcribe(samples, **options)
+            segments = [
+                {
+                    "start": segment.start,
+                    "end": segment.end,
+                    "text": segment.text,
+                    "words": [
+                        {"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+                        for w in segment.words or ()
+                    ],
+                }
+                for segment in segments
+            ]
+            language = info.language
+        else:
+            result = self.model.transcribe(samples, fp16=False, **options)
+            segments = result["segments"]
+            language = result["language"]
+
+        segments = [_segment_json(segment) for segment in segments]
+        text = "".join(segment["text"] for segment in segments)
+        return {"transcript": text.strip(), "response": {"language": language, "segments": segments}}
+
+
+def _segment_json(segment: Dict) -> Dict:
+    return {
+        "start": float(segment["start"]),
+        "end": float(segment["end"]),
+        "text": segment["text"],
+        "words": [
+            {
+                "word": word["word"].strip(),
+                "start": float(word["start"]),
+                "end": float(word["end"]),
+                "probability": float(word["probability"]),
+            }
+            for word in segment.get("words") or ()
+        ],
+    }
+
+
+def whisper_input(path: str, audio: Optional[Tuple[np.ndarray, int]] = None) -> np.ndarray:
+    """
+    Audio as Whisper takes it: 16 kHz mono float32.
+
+    Args:
+        path: Audio file, decoded only when audio is None
+        audio: (samples, sample_rate) from load_and_preprocess
+
+    Returns:
+        np.ndarray: Contiguous float32 samples
+    """
+    if audio is None:
+        from preprocessing.preprocess_audio import load_and_preprocess
+
+        audio = load_and_preprocess(path)
+    y, sr = audio
+    if y.ndim > 1:
+        y = y.mean(axis=0)
+    if sr != WHISPER_SAMPLE_RATE:
+        import librosa
+
+        y = librosa.resample(y, orig_sr=sr, target_sr=WHISPER_SAMPLE_RATE)
+    return np.ascontiguousarray(y, dtype=np.float32)
+
+
+BACKENDS = {
+    GladiaBackend.name: GladiaBackend,
+    WhisperBackend.name: WhisperBackend,
+}
+
+
+def get_backend(name: str = TRANSCRIPTION_BACKEND, api_key: Optional[str] = None) -> TranscriptionBackend:
+    """
+    The configured transcription backend.
+
+    Args:
+        name: Key of BACKENDS
+        api_key: Gladia API key, used by the gladia backend
+
+    Returns:
+        TranscriptionBackend: A backend instance
+    """
+    if name == GladiaBackend.name:
+        return GladiaBackend(api_key)
+    if name in BACKENDS:
+        return BACKENDS[name]()
+    raise ValueError(f"Unknown transcription backend: {name}")
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+import yaml
+
+from utils.blob_store import file_digest
+from utils.file_handler import FileHandler, default_handler
+from utils.logger import default_logger as logger
+
+# Load configuration
+with open("config.yaml", "r") as file:
+    config = yaml.safe_load(file)
+
+# Bump when the stored response layout changes
+CACHE_VERSION = 1
+MAX_CACHE_BYTES = int(config["cache"]["transcripts"]["max_size_mb"] * 1024 * 1024)
+TTL_SECONDS = config["cache"]["transcripts"]["ttl_days"] * 24 * 3600
+
+_ENTRY_NAME = re.compile(r"^[0-9a-f]{64}_transcript\.json$")
+
+
+class TranscriptCache:
+    """
+    Content-addressed cache of transcription responses, with a TTL and a size cap.
+
+    Entries are keyed by the audio's SHA-256 together with the backend and its
+    options, and saved through FileHandler.save_transcript as JSON next to the
+    per-recording transcripts. Least recently used entries are evicted first.
+    """
+
+    def __init__(self, handler: FileHandler = default_handler, max_bytes: int = MAX_CACHE_BYTES,
+                 ttl: float = TTL_SECONDS):
+        """
+        Initialize the cache under the file handler's transcript directory.
+
+        Args:
+            handler: FileHandler that stores the entries
+            max_bytes: Total size above which least recently used entries are evicted
+            ttl: Seconds after which an entry is stale and transcribed again
+        """
+        self.handler = handler
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def key_for(self, settings: Dict, path: Optional[str] = None, digest: Optional[str] = None) -> str:
+        """
+        Build the cache key for a recording.
+
+        Args:
+            settings: Backend and options that shape the transcript (TranscriptionBackend.settings())
+            path: Audio file to hash (ignored when digest is given)
+            digest: Precomputed SHA-256 of the audio bytes
+
+        Returns:
+            str: Hex key combining the audio hash and settings
+        """
+        if digest is None:
+            digest = file_digest(path)
+        settings = json.dumps({"version": CACHE_VERSION, **settings}, sort_keys=True)
+        return hashlib.sha256(f"{digest}:{settings}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a transcription.
+
+        Args:
+            key: Key from key_for()
+
+        Returns:
+            Optional[Dict]: The stored "transcript" and "response", or None on a miss
+        """
+        entry = self._load(key)
+        self._count(hit=entry is not None)
+        if entry is None:
+            return None
+        return {"transcript": entry["transcript"], "response": entry["response"]}
+
+    def put(self, key: str, result: Dict, settings: Optional[Dict] = None):
+        """
+        Store a transcription.
+
+        Args:
+            key: Key from key_for()
+            result: "transcript" and "response" from TranscriptionBackend.transcribe_result()
+            settings: Settings the key was built from, kept for inspection
+        """
+        entry = {
+            "version": CACHE_VERSION,
+            "created_at": time.time(),
+            "settings": settings,
+            "transcript": result["transcript"],
+            "response": result.get("response"),
+        }
+        self.handler.save_transcript(entry, key)
+        self._evict()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size, for monitoring."""
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl,
+        }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.handler.transcript_dir, f"{key}_transcript.json")
+
+    def _load(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.log_warning(f"Discarding unreadable transcript cache entry {path}: {e}")
+            self.handler.delete_file(path)
+            return None
+
+        if entry.get("version") != CACHE_VERSION or time.time() - entry.get("created_at", 0) > self.ttl:
+            self._remove(path)
+            return None
+        # Touch the entry so eviction sees it as recently used
+        os.utime(path)
+        return entry
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+            with self._lock:
+                self.evictions += 1
+        except FileNotFoundError:
+            pass
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.handler.transcript_dir):
+            # Skip the per-recording transcripts saved alongside the cache entries
+            if not _ENTRY_NAME.match(name):
+                continue
+            try:
+                st = os.stat(os.path.join(self.handler.transcript_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        now = time.time()
+        for mtime, size, name in entries:
+            # Least recently used first; anything untouched for longer than the TTL is stale anyway
+            if total <= self.max_bytes and now - mtime <= self.ttl:
+                break
+            self._remove(os.path.join(self.handler.transcript_dir, name))
+            total -= size
+
+
+# Create a default transcript cache instance
+default_transcript_cache = TranscriptCache()
@@ -0,0 +1,90 @@
+import threading
+import time
+from typing import Dict, Optional
+
+# Callbacks for jobs nobody is waiting on are kept this long, in case the
+# notification arrives before the waiter registers, up to a limit
+EARLY_CALLBACK_TTL = 300.0
+EARLY_CALLBACK_LIMIT = 1000
+
+
+class CallbackWaiter:
+    """Wakes one waiting transcription job when its completion callback arrives."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.payload = None
+        self._event = threading.Event()
+
+    def set(self, payload: Dict):
+        self.payload = payload
+        self._event.set()
+
+    def wait(self, timeout: Optional[float]) -> Optional[Dict]:
+        """
+        Block until a callback arrives or timeout elapses; returns the latest payload or None.
+
+        Each callback ends one wait only, so a caller polling after it still
+        waits out its full interval on later calls.
+        """
+        if self._event.wait(timeout):
+            self._event.clear()
+        return self.payload
+
+
+
+class CallbackRegistry:
+    """In-process registry matching Gladia completion callbacks to waiting jobs."""
+
+    def __init__(self, early_ttl: float = EARLY_CALLBACK_TTL, early_limit: int = EARLY_CALLBACK_LIMIT):
+        """
+        Initialize an empty registry.
+
+        Args:
+            early_ttl: Seconds an unclaimed callback is kept for a late waiter
+            early_limit: Most unclaimed callbacks kept; the oldest are dropped first
+        """
+        self.early_ttl = early_ttl
+        self.early_limit = early_limit
+        self._waiters = {}
+        self._early = {}
+        self._lock = threading.Lock()
+
+    def expect(self, job_id: str) -> CallbackWaiter:
+        """Register interest in a job's callback (already set if it arrived first)."""
+        with self._lock:
+            waiter = self._waiters.setdefault(job_id, CallbackWaiter(job_id))
+            early = self._early.pop(job_id, None)
+        if early is not None:
+            waiter.set(early[1])
+        return waiter
+
+    def notify(self, job_id: str, payload: Dict) -> bool:
+        """
+        Deliver a callback.
+
+        Returns:
+            bool: Whether a job in this process was waiting for it
+        """
+        with self._lock:
+            waiter = self._waiters.get(job_id)
+            if waiter is None:
+                now = time.monotonic()
+                self._early = {k: v for k, v in self._early.items() if now - v[0] < self.early_ttl}
+                self._early.pop(job_id, None)
+                while self._early and len(self._early) >= self.early_limit:
+                    del self._early[next(iter(self._early))]
+                self._early[job_id] = (now, payload)
+                return False
+        waiter.set(payload)
+        return True
+
+    def discard(self, job_id: str):
+        """Forget a job once its waiter is done with it."""
+        with self._lock:
+            self._waiters.pop(job_id, None)
+            self._early.pop(job_id, None)
+
+
+# Create a default registry instance
+default_callbacks = CallbackRegistry()
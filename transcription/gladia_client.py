@@ -0,0 +1,410 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+import requests
+import yaml
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from preprocessing.decode import audio_duration
+from transcription.callbacks import CallbackRegistry, CallbackWaiter, default_callbacks
+from utils.logger import default_logger as logger
+
+# Load configuration
+with open("config.yaml", "r") as file:
+    config = yaml.safe_load(file)
+
+GLADIA_CONFIG = config["transcription"]["gladia"]
+GLADIA_BASE_URL = os.getenv("GLADIA_BASE_URL", GLADIA_CONFIG["base_url"])
+# Public URL of the app's /webhooks/gladia endpoint; empty to rely on polling alone
+GLADIA_CALLBACK_URL = os.getenv("GLADIA_CALLBACK_URL", GLADIA_CONFIG["callback_url"])
+POLLING = GLADIA_CONFIG["polling"]
+DEFAULT_AUDIO_DURATION = 60.0
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class GladiaError(Exception):
+    """A Gladia request failed, or a transcription job ended in error."""
+
+
+class _MultipartFile:
+    """
+    Multipart form body for one file, read in chunks instead of loaded whole.
+
+    Exposes read() and a length so requests sends it with a Content-Length
+    header while streaming the file from disk.
+    """
+
+    def __init__(self, path: str, field: str, boundary: str, content_type: str = "application/octet-stream"):
+        self.path = path
+        filename = os.path.basename(path).replace('"', "")
+        self._head = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+        self._tail = f"\r\n--{boundary}--\r\n".encode()
+        self._size = os.path.getsize(path)
+        self._parts = None
+
+    def __len__(self):
+        return len(self._head) + self._size + len(self._tail)
+
+    def _chunks(self):
+        yield self._head
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = f.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        yield self._tail
+
+    async def aiter_chunks(self):
+        """The same body as an async iterator, reading the file off the event loop."""
+        yield self._head
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        yield self._tail
+
+    def read(self, size: int = -1) -> bytes:
+        """Returns the next piece of the body (b"" at the end); pieces may be shorter or longer than size."""
+        if self._parts is None:
+            self._parts = self._chunks()
+        return next(self._parts, b"")
+
+
+class GladiaClient:
+    """Gladia pre-recorded transcription API over one pooled, keep-alive HTTP session."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = GLADIA_BASE_URL,
+        connect_timeout: float = GLADIA_CONFIG["connect_timeout"],
+        read_timeout: float = GLADIA_CONFIG["read_timeout"],
+        max_retries: int = GLADIA_CONFIG["max_retries"],
+        backoff_factor: float = GLADIA_CONFIG["backoff_factor"],
+        pool_size: int = GLADIA_CONFIG["pool_size"],
+        callback_url: str = GLADIA_CALLBACK_URL,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            api_key: Gladia API key
+            base_url: API root, e.g. a local mock server for offline runs
+            connect_timeout: Seconds to wait for a connection
+            read_timeout: Seconds to wait between bytes of a response
+            max_retries: Retries after a 429/5xx response or connection failure
+            backoff_factor: Base delay; retry n waits about backoff_factor * 2**n seconds
+            pool_size: Connections kept alive per host
+            callback_url: Completion webhook URL sent with every job ("" to only poll)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.callback_url = callback_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+
+        self.session = requests.Session()
+        self.session.headers["x-gladia-key"] = api_key
+        # Retries are handled in _request so that Retry-After and streamed bodies are honoured
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _request(self, method: str, path: str, body_factory=None, idempotent: bool = True,
+                 **kwargs) -> requests.Response:
+        """
+        Send a request, retrying rate-limited, failed and unreachable attempts.
+
+        Args:
+            method: HTTP method
+            path: Path below base_url
+            body_factory: Called before every attempt to build a fresh streamed body
+            idempotent: False for requests that must not be repeated once they may have
+                reached the server; only 429 responses and failures to connect are retried
+            **kwargs: Passed to requests
+
+        Returns:
+            requests.Response: The first response that is not retryable
+        """
+        url = f"{self.base_url}{path}"
+        retry_statuses = RETRY_STATUSES if idempotent else {429}
+        for attempt in range(self.max_retries + 1):
+            if body_factory is not None:
+                kwargs["data"] = body_factory()
+            response = None
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+                if response.status_code not in retry_statuses or attempt == self.max_retries:
+                    return response
+                reason = f"HTTP {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries or not (idempotent or _never_sent(e)):
+                    raise GladiaError(f"{method} {path} failed after {attempt + 1} attempts: {e}") from e
+                reason = type(e).__name__
+
+            delay = retry_delay(attempt, self.backoff_factor, response.headers if response is not None else None)
+            logger.log_warning(f"Gladia {method} {path}: {reason}, retrying in {delay:.2f}s")
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+
+    def _json(self, response: requests.Response) -> Dict:
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            raise GladiaError(str(e)) from e
+        return response.json()
+
+    def upload(self, path: str) -> str:
+        """
+        Upload a local recording, streaming it from disk.
+
+        Returns:
+            str: The audio_url to transcribe
+        """
+        boundary = uuid.uuid4().hex
+        response = self._request(
+            "POST",
+            "/v2/upload",
+            body_factory=lambda: _MultipartFile(path, "audio", boundary),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+        return self._json(response)["audio_url"]
+
+    def request_transcript(self, audio_url: str, diarization: bool = False, translation: bool = False,
+                           callback_url: Optional[str] = None, **options) -> Dict:
+        """
+        Create a pre-recorded transcription job.
+
+        Args:
+            audio_url: URL returned by upload()
+            diarization: Ask for speaker separation
+            translation: Ask for translation
+            callback_url: URL Gladia notifies on completion (the client's default if None, "" for none)
+            **options: Further request parameters
+
+        Returns:
+            Dict: The job, with its id and result_url
+        """
+        callback_url = self.callback_url if callback_url is None else callback_url
+        payload = {"audio_url": audio_url, "diarization": diarization, "translation": translation, **options}
+        if callback_url:
+            payload.update(callback=True, callback_config={"url": callback_url, "method": "POST"})
+        # Not idempotent: a repeated job would be transcribed and billed twice
+        return self._json(self._request("POST", "/v2/pre-recorded", idempotent=False, json=payload))
+
+    def get_result(self, transcript_id: str) -> Optional[Dict]:
+        """The job's current state, or None if it isn't visible yet."""
+        response = self._request("GET", f"/v2/pre-recorded/{transcript_id}")
+        if response.status_code == 404:
+            return None
+        return self._json(response)
+
+    def wait_time(self, audio_duration: Optional[float]) -> float:
+        """How long to wait for a job on audio of this length before giving up."""
+        return job_timeout(audio_duration)
+
+    def poll_for_result(self, transcript_id: str, audio_duration: Optional[float] = None,
+                        timeout: Optional[float] = None, waiter: Optional[CallbackWaiter] = None) -> Dict:
+        """
+        Wait for a job to finish.
+
+        Polls on the jittered, duration-scaled schedule of poll_intervals(). With a
+        waiter, each pause ends early when the job's completion callback arrives,
+        so the result is fetched immediately; polling remains the fallback if the
+        callback is lost or lands in another process.
+
+        Args:
+            transcript_id: Job id from request_transcript()
+            audio_duration: Length of the audio in seconds, if known
+            timeout: Seconds to wait in total (wait_time(audio_duration) if None)
+            waiter: Callback waiter from CallbackRegistry.expect()
+
+        Returns:
+            Dict: The completed job
+
+        Raises:
+            GladiaError: If the job ends in error
+            TimeoutError: If it is still running when the timeout expires
+        """
+        deadline = time.monotonic() + (timeout if timeout is not None else self.wait_time(audio_duration))
+        for delay in poll_intervals(audio_duration):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            delay = min(delay, remaining)
+            if waiter is not None:
+                waiter.wait(delay)
+            else:
+                time.sleep(delay)
+
+            data = self.get_result(transcript_id)
+            status = job_status(data)
+            if status in ("done", "completed"):
+                return data
+            if status == "error":
+                raise GladiaError(f"Couldn't transcribe text. Response: {data}")
+
+        raise TimeoutError("Couldn't complete transcription within time limit.")
+
+    def transcribe_result(self, path: str, diarization: bool = False, translation: bool = False,
+                          callback_url: Optional[str] = None, timeout: Optional[float] = None,
+                          callbacks: CallbackRegistry = default_callbacks) -> Dict:
+        """
+        Upload a recording, transcribe it and wait for the completed job.
+
+        Args:
+            path: Audio file to transcribe
+            diarization: Ask for speaker separation
+            translation: Ask for translation
+            callback_url: URL Gladia notifies on completion (the client's default if None, "" for none)
+            timeout: Seconds to wait for the result
+            callbacks: Registry the webhook endpoint delivers callbacks to
+
+        Returns:
+            Dict: The completed job, with utterances and word timestamps under "result"
+        """
+        duration = audio_duration(path)
+        callback_url = self.callback_url if callback_url is None else callback_url
+
+        audio_url = self.upload(path)
+        job = self.request_transcript(audio_url, diarization, translation, callback_url)
+
+        # A callback that lands before expect() is held by the registry
+        waiter = callbacks.expect(job["id"]) if callback_url else None
+        try:
+            data = self.poll_for_result(job["id"], duration, timeout, waiter)
+        finally:
+            if waiter is not None:
+                callbacks.discard(job["id"])
+        return data
+
+    def transcribe(self, path: str, diarization: bool = False, translation: bool = False,
+                   callback_url: Optional[str] = None, timeout: Optional[float] = None,
+                   callbacks: CallbackRegistry = default_callbacks) -> str:
+        """
+        Upload a recording, transcribe it and wait for the transcript.
+
+        Returns:
+            str: The full transcript (see transcribe_result() for its arguments)
+        """
+        return transcript_text(
+            self.transcribe_result(path, diarization, translation, callback_url, timeout, callbacks)
+        )
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _never_sent(error: requests.RequestException) -> bool:
+    """Whether a failed request never reached the server because no connection was made."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def retry_delay(attempt: int, backoff_factor: float, headers=None) -> float:
+    """
+    Seconds to wait before retrying a failed request.
+
+    Args:
+        attempt: Zero-based number of the attempt that failed
+        backoff_factor: Base delay; retry n waits up to backoff_factor * 2**n seconds
+        headers: Headers of the failed response, if there was one; Retry-After wins
+
+    Returns:
+        float: Delay in seconds
+    """
+    if headers is not None:
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+    # Full jitter keeps concurrent clients from retrying in lockstep
+    return random.uniform(0, backoff_factor * (2 ** attempt))
+
+
+def job_timeout(audio_duration: Optional[float] = None) -> float:
+    """How long to wait for a job on audio of this length before giving up."""
+    duration = audio_duration or DEFAULT_AUDIO_DURATION
+    return max(POLLING["min_timeout"], duration * POLLING["timeout_factor"])
+
+
+def poll_intervals(audio_duration: Optional[float] = None, rng: random.Random = random):
+    """
+    Successive pauses between polls for a job on audio of the given length.
+
+    The first pause is a small fraction of the audio length and pauses grow
+    geometrically up to a larger fraction, both clamped to [min_interval,
+    max_interval]: short clips are checked almost at once, long recordings
+    are not polled more often than is useful. Each pause is jittered so many
+    jobs started together spread their polls out.
+
+    Args:
+        audio_duration: Length of the audio in seconds (a one-minute default if unknown)
+        rng: Source of jitter
+
+    Yields:
+        float: Seconds to wait before each poll
+    """
+    duration = audio_duration or DEFAULT_AUDIO_DURATION
+    low, high = POLLING["min_interval"], POLLING["max_interval"]
+    interval = min(high, max(low, duration * POLLING["first_fraction"]))
+    ceiling = min(high, max(low, duration * POLLING["max_fraction"]))
+    while True:
+        yield interval * rng.uniform(1 - POLLING["jitter"], 1 + POLLING["jitter"])
+        interval = min(ceiling, max(interval, interval * POLLING["growth"]))
+
+
+def job_status(data: Optional[Dict]) -> str:
+    """Lower-cased job state ("queued", "processing", "done" or "error"), "" if unknown."""
+    if not data:
+        return ""
+    return str(data.get("status") or data.get("event") or "").lower()
+
+
+def transcript_text(data: Dict) -> str:
+    """The full transcript of a completed job."""
+    result = data.get("result") or {}
+    transcription = result.get("transcription") or {}
+    if "full_transcription" in transcription:
+        return transcription["full_transcription"]
+    return data.get("prediction", "")
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key: str) -> GladiaClient:
+    """Process-wide client per API key, so every caller shares one connection pool."""
+    with _clients_lock:
+        if api_key not in _clients:
+            _clients[api_key] = GladiaClient(api_key)
+        return _clients[api_key]
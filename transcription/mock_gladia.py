@@ -0,0 +1,258 @@
+"""
+Local stand-in for the Gladia pre-recorded API, for offline tests and benchmarks.
+
+Implements the upload, pre-recorded job and poll endpoints, counts requests
+and TCP connections (to check keep-alive), records what was uploaded, and can
+inject 429/5xx responses to exercise client retries. Jobs created with
+callback enabled are completed after callback_delay seconds and POSTed to
+their callback URL, like Gladia's webhook.
+
+Run standalone and point the app at it:
+    python -m transcription.mock_gladia --port 8089
+    GLADIA_BASE_URL=http://127.0.0.1:8089 GLADIA_API_KEY=test-key python main.py --transcribe
+"""
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+import urllib.request
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+DEFAULT_TRANSCRIPT = "Hello, thank you for having me. I have five years of experience in software engineering."
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    server_version = "MockGladia/1.0"
+    # Send each response as one buffered write, without Nagle delays on kept-alive sockets
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.mock._count("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def _handle(self, method):
+        mock = self.server.mock
+        body = self._read_body()
+        mock._count(f"{method} {re.sub(r'/[0-9a-f-]{32,36}$', '/<id>', self.path)}")
+
+        if self.headers.get("x-gladia-key") != mock.api_key:
+            return self._send_json(401, {"message": "Invalid API key"})
+
+        fault = mock._take_fault()
+        if fault is not None:
+            status, retry_after = fault
+            headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+            return self._send_json(status, {"message": "Injected failure"}, headers)
+
+        if method == "POST" and self.path == "/v2/upload":
+            return self._send_json(200, mock._upload(self.headers.get("Content-Type", ""), body))
+        if method == "POST" and self.path == "/v2/pre-recorded":
+            return self._send_json(201, mock._create_job(json.loads(body or b"{}")))
+        match = re.fullmatch(r"/v2/pre-recorded/([^/]+)", self.path)
+        if method == "GET" and match:
+            job = mock._poll_job(match.group(1))
+            if job is None:
+                return self._send_json(404, {"message": "Not found"})
+            return self._send_json(200, job)
+        return self._send_json(404, {"message": "Not found"})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for hundreds of clients connecting at once
+    request_queue_size = 512
+
+
+class MockGladiaServer:
+    """Threaded HTTP server imitating Gladia's pre-recorded transcription API."""
+
+    def __init__(self, api_key: str = "test-key", host: str = "127.0.0.1", port: int = 0,
+                 polls_until_done: int = 2, transcript: str = DEFAULT_TRANSCRIPT,
+                 callback_delay: float = 0.5, processing_time: float = 0.0):
+        """
+        Initialize the server (call start() to begin serving).
+
+        Args:
+            api_key: Key clients must send in x-gladia-key
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            polls_until_done: Polls a job answers "processing" to before it is "done"
+            transcript: Text every job transcribes to
+            callback_delay: Seconds before a job with a callback completes and notifies
+            processing_time: Seconds a job also stays "processing" after it is created
+        """
+        self.api_key = api_key
+        self.polls_until_done = polls_until_done
+        self.transcript = transcript
+        self.callback_delay = callback_delay
+        self.processing_time = processing_time
+
+        self.counts = Counter()
+        self.uploads = []
+        self.jobs = {}
+        self._faults = []
+        self._lock = threading.Lock()
+
+        self._server = _Server((host, port), _Handler)
+        self._server.mock = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread until interrupted."""
+        self._server.serve_forever()
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def fail_next(self, status: int, times: int = 1, retry_after: Optional[float] = None):
+        """Answer the next `times` requests with `status` (and a Retry-After header if given)."""
+        with self._lock:
+            self._faults.extend([(status, retry_after)] * times)
+
+    def _take_fault(self):
+        with self._lock:
+            return self._faults.pop(0) if self._faults else None
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def _upload(self, content_type, body):
+        boundary = content_type.partition("boundary=")[2].strip('"')
+        if not boundary:
+            return {"message": "Expected multipart/form-data"}
+        start = body.index(b"\r\n\r\n") + 4
+        end = body.rindex(f"\r\n--{boundary}--".encode())
+        headers = body[:start].decode(errors="replace")
+        filename = re.search(r'filename="([^"]*)"', headers)
+        data = body[start:end]
+
+        file_id = uuid.uuid4().hex
+        with self._lock:
+            self.uploads.append({
+                "id": file_id,
+                "filename": filename.group(1) if filename else None,
+                "size": len(data),
+                "sha256": hashlib.sha256(data).hexdigest(),
+            })
+        return {
+            "audio_url": f"{self.url}/files/{file_id}",
+            "audio_metadata": {"id": file_id, "filename": filename.group(1) if filename else None, "size": len(data)},
+        }
+
+    def _create_job(self, payload):
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            self.jobs[job_id] = {"request": payload, "polls": 0, "done": False, "created": time.monotonic()}
+        callback_url = (payload.get("callback_config") or {}).get("url")
+        if payload.get("callback") and callback_url:
+            timer = threading.Timer(self.callback_delay, self._send_callback, (job_id, callback_url))
+            timer.daemon = True
+            timer.start()
+        return {"id": job_id, "result_url": f"{self.url}/v2/pre-recorded/{job_id}"}
+
+    def _result(self):
+        return {"transcription": {"full_transcription": self.transcript}}
+
+    def _send_callback(self, job_id, callback_url):
+        with self._lock:
+            self.jobs[job_id]["done"] = True
+        body = json.dumps({"id": job_id, "event": "transcription.success", "payload": self._result()}).encode()
+        request = urllib.request.Request(
+            callback_url, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                response.read()
+            self._count("callbacks")
+        except Exception:
+            self._count("callback_failures")
+
+    def _poll_job(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            job["polls"] += 1
+            done = job["done"] = job["done"] or (
+                job["polls"] >= self.polls_until_done
+                and time.monotonic() - job["created"] >= self.processing_time
+            )
+
+        response = {"id": job_id, "status": "done" if done else "processing", "request_params": job["request"]}
+        if done:
+            response["result"] = self._result()
+        return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--api-key", default="test-key")
+    parser.add_argument("--polls", type=int, default=2, help="Polls before a job is done")
+    parser.add_argument("--processing-time", type=float, default=0.0, help="Seconds before a job can be done")
+    args = parser.parse_args()
+
+    server = MockGladiaServer(args.api_key, args.host, args.port, polls_until_done=args.polls,
+                              processing_time=args.processing_time)
+    print(f"Mock Gladia API on {server.url} (key {args.api_key!r})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
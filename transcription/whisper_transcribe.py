@@ -1,67 +1,32 @@
-import time
-import requests
-import json
-import numpy as np
+from preprocessing.decode import audio_duration
+from transcription.callbacks import default_callbacks
+from transcription.gladia_client import get_client, transcript_text
 
 def upload(path, api_key):
-    url = "https://api.gladia.io/v2/upload"
-    headers = {
-        "x-gladia-key": api_key
-    }
-    with open(path, 'rb') as f:
-        files = {"audio": f}
-        response = requests.post(url, headers=headers, files=files)
-        response.raise_for_status()
-        data = dict(response.json())
-        return data.get("audio_url", "No audio url found")
+    # Streams the file through the shared keep-alive session
+    return get_client(api_key).upload(path)
     
 def request_transcript(audio_url: str, api_key: str, diarization: bool = False, translation: bool = False):
-    # Use the fixed endpoint
-    endpoint_url = "https://api.gladia.io/v2/pre-recorded"
-    headers = {
-        "Content-Type": "application/json",
-        "x-gladia-key": api_key
-    }
-    
-    payload = {
-        "audio_url": audio_url,  # Use the passed audio_url here
-        "diarization": diarization,
-        "translation": translation
-    }
-    
-    res = requests.post(endpoint_url, headers=headers, json=payload)
-    res.raise_for_status()
-    return res.json()
+    return get_client(api_key).request_transcript(
+        audio_url, diarization=diarization, translation=translation
+    )
 
 
-def poll_for_result(transcript_id, api_key, interval=5, max_attempts=60):
+def poll_for_result(transcript_id, api_key, audio_duration=None):
     """
-    Poll for transcription results with default interval of 5 seconds
-    and max attempts of 60 (5 minutes total waiting time)
+    Poll for transcription results, backing off on a jittered schedule
+    scaled to the audio duration (see gladia_client.poll_intervals).
+    When a callback URL is configured, the completion webhook ends the wait early.
     """
-    for _ in range(max_attempts):
-        url = f"https://api.gladia.io/v2/pre-recorded/{transcript_id}"
-        headers = {
-            "x-gladia-key": api_key
-        }
-        
-        resp = requests.get(url, headers=headers)
-         
-        if resp.status_code == 404:
-            time.sleep(interval)
-            continue
-        
-        resp.raise_for_status()
-        data = resp.json()
-        
-        status = data.get("event", "")
-        if status.lower() == "completed":
-            return data
-        elif status.lower() == "error":
-            return f"Couldn't transcribe text. Response: {data}"
-        time.sleep(interval)
-        
-    raise TimeoutError("Couldn't complete transcription within time limit.")
+    client = get_client(api_key)
+    if not client.callback_url:
+        return client.poll_for_result(transcript_id, audio_duration)
+
+    waiter = default_callbacks.expect(transcript_id)
+    try:
+        return client.poll_for_result(transcript_id, audio_duration, waiter=waiter)
+    finally:
+        default_callbacks.discard(transcript_id)
 
 def attempt_transcribe(path, api_key):
     # Step 1: Upload local file to get an audio_url
@@ -82,12 +47,12 @@ def attempt_transcribe(path, api_key):
 
     # Step 3: Poll for final results
     try:
-        final_data = poll_for_result(transcription_id, api_key)
+        final_data = poll_for_result(transcription_id, api_key, audio_duration(path))
         # final_data should contain the completed transcription.
-        transcript = final_data.get("prediction", "")
+        transcript = transcript_text(final_data)
         print("Transcription complete!\n")
         print("Transcript:\n", transcript)
         return transcript
     except Exception as e:
         print("Transcription failed:", e)
-        return str(e)
\ No newline at end of file
+        return str(e)
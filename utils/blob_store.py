@@ -0,0 +1,158 @@
+import fcntl
+import hashlib
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Optional, Tuple
+
+from .logger import default_logger as logger
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class BlobStore:
+    """
+    Content-addressed files: each distinct content is stored once, named by its SHA-256.
+
+    Files are written to a temporary name and renamed into place, so a blob
+    is either absent or complete. Who still uses a blob is tracked by the
+    caller (see the blobs table in interface.store); lock() serializes adding
+    and removing references across processes so a blob is never deleted
+    while it is being reused.
+    """
+
+    def __init__(self, root: str):
+        """
+        Initialize the blob store.
+
+        Args:
+            root: Directory the blobs are kept in
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, digest: str, extension: str = "") -> str:
+        """
+        Where the blob with a given SHA-256 is kept.
+
+        Args:
+            digest: Hex SHA-256 of the content
+            extension: File extension, kept so tools can tell the format from the name
+
+        Returns:
+            str: Path of the blob
+        """
+        return os.path.join(self.root, digest + extension.lower())
+
+    def put(self, src: str, digest: Optional[str] = None, extension: Optional[str] = None,
+            move: bool = False) -> Tuple[str, str]:
+        """
+        Store a file, unless a blob with the same content already exists.
+
+        Args:
+            src: File to store
+            digest: Its SHA-256, if already known (hashed otherwise)
+            extension: Extension of the blob (that of src if None)
+            move: Move src into the store instead of copying it; it is removed if the blob already exists
+
+        Returns:
+            Tuple[str, str]: SHA-256 and path of the blob
+        """
+        digest = digest or file_digest(src)
+        dest = self.path_for(digest, os.path.splitext(src)[1] if extension is None else extension)
+        if os.path.exists(dest):
+            if move:
+                os.remove(src)
+            logger.log_file_operation("deduplicate", dest, True)
+            return digest, dest
+
+        if move:
+            try:
+                os.replace(src, dest)
+            except OSError:
+                # Another filesystem: copy, then drop the source
+                self._copy_into_place(src, dest)
+                os.remove(src)
+        else:
+            self._copy_into_place(src, dest)
+        logger.log_file_operation("save", dest, True)
+        return digest, dest
+
+    def put_stream(self, stream: BinaryIO, extension: str = "") -> Tuple[str, str]:
+        """
+        Store the contents of a file-like object, hashing them on the way to disk.
+
+        Args:
+            stream: Readable binary stream
+            extension: Extension of the blob
+
+        Returns:
+            Tuple[str, str]: SHA-256 and path of the blob
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            hasher = hashlib.sha256()
+            with os.fdopen(fd, "wb") as f:
+                for block in iter(lambda: stream.read(HASH_BLOCK_SIZE), b""):
+                    hasher.update(block)
+                    f.write(block)
+            return self.put(tmp_path, hasher.hexdigest(), extension, move=True)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def remove(self, path: str):
+        """
+        Delete a blob, or a file derived from one, once nothing references it.
+
+        Args:
+            path: Path of the file
+        """
+        try:
+            os.remove(path)
+            logger.log_file_operation("delete", path, True)
+        except FileNotFoundError:
+            logger.log_warning(f"File not found: {path}")
+
+    @contextmanager
+    def lock(self):
+        """Hold the store's exclusive lock (shared by every process using the same root)."""
+        with open(os.path.join(self.root, ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _copy_into_place(self, src: str, dest: str):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(src, tmp_path)
+            os.replace(tmp_path, dest)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def file_digest(path: str, block_size: int = HASH_BLOCK_SIZE) -> str:
+    """
+    Compute the SHA-256 of a file without loading it whole.
+
+    The one file hasher: blob names, upload dedup and the feature and
+    transcript cache keys all come from it.
+
+    Args:
+        path: Path to file
+        block_size: Bytes read per step
+
+    Returns:
+        str: Hex digest of the file contents
+    """
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
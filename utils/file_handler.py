@@ -1,10 +1,12 @@
 import os
 import json
-import shutil
+import tempfile
 from typing import Dict, List, Optional, Union, BinaryIO
 from datetime import datetime
 import wave
+import numpy as np
 import soundfile as sf
+from .blob_store import HASH_BLOCK_SIZE, BlobStore, file_digest
 from .logger import default_logger as logger
 
 class FileHandler:
@@ -21,26 +23,33 @@ class FileHandler:
         self.audio_dir = os.path.join(base_dir, "audio")
         self.transcript_dir = os.path.join(base_dir, "transcripts")
         self.results_dir = os.path.join(base_dir, "results")
+        self.features_dir = os.path.join(base_dir, "features")
+        self.cache_dir = os.path.join(base_dir, "cache")
         
         # Create necessary directories
         self._create_directories()
+        self.audio_blobs = BlobStore(self.audio_dir)
         
         # Supported audio formats
         self.supported_formats = {'.wav', '.mp3', '.m4a', '.flac'}
 
     def _create_directories(self):
         """Create necessary directories if they don't exist."""
-        for directory in [self.base_dir, self.audio_dir, self.transcript_dir, self.results_dir]:
+        for directory in [self.base_dir, self.audio_dir, self.transcript_dir, self.results_dir, self.features_dir, self.cache_dir]:
             os.makedirs(directory, exist_ok=True)
             logger.log_file_operation("directory creation", directory, True)
 
     def save_audio_file(self, file: Union[str, BinaryIO], filename: Optional[str] = None) -> str:
         """
-        Save an audio file to the audio directory.
+        Save an audio file to the audio directory, named by the SHA-256 of its contents.
+        
+        Saving the same audio twice keeps a single copy, and files that happen
+        to share a name never overwrite each other.
         
         Args:
             file: Path to audio file or file-like object
-            filename: Optional filename to use (generated if not provided)
+            filename: Optional original name, whose extension the saved file keeps
+                (that of the path, or .wav for a file-like object, if not provided)
             
         Returns:
             str: Path to saved audio file
@@ -48,48 +57,54 @@ class FileHandler:
         try:
             if isinstance(file, str):
                 # If file is a path
-                ext = os.path.splitext(file)[1].lower()
+                ext = os.path.splitext(filename or file)[1].lower()
                 if ext not in self.supported_formats:
                     raise ValueError(f"Unsupported audio format: {ext}")
                 
-                if not filename:
-                    filename = os.path.basename(file)
-                
-                dest_path = os.path.join(self.audio_dir, filename)
-                shutil.copy2(file, dest_path)
+                _, dest_path = self.audio_blobs.put(file, extension=ext)
             else:
                 # If file is a file-like object
-                if not filename:
-                    filename = f"audio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
-                
-                dest_path = os.path.join(self.audio_dir, filename)
-                with open(dest_path, 'wb') as f:
-                    shutil.copyfileobj(file, f)
+                ext = os.path.splitext(filename)[1].lower() if filename else '.wav'
+                _, dest_path = self.audio_blobs.put_stream(file, extension=ext)
             
-            logger.log_file_operation("save", dest_path, True)
             return dest_path
             
         except Exception as e:
-            logger.log_error(f"Error saving audio file {filename}", e)
+            logger.log_error(f"Error saving audio file {filename or file}", e)
             raise
 
-    def save_transcript(self, transcript: str, file_id: str) -> str:
+    def save_transcript(self, transcript: Union[str, Dict], file_id: str) -> str:
         """
         Save a transcript to the transcript directory.
         
+        Plain text is saved as a .txt file; a structured transcription response
+        (e.g. with word timestamps) is saved as JSON. The file is replaced
+        atomically, so concurrent readers never see a partial transcript.
+        
         Args:
-            transcript: Transcript text
+            transcript: Transcript text, or a JSON-serializable response
             file_id: Associated file ID
             
         Returns:
             str: Path to saved transcript file
         """
         try:
-            filename = f"{file_id}_transcript.txt"
+            structured = isinstance(transcript, dict)
+            filename = f"{file_id}_transcript.json" if structured else f"{file_id}_transcript.txt"
             file_path = os.path.join(self.transcript_dir, filename)
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(transcript)
+            fd, tmp_path = tempfile.mkstemp(dir=self.transcript_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    if structured:
+                        json.dump(transcript, f)
+                    else:
+                        f.write(transcript)
+                os.replace(tmp_path, file_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
             
             logger.log_file_operation("save", file_path, True)
             return file_path
@@ -123,6 +138,52 @@ class FileHandler:
             logger.log_error(f"Error saving analysis results for {file_id}", e)
             raise
 
+    def save_features(self, features: Dict[str, np.ndarray], file_id: str) -> str:
+        """
+        Save extracted audio features as a compressed NumPy archive.
+        
+        Args:
+            features: Mapping of feature name to array
+            file_id: Associated file ID
+            
+        Returns:
+            str: Path to saved features file
+        """
+        try:
+            file_path = os.path.join(self.features_dir, f"{file_id}_features.npz")
+            np.savez_compressed(file_path, **features)
+            
+            logger.log_file_operation("save", file_path, True)
+            return file_path
+            
+        except Exception as e:
+            logger.log_error(f"Error saving features for {file_id}", e)
+            raise
+
+    def has_results(self, file_id: str) -> bool:
+        """
+        Check whether analysis results already exist for a file.
+        
+        Args:
+            file_id: File ID of the results
+            
+        Returns:
+            bool: True if a results file exists
+        """
+        return os.path.exists(os.path.join(self.results_dir, f"{file_id}_results.json"))
+
+    def has_transcript(self, file_id: str) -> bool:
+        """
+        Check whether a transcript already exists for a file.
+        
+        Args:
+            file_id: File ID of the transcript
+            
+        Returns:
+            bool: True if a transcript file exists
+        """
+        return os.path.exists(os.path.join(self.transcript_dir, f"{file_id}_transcript.txt"))
+
     def load_audio_file(self, file_path: str) -> tuple:
         """
         Load an audio file and return its data and sample rate.
@@ -188,6 +249,29 @@ class FileHandler:
             logger.log_error(f"Error loading analysis results for {file_id}", e)
             raise
 
+    def load_features(self, file_id: str) -> Dict[str, np.ndarray]:
+        """
+        Load saved audio features for a file.
+        
+        Args:
+            file_id: File ID of the features
+            
+        Returns:
+            Dict[str, np.ndarray]: Mapping of feature name to array
+        """
+        try:
+            file_path = os.path.join(self.features_dir, f"{file_id}_features.npz")
+            
+            with np.load(file_path) as archive:
+                features = {name: archive[name] for name in archive.files}
+            
+            logger.log_file_operation("load", file_path, True)
+            return features
+            
+        except Exception as e:
+            logger.log_error(f"Error loading features for {file_id}", e)
+            raise
+
     def list_audio_files(self) -> List[str]:
         """
         List all audio files in the audio directory.
@@ -281,5 +365,22 @@ class FileHandler:
             logger.log_error(f"Error getting file info for {file_path}", e)
             raise
 
+    def get_file_hash(self, file_path: str, chunk_size: int = HASH_BLOCK_SIZE) -> str:
+        """
+        Compute the SHA-256 of a file's contents without loading it whole (see blob_store.file_digest).
+        
+        Args:
+            file_path: Path to file
+            chunk_size: Bytes read per step
+            
+        Returns:
+            str: Hex digest of the file contents
+        """
+        try:
+            return file_digest(file_path, chunk_size)
+        except Exception as e:
+            logger.log_error(f"Error hashing file {file_path}", e)
+            raise
+
 # Create a default file handler instance
 default_handler = FileHandler()
@@ -0,0 +1,175 @@
+import importlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import yaml
+
+from nlp_analysis.inference import CLASSIFIER_BACKEND, load_classifier
+from utils.logger import default_logger as logger
+
+# Load configuration
+with open("config.yaml", "r") as file:
+    config = yaml.safe_load(file)
+
+CLASSIFIER_MODEL = config["models"]["classifier"]
+LANGUAGE_MODEL = config["models"]["language_model"]
+USE_LANGUAGE_MODEL = config["models"]["use_language_model"]
+SPACY_MODEL = config["nlp"]["model"]
+WHISPER_MODEL = config["transcription"]["model"]
+WHISPER_CONFIG = config["transcription"]["whisper"]
+# PRELOAD_MODELS (comma-separated) overrides the configured preload list
+PRELOAD_MODELS = tuple(
+    name for name in os.getenv("PRELOAD_MODELS", ",".join(config["models"]["preload"])).split(",") if name
+)
+
+
+class ModelRegistry:
+    """Process-wide store of loaded models, each loaded once on first use and shared by every caller."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._models = {}
+        self._load_times = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Return the model stored under key, loading it on first use.
+
+        Concurrent first calls for the same key wait for a single load;
+        loads of different keys do not block each other.
+
+        Args:
+            key: Identifier of the model, including its name or path
+            loader: Called without arguments to load the model
+
+        Returns:
+            Any: The shared model object
+        """
+        if key in self._models:
+            return self._models[key]
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self._models:
+                logger.log_model_load(key)
+                started = time.perf_counter()
+                model = loader()
+                self._load_times[key] = time.perf_counter() - started
+                self._models[key] = model
+        return self._models[key]
+
+    def is_loaded(self, key: str) -> bool:
+        """Whether the model under key has been loaded in this process."""
+        return key in self._models
+
+    def unload(self, key: str):
+        """Drop a loaded model so the next get() loads it again."""
+        with self._lock:
+            self._models.pop(key, None)
+            self._load_times.pop(key, None)
+
+    def stats(self) -> Dict[str, float]:
+        """Load time in seconds of every loaded model, for monitoring."""
+        return dict(self._load_times)
+
+
+def _load_language_model(name: str):
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(name)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    model = AutoModelForCausalLM.from_pretrained(name)
+    return tokenizer, model.eval()
+
+
+def _load_spacy(name: str):
+    import spacy
+
+    return spacy.load(name)
+
+
+def _load_whisper(size: str, engine: str):
+    if engine == "faster-whisper":
+        from faster_whisper import WhisperModel
+
+        return WhisperModel(size, device=WHISPER_CONFIG["device"], compute_type=WHISPER_CONFIG["compute_type"])
+    if engine == "openai-whisper":
+        import whisper
+
+        return whisper.load_model(size, device=WHISPER_CONFIG["device"])
+    raise ValueError(f"Unknown Whisper engine: {engine}")
+
+
+def get_classifier(name: str = CLASSIFIER_MODEL, backend: str = CLASSIFIER_BACKEND):
+    """Shared (tokenizer, model) pair of a sequence classifier, run by the given inference backend."""
+    return default_registry.get(f"classifier:{backend}:{name}", lambda: load_classifier(name, backend))
+
+
+def get_language_model(name: str = LANGUAGE_MODEL):
+    """Shared (tokenizer, model) pair of a causal language model."""
+    return default_registry.get(f"language_model:{name}", lambda: _load_language_model(name))
+
+
+def get_spacy(name: str = SPACY_MODEL):
+    """Shared spaCy pipeline."""
+    return default_registry.get(f"spacy:{name}", lambda: _load_spacy(name))
+
+
+def get_whisper(size: str = WHISPER_MODEL, engine: str = WHISPER_CONFIG["engine"]):
+    """Shared local Whisper speech-to-text model."""
+    return default_registry.get(f"whisper:{engine}:{size}", lambda: _load_whisper(size, engine))
+
+
+def get_audio_pipeline():
+    """The analysis pipeline module, whose import pulls in the whole DSP stack."""
+    return default_registry.get("audio_pipeline", lambda: importlib.import_module("detection.pipeline"))
+
+
+# Names accepted in config.yaml's models.preload
+PRELOADERS = {
+    "audio_pipeline": get_audio_pipeline,
+    "classifier": get_classifier,
+    "language_model": get_language_model,
+    "spacy": get_spacy,
+    "whisper": get_whisper,
+}
+
+
+def warm_models(names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """
+    Load models ahead of the first request.
+
+    Called in gunicorn's master before it forks, so workers inherit the loaded
+    models and share their memory copy-on-write. A model that fails to load is
+    logged and left to load lazily instead of stopping the server.
+
+    Args:
+        names: Keys of PRELOADERS to load (config.yaml's models.preload if None)
+
+    Returns:
+        Dict[str, float]: Seconds spent loading each model that loaded
+    """
+    names = PRELOAD_MODELS if names is None else tuple(names)
+    timings = {}
+    for name in names:
+        if name not in PRELOADERS:
+            logger.log_warning(f"Unknown model in preload list: {name}")
+            continue
+        started = time.perf_counter()
+        try:
+            PRELOADERS[name]()
+        except Exception as e:
+            logger.log_error(f"Error pre-loading model {name}", e)
+            continue
+        timings[name] = time.perf_counter() - started
+    return timings
+
+
+# Create a default registry instance
+default_registry = ModelRegistry()